@@ -1,29 +1,58 @@
-import time
+import json
+from collections import deque
+from types import MappingProxyType
 from game import TetrisGame
-from sounds import SoundManager
+from sim_clock import SystemClock
+from bitboard import grid_to_rows, drop_placements, place, clear_full_rows
+from movegen import generate_placements
+from parallel_search import score_placements, shutdown_pool
+from ai_search import BeamSearch, Expectimax
+from transposition import TranspositionTable, board_key
+from evaluation import evaluate_batch, evaluate_board, rows_to_cells
+from ai_worker import ThinkWorker
+from ai_policy import BoardState, make_policy
+from rollout import RolloutEvaluator
+from finesse import plan_inputs, drop_interval, SOFT_DROP
+from tetromino import PIECE_TYPES
 from config import *
 
 class AIPlayer:
-    def __init__(self, sound_manager, start_level=0):
-        self.game = TetrisGame(start_level, sound_manager=sound_manager)
+    def __init__(self, sound_manager, start_level=0, clock=None, seed=None, background=False,
+                 anytime=None, policy=None, weights_file=None):
+        self.clock = clock if clock is not None else SystemClock()
+        self.game = TetrisGame(start_level, sound_manager=sound_manager, clock=self.clock, seed=seed)
         self.sound_manager = sound_manager
         self.last_move_time = 0
-        self.move_delay = DAS_SPEED  # Match player's DAS speed for actions
+        self.move_delay = FRAME_TIME / 2  # One scheduled input frame per game frame
         self.thinking = False
         self.think_start_time = 0
+        self.think_spawn_id = None  # game.spawn_id of the piece being thought about
+        self.think_ticket = None  # Background search request (ThinkWorker ticket)
         self.planned_move = None
+        self.parallel_workers = AI_PARALLEL_WORKERS  # > 1 searches moves on a process pool
+        # Beam search over the known piece queue; depth 0 keeps the one-piece search
+        self.planner = BeamSearch(self.evaluate_rows_batch, AI_SEARCH_DEPTH, AI_BEAM_WIDTH)
+        # 'expectimax' searches the next piece plus the randomizer's bag odds instead
+        self.search_mode = AI_SEARCH_MODE
+        self.expectimax = Expectimax(self.evaluate_rows_batch, AI_EXPECTIMAX_DEPTH,
+                                     AI_EXPECTIMAX_WIDTH)
+        # 'rollout' plays the best candidates out with random bag continuations
+        self.rollout = RolloutEvaluator(self.evaluate_rows_batch, seed=seed)
         
         # AI movement state
         self.current_action = None
-        self.action_queue = []
+        self.action_queue = deque()  # Per-frame inputs from the finesse planner
+        self.action_piece = None  # game.spawn_id of the piece the queue was planned for
         self.target_x = None
         self.target_rotation = None
         self.movement_step = 0
         
-        # AI timing - Match player's movement speed
+        # AI timing - same DAS and soft drop model as the player (finesse.py)
         self.last_horizontal_move = 0
-        self.last_drop_time = 0
-        self.drop_delay = DAS_SPEED  # Match player's movement speed
+        self.drop_frames = 0  # Frames spent soft dropping the current piece
+        
+        # Cached evaluate_grid scores, shared by every search this player runs
+        self.eval_cache = TranspositionTable(AI_CACHE_MB)
         
         # PERFECT AI heuristic weights - mathematically optimized for unbeatable play
         self.weights = {
@@ -53,17 +82,66 @@ class AIPlayer:
             'threat_assessment': -6.0,     # MASSIVE penalty for dangerous situations
             'efficiency_multiplier': 2.0   # Multiplier for efficient play
         }
+        # Opt-in saved profile (tune_weights.py / train_value.py), a name in tetris_battle/ or a path
+        if weights_file:
+            self.load_weights(weights_path(weights_file))
+    
+        # Search on a background thread so update() never blocks the render loop
+        self.worker = ThinkWorker(self.search_move) if background else None
+        # Anytime search deepens until a per-move deadline (default with background)
+        self.anytime = background if anytime is None else anytime
+        # Set by step(): budgets are then counted in search nodes, not wall-clock time
+        self.headless = False
+        # Another registered ai_policy (name or Policy) replaces this player's own search
+        self.policy = make_policy(policy) if isinstance(policy, str) else policy
+    
+    @property
+    def weights(self):
+        return self._weights
+    
+    @weights.setter
+    def weights(self, weights):
+        # Read-only, so every change goes through here and cached scores
+        # computed with the old weights are dropped
+        self._weights = MappingProxyType(dict(weights))
+        self.eval_cache.clear()
+    
+    def load_weights(self, path):
+        """Load heuristic weights from a JSON weights file (e.g. from tune_weights.py)
+        
+        Keys missing from the file keep their current values.
+        """
+        with open(path) as f:
+            data = json.load(f)
+        self.weights = dict(self.weights, **data['weights'])
+        return self.weights
     
     def update(self, dt):
         """Update AI state"""
         if self.game.game_over:
             return
         
-        current_time = time.time() * 1000  # Convert to ms
-        
         # Update game state first
         self.game.update(dt)
-        
+        self._act(self.clock.get_ticks())
+    
+    def step(self, frames=1):
+        """Advance the game and the AI by whole frames (headless, deterministic)
+        
+        AI timing follows the game's simulated frame time instead of the
+        clock, so a match can run much faster than real time. Anytime
+        budgets are spent in search nodes (AI_HEADLESS_NODE_RATE per
+        second), so a seed replays the same moves on any machine.
+        """
+        self.headless = True
+        for _ in range(frames):
+            if self.game.game_over:
+                break
+            self.game.step(1)
+            self._act(self.game.sim_time)
+    
+    def _act(self, current_time):
+        """Think and execute queued actions at the given time (ms)"""
         # If game over after update, stop
         if self.game.game_over:
             return
@@ -74,184 +152,298 @@ class AIPlayer:
         
         # Check if we need to start thinking about a new piece
         if self.game.current_piece and not self.thinking and not self.action_queue:
-            self.start_thinking()
+            self.start_thinking(current_time)
         
         # Check if thinking time is up
-        if self.thinking and current_time - self.think_start_time >= AI_THINK_TIME * 3000:  # 3x longer thinking time
-            self.plan_actions()
+        think_time = self.think_budget() * 1000 if self.anytime else AI_THINK_TIME * 3000  # 3x longer thinking time
+        if self.thinking and current_time - self.think_start_time >= think_time:
+            if self.worker:
+                # Use the background result once it is ready; keep rendering until then
+                ready, move = self.worker.poll(self.think_ticket)
+                if ready:
+                    self.planned_move = move
+                    self.plan_actions()
+                elif self.think_spawn_id != self.game.spawn_id:
+                    self.thinking = False  # Piece locked while thinking; think again below
+            else:
+                self.plan_actions()
         
         # Execute actions if we have them
         if self.action_queue and current_time - self.last_move_time >= self.move_delay:
-            self.execute_next_action()
+            self.execute_next_action(current_time)
         
-        # Fallback: if no actions and piece exists, think again
-        if not self.action_queue and not self.thinking and self.game.current_piece:
-            self.start_thinking()
+        # Fallback: if no actions and piece exists, think again (not for a piece
+        # that just locked and is waiting for its line clear)
+        if (not self.action_queue and not self.thinking and self.game.current_piece
+                and not self.game.clear_animation_active):
+            self.start_thinking(current_time)
     
-    def start_thinking(self):
-        """Start thinking about the next move"""
+    def start_thinking(self, current_time=None):
+        """Start thinking about the next move
+        
+        With a background worker this only hands the search off; the move
+        is picked up in _act once AI_THINK_TIME has passed.
+        """
         self.thinking = True
-        self.think_start_time = time.time() * 1000
-        self.planned_move = self.find_best_move()
+        self.think_start_time = current_time if current_time is not None else self.clock.get_ticks()
+        self.think_spawn_id = self.game.spawn_id
+        if self.worker:
+            self.planned_move = None
+            request = self.search_request()
+            if request is not None:
+                self.think_ticket = self.worker.submit(self.think_spawn_id, *request)
+        else:
+            self.planned_move = self.find_best_move()
     
     def plan_actions(self):
-        """Plan the sequence of actions to reach the target"""
-        if self.planned_move:
-            target_x, target_rotation = self.planned_move
+        """Plan the per-frame inputs that take the piece to the planned move"""
+        # A move planned for a piece that has since locked doesn't apply
+        if self.planned_move and self.think_spawn_id == self.game.spawn_id:
             current_piece = self.game.current_piece
             
             if current_piece:
-                self.action_queue = []
-                
-                # Add rotation actions
-                rotations_needed = (target_rotation - current_piece.rotation) % 4
-                for _ in range(rotations_needed):
-                    self.action_queue.append('rotate')
-                
-                # Add horizontal movement actions
-                x_diff = target_x - current_piece.x
-                if x_diff < 0:
-                    for _ in range(abs(x_diff)):
-                        self.action_queue.append('move_left')
-                elif x_diff > 0:
-                    for _ in range(x_diff):
-                        self.action_queue.append('move_right')
-                
-                # Add soft drop actions (move down gradually)
-                self.action_queue.append('soft_drop')
+                # Rotations and shifts on the fastest DAS/tap timing (or the
+                # move generator's path for tucks), then soft drop until the
+                # piece locks
+                self.action_queue = plan_inputs(self.planned_move, current_piece.shape_type,
+                                                current_piece.x, current_piece.rotation,
+                                                self.game.level)
+                self.action_piece = self.game.spawn_id
+                self.drop_frames = 0
         
         self.thinking = False
         self.planned_move = None
     
-    def execute_next_action(self):
-        """Execute the next action in the queue"""
+    def execute_next_action(self, current_time=None):
+        """Execute the inputs scheduled for this frame"""
         if not self.action_queue:
             return
         
         current_piece = self.game.current_piece
-        if not current_piece:
-            self.action_queue = []
+        if not current_piece or self.action_piece != self.game.spawn_id:
+            # The planned piece already locked (e.g. by gravity); don't
+            # replay its leftover inputs on the next piece
+            self.action_queue.clear()
             return
         
-        action = self.action_queue.pop(0)
-        current_time = time.time() * 1000
+        if current_time is None:
+            current_time = self.clock.get_ticks()
         
-        if action == 'rotate':
-            if self.game.rotate_piece():
-                if self.sound_manager:
-                    self.sound_manager.play_sound('rotate')
-        elif action == 'move_left':
-            # Use same timing as player's DAS system
-            if self.game.move_piece(-1, 0):
-                if self.sound_manager:
-                    self.sound_manager.play_sound('move')
-        elif action == 'move_right':
-            # Use same timing as player's DAS system
-            if self.game.move_piece(1, 0):
-                if self.sound_manager:
-                    self.sound_manager.play_sound('move')
-        elif action == 'soft_drop':
-            # Use controlled dropping at same speed as player
-            if current_time - self.last_drop_time >= self.drop_delay:
-                if self.game.move_piece(0, 1):
-                    self.action_queue.append('soft_drop')  # Continue dropping
-                    self.last_drop_time = current_time
-                else:
+        actions = self.action_queue[0]
+        if actions == SOFT_DROP:
+            # Soft drop stays queued until the piece lands; first row at once,
+            # then one row per drop interval at this level
+            if self.drop_frames % drop_interval(self.game.level) == 0:
+                if not self.game.move_piece(0, 1):
                     # Piece has landed, lock it
                     self.game.lock_piece()
+                    self.action_queue.clear()
+            self.drop_frames += 1
+        else:
+            self.action_queue.popleft()
+            for action in actions:
+                if not self.apply_action(action):
+                    # Blocked (gravity moved the piece on): think again from here
+                    self.action_queue.clear()
+                    break
         
         self.last_move_time = current_time
     
+    def apply_action(self, action):
+        """Press one input on the game; returns False if the piece couldn't move"""
+        if action == 'rotate':
+            moved = self.game.rotate_piece()
+            sound = 'rotate'
+        elif action == 'move_left':
+            moved = self.game.move_piece(-1, 0)
+            sound = 'move'
+        elif action == 'move_right':
+            moved = self.game.move_piece(1, 0)
+            sound = 'move'
+        else:
+            # Single step down before sliding under an overhang
+            moved = self.game.move_piece(0, 1)
+            sound = None
+        if moved and sound and self.sound_manager:
+            self.sound_manager.play_sound(sound)
+        return moved
+    
     def find_best_move(self):
-        """Find the best move using enhanced evaluation"""
-        if not self.game.current_piece:
+        """Find the best move using enhanced evaluation
+        
+        Returns a movegen Placement (x, y, rotation and input path) or None.
+        With planner.depth > 0 the beam search planner (ai_search) picks the
+        move from the upcoming pieces; planner.stats reports its nodes/sec.
+        With parallel_workers > 1 the beam search plies, the expectimax
+        subtrees or the one-piece candidates are scored on a process pool
+        (parallel_search); the result is the same as the serial search.
+        """
+        request = self.search_request()
+        if request is None:
             return None
-        
+        return self.search_move(*request)
+    
+    def think_budget(self):
+        """Seconds the anytime search may spend on one move
+        
+        At most AI_THINK_TIME (x3, like the fixed think delay), and never
+        longer than the piece takes to fall AI_THINK_ROWS rows at the
+        current level's gravity, so fast levels get short searches.
+        """
+        gravity = GRAVITY_TABLE[min(self.game.level, MAX_LEVEL)]
+        return min(AI_THINK_TIME * 3, frames_to_ms(gravity * AI_THINK_ROWS) / 1000)
+    
+    def search_request(self):
+        """Copy what a search needs from the game
+        
+        Returns (rows, piece, next_piece, queue, budget, bag); budget is
+        None unless the anytime search is on, and bag holds the shapes that
+        can follow next_piece (the rest of its 7-bag). Everything is copied
+        so the search can run on another thread while the game carries on.
+        """
+        piece = self.game.current_piece
+        if not piece:
+            return None
+        generator = self.game.generator
+        if self.anytime:
+            queue = tuple(generator.peek_types(AI_MAX_SEARCH_DEPTH))
+            budget = self.think_budget()
+        else:
+            queue = tuple(generator.peek_types(self.planner.depth))
+            budget = None
+        bag = (generator.next_piece,) + tuple(generator.bag)
+        return tuple(self.game.board.rows), piece.copy(), self.game.next_piece, queue, budget, bag
+    
+    def search_move(self, rows, piece, next_piece, queue, budget=None, bag=None):
+        """Pick the best Placement for piece on bitboard rows
+        
+        With a budget (seconds) the planner searches anytime, as deep as the
+        budget allows; planner.history records the depth reached per move.
+        In 'expectimax' search mode only next_piece is taken as known and
+        the search branches over bag (all seven shapes if not given);
+        'rollout' mode deals random continuations from the same bag and
+        plays a fixed number of them (it ignores the budget).
+        A policy set on the player makes the choice instead.
+        """
+        if self.policy is not None:
+            return self.policy.select_move(BoardState(rows, piece.shape_type, piece.x, piece.y,
+                                                      piece.rotation, next_piece, queue))
+        # The deeper searches fan out to the same pool as the one-piece search
+        for planner in (self.planner, self.expectimax):
+            planner.workers = self.parallel_workers
+            planner.weights = self.weights
+            planner.node_rate = AI_HEADLESS_NODE_RATE if self.headless else None
+        if self.search_mode in ('expectimax', 'rollout'):
+            known = (next_piece,) if next_piece else ()
+            if bag is None:
+                bag = PIECE_TYPES
+            if self.search_mode == 'rollout':
+                return self.rollout.search(rows, piece, known, bag)
+            if budget is not None:
+                return self.expectimax.search_until(rows, piece, known, bag, budget)
+            return self.expectimax.search(rows, piece, known, bag)
+        if budget is not None:
+            return self.planner.search_until(rows, piece, queue, budget)
+        if self.planner.depth > 0:
+            return self.planner.search(rows, piece, queue)
+        
+        # Try every placement the piece can actually reach, including tucks
+        placements = generate_placements(rows, piece.shape_type,
+                                         piece.x, piece.y, piece.rotation)
+        if self.parallel_workers > 1 and len(placements) > 1:
+            scores = score_placements(rows, piece.shape_type, placements, next_piece,
+                                      self.weights, self.parallel_workers)
+        else:
+            scores = [self.score_placement(rows, piece.shape_type, placement.x,
+                                           placement.y, placement.rotation, next_piece)
+                      for placement in placements]
+        
+        # Highest score wins; ties go to the earlier candidate
         best_score = float('-inf')
         best_move = None
-        
-        piece = self.game.current_piece
-        shape_rotations = len(piece.SHAPES[piece.shape_type])
-        
-        # Try all possible rotations and positions
-        for rotation in range(shape_rotations):
-            for x in range(GRID_WIDTH):
-                # Create test piece
-                test_piece = piece.copy()
-                test_piece.rotation = rotation
-                test_piece.x = x
-                test_piece.y = 0
-                
-                # Find the lowest valid position
-                while not self.game.check_collision(test_piece):
-                    test_piece.y += 1
-                test_piece.y -= 1  # Back up to last valid position
-                
-                # Check if this position is actually valid and not at top
-                if not self.game.check_collision(test_piece) and test_piece.y >= 0:
-                    # Simulate placement with proper drop
-                    test_grid, lines_cleared = self.game.simulate_placement(test_piece, x, test_piece.y, rotation)
-                    
-                    # Evaluate the resulting grid
-                    score = self.evaluate_grid(test_grid, lines_cleared)
-                    
-                    # Look ahead bonus if we have a next piece
-                    if self.game.next_piece and lines_cleared < 4:  # Don't look ahead after Tetris
-                        lookahead_score = self.evaluate_lookahead(test_grid, self.game.next_piece)
-                        score += lookahead_score * 0.3  # 30% weight for lookahead
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_move = (x, rotation)
+        for placement, score in zip(placements, scores):
+            if score > best_score:
+                best_score = score
+                best_move = placement
         
         return best_move
     
+    def score_placement(self, rows, shape_type, x, y, rotation, next_piece):
+        """Score one placement of a piece on bitboard rows"""
+        # Simulate placement (the move generator already found the landing y)
+        test_rows, lines_cleared = self.game.simulate_placement_rows(
+            shape_type, x, y, rotation, rows)
+        
+        # Evaluate the resulting grid
+        score = self.evaluate_rows(test_rows, lines_cleared)
+        
+        # Look ahead bonus if we have a next piece
+        if next_piece and lines_cleared < 4:  # Don't look ahead after Tetris
+            lookahead_score = self.lookahead_rows(test_rows, next_piece)
+            score += lookahead_score * 0.3  # 30% weight for lookahead
+        
+        return score
+    
     def evaluate_lookahead(self, current_grid, next_piece):
         """Evaluate the best move for the next piece on the current grid"""
-        if not next_piece:
-            return 0
+        return self.lookahead_rows(grid_to_rows(current_grid), next_piece)
+    
+    def lookahead_rows(self, rows, next_piece):
+        """Best score for a straight drop of next_piece on bitboard rows
         
-        # Check if next_piece is a string (shape type) instead of a piece object
-        if isinstance(next_piece, str):
-            # If it's just a string, we can't do lookahead without creating a piece object
-            # This would require importing the Tetromino class, so skip lookahead for now
+        next_piece is a Tetromino or a shape type string. Every rotation is
+        dropped at every column, straight down from the top row; returns 0
+        when there is no next piece or nowhere to put it.
+        """
+        if not next_piece:
             return 0
-            
-        best_lookahead_score = float('-inf')
-        
-        try:
-            shape_rotations = len(next_piece.SHAPES[next_piece.shape_type])
-        except (AttributeError, KeyError):
-            # If we can't get the shapes, skip lookahead
+        shape_type = next_piece if isinstance(next_piece, str) else next_piece.shape_type
+        
+        boards = []
+        lines = []
+        for x, y, rotation in drop_placements(rows, shape_type):
+            new_rows, lines_cleared = clear_full_rows(place(rows, shape_type, rotation, x, y))
+            boards.append(new_rows)
+            lines.append(lines_cleared)
+        if not boards:
             return 0
-        
-        # Try a few promising positions for the next piece (not all to save time)
-        positions_to_try = range(0, GRID_WIDTH, 2)  # Every other position
-        
-        for rotation in range(shape_rotations):
-            for x in positions_to_try:
-                # Create test piece for lookahead
-                test_piece = next_piece.copy()
-                test_piece.rotation = rotation
-                test_piece.x = x
-                test_piece.y = 0
-                
-                # Find lowest position
-                temp_game = type(self.game)(0, self.sound_manager)
-                temp_game.grid = [row[:] for row in current_grid]  # Copy grid
-                
-                while not temp_game.check_collision(test_piece):
-                    test_piece.y += 1
-                test_piece.y -= 1
-                
-                if not temp_game.check_collision(test_piece) and test_piece.y >= 0:
-                    test_grid, lines_cleared = temp_game.simulate_placement(test_piece, x, test_piece.y, rotation)
-                    score = self.evaluate_grid(test_grid, lines_cleared)
-                    
-                    if score > best_lookahead_score:
-                        best_lookahead_score = score
-        
-        return best_lookahead_score if best_lookahead_score != float('-inf') else 0
+        return max(self.evaluate_rows_batch(boards, lines))
+    
+    def evaluate_rows(self, rows, lines_cleared):
+        """evaluate_grid for bitboard rows, cached in the transposition table
+        
+        Misses are scored with the single-pass evaluation.evaluate_board.
+        """
+        key = board_key(rows, lines_cleared)
+        score = self.eval_cache.get(key)
+        if score is None:
+            score = evaluate_board(rows, lines_cleared, self.weights)
+            self.eval_cache.put(key, score)
+        return score
+    
+    def evaluate_rows_batch(self, rows_list, lines_list):
+        """evaluate_rows for many boards: cache hits first, misses in one NumPy pass
+        
+        The batch evaluator (evaluation.evaluate_batch) matches evaluate_grid
+        to within floating point rounding.
+        """
+        scores = []
+        missing = []
+        for index, (rows, lines_cleared) in enumerate(zip(rows_list, lines_list)):
+            key = board_key(rows, lines_cleared)
+            score = self.eval_cache.get(key)
+            if score is None:
+                missing.append((index, key))
+            scores.append(score)
+        
+        if missing:
+            boards = rows_to_cells([rows_list[index] for index, _ in missing])
+            lines = [lines_list[index] for index, _ in missing]
+            batch_scores = evaluate_batch(boards, lines, self.weights).tolist()
+            for (index, key), score in zip(missing, batch_scores):
+                scores[index] = score
+                self.eval_cache.put(key, score)
+        return scores
     
     def evaluate_grid(self, grid, lines_cleared):
         """PERFECT evaluation function for unbeatable AI play"""
@@ -513,17 +705,31 @@ class AIPlayer:
     
     def reset(self):
         """Reset AI state"""
+        if self.worker:
+            # A fresh thread, so no search of the old game is still running
+            self.worker.stop()
+            self.worker = ThinkWorker(self.search_move)
         self.game.reset()
         self.thinking = False
+        self.think_spawn_id = None
+        self.think_ticket = None
         self.planned_move = None
         self.last_move_time = 0
-        self.action_queue = []
+        self.action_queue = deque()
+        self.action_piece = None
         self.current_action = None
         self.target_x = None
         self.target_rotation = None
         self.movement_step = 0
         self.last_horizontal_move = 0
-        self.last_drop_time = 0
+        self.drop_frames = 0
+    
+    def close(self):
+        """Stop the background thinking thread, if any, and the search worker pools"""
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+        shutdown_pool()
     
     def count_holes(self, grid):
         """Count holes in the grid (empty cells with filled cells above) - backward compatibility"""
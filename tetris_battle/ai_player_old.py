@@ -1,11 +1,12 @@
 import time
-import random
 from game import TetrisGame
-from sounds import SoundManager
-from config import AI_THINK_TIME, GRID_WIDTH, GRID_HEIGHT
+from bitboard import grid_to_rows, column_heights
+from ai_policy import make_policy, state_from_game
+from evaluation import scan_board, well_depth
+from config import AI_THINK_TIME
 
 class AIPlayer:
-    def __init__(self, sound_manager):
+    def __init__(self, sound_manager, policy='original'):
         self.game = TetrisGame()
         self.sound_manager = sound_manager
         self.last_move_time = 0
@@ -23,6 +24,12 @@ class AIPlayer:
             'height_penalty': -0.1,
             'well_depth': -0.05
         }
+        
+        # Move search and evaluation come from a registered ai_policy ('original'
+        # is this player's own heuristic); it shares the weights dict above
+        if isinstance(policy, str):
+            policy = make_policy(policy, weights=self.weights) if policy == 'original' else make_policy(policy)
+        self.policy = policy
     
     def update(self, dt):
         """Update AI state"""
@@ -50,145 +57,57 @@ class AIPlayer:
     def execute_planned_move(self):
         """Execute the planned move"""
         if self.planned_move:
-            target_x, target_rotation = self.planned_move
-            
-            # Rotate to target rotation
-            current_rotation = self.game.current_piece.rotation
-            rotations_needed = (target_rotation - current_rotation) % len(self.game.current_piece.SHAPES[self.game.current_piece.shape_type])
-            
-            for _ in range(rotations_needed):
-                if self.game.rotate_piece():
-                    self.sound_manager.play_sound('rotate')
+            current_piece = self.game.current_piece
             
-            # Move to target x position
-            current_x = self.game.current_piece.x
-            if target_x < current_x:
-                for _ in range(current_x - target_x):
-                    if not self.game.move_piece(-1, 0):
-                        break
-                    self.sound_manager.play_sound('move')
-            elif target_x > current_x:
-                for _ in range(target_x - current_x):
-                    if not self.game.move_piece(1, 0):
-                        break
-                    self.sound_manager.play_sound('move')
-            
-            # Hard drop
-            drop_distance = self.game.hard_drop()
-            if drop_distance > 0:
-                self.sound_manager.play_sound('drop')
+            if current_piece:
+                # Follow the placement's input path (rotations, shifts, tucks)
+                for action in self.planned_move.path:
+                    if action == 'rotate':
+                        if self.game.rotate_piece():
+                            self.sound_manager.play_sound('rotate')
+                    elif action == 'move_left':
+                        if self.game.move_piece(-1, 0):
+                            self.sound_manager.play_sound('move')
+                    elif action == 'move_right':
+                        if self.game.move_piece(1, 0):
+                            self.sound_manager.play_sound('move')
+                    elif action == 'move_down':
+                        self.game.move_piece(0, 1)
+                
+                # Hard drop (TetrisGame has no hard_drop, so drop and lock here)
+                drop_distance = 0
+                while self.game.move_piece(0, 1):
+                    drop_distance += 1
+                self.game.lock_piece()
+                if drop_distance > 0:
+                    self.sound_manager.play_sound('drop')
         
         self.thinking = False
         self.planned_move = None
         self.last_move_time = time.time() * 1000
     
     def find_best_move(self):
-        """Find the best move for the current piece"""
-        if not self.game.current_piece:
+        """Find the best move for the current piece (a movegen Placement)"""
+        state = state_from_game(self.game)
+        if state is None:
             return None
-        
-        best_score = float('-inf')
-        best_move = None
-        
-        piece = self.game.current_piece
-        shape_rotations = len(piece.SHAPES[piece.shape_type])
-        
-        # Try all possible rotations and positions
-        for rotation in range(shape_rotations):
-            for x in range(GRID_WIDTH):
-                # Create a test piece at this position and rotation
-                test_piece = piece.copy()
-                test_piece.x = x
-                test_piece.rotation = rotation
-                
-                # Check if this position is valid
-                if self.game.check_collision(test_piece):
-                    continue
-                
-                # Simulate the placement
-                try:
-                    grid_result, lines_cleared = self.game.simulate_placement(piece, x, 0, rotation)
-                    score = self.evaluate_grid(grid_result, lines_cleared)
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_move = (x, rotation)
-                except:
-                    # Skip invalid moves
-                    continue
-        
-        return best_move
+        return self.policy.select_move(state)
     
     def evaluate_grid(self, grid, lines_cleared):
-        """Evaluate a grid state using heuristics"""
-        score = 0
-        
-        # Lines cleared bonus
-        score += self.weights['lines_cleared'] * lines_cleared
-        
-        # Calculate aggregate height
-        heights = self.get_column_heights(grid)
-        aggregate_height = sum(heights)
-        score += self.weights['aggregate_height'] * aggregate_height
-        
-        # Calculate bumpiness (difference in adjacent column heights)
-        bumpiness = 0
-        for i in range(len(heights) - 1):
-            bumpiness += abs(heights[i] - heights[i + 1])
-        score += self.weights['bumpiness'] * bumpiness
-        
-        # Calculate holes
-        holes = self.count_holes(grid)
-        score += self.weights['holes'] * holes
-        
-        # Height penalty for very tall stacks
-        max_height = max(heights) if heights else 0
-        if max_height > 15:
-            score += self.weights['height_penalty'] * (max_height - 15) ** 2
-        
-        # Well depth penalty
-        well_depth = self.calculate_well_depth(grid, heights)
-        score += self.weights['well_depth'] * well_depth
-        
-        return score
+        """Evaluate a grid state using the policy's heuristics"""
+        return self.policy.evaluate(grid_to_rows(grid), lines_cleared)
     
     def get_column_heights(self, grid):
         """Get the height of each column"""
-        heights = []
-        for col in range(GRID_WIDTH):
-            height = 0
-            for row in range(GRID_HEIGHT):
-                if grid[row][col] != 0:
-                    height = GRID_HEIGHT - row
-                    break
-            heights.append(height)
-        return heights
+        return column_heights(grid_to_rows(grid))
     
     def count_holes(self, grid):
         """Count holes in the grid (empty cells with filled cells above)"""
-        holes = 0
-        for col in range(GRID_WIDTH):
-            block_found = False
-            for row in range(GRID_HEIGHT):
-                if grid[row][col] != 0:
-                    block_found = True
-                elif block_found and grid[row][col] == 0:
-                    holes += 1
-        return holes
+        return scan_board(grid_to_rows(grid)).holes
     
     def calculate_well_depth(self, grid, heights):
         """Calculate depth of wells (deep columns surrounded by taller columns)"""
-        well_depth = 0
-        for i in range(len(heights)):
-            left_height = heights[i - 1] if i > 0 else 0
-            right_height = heights[i + 1] if i < len(heights) - 1 else 0
-            current_height = heights[i]
-            
-            # Check if this is a well (both neighbors are taller)
-            if left_height > current_height and right_height > current_height:
-                well_depth += min(left_height, right_height) - current_height
-        
-        return well_depth
+        return well_depth(heights)
     
     def reset(self):
         """Reset AI state"""
@@ -0,0 +1,223 @@
+"""Pluggable AI policies - a board state in, a placement out
+
+The three AI players (ai_player, ai_player_gb, ai_player_old) each grew
+their own move search and grid heuristics. Here each heuristic is a
+registered Policy over the same fast core: placements come from the
+move generator (movegen), boards are bitboard rows and features come
+from the single-pass evaluation.scan_board. Any policy can drive any AI
+player (AIPlayer(..., policy='classic')), and every policy keeps the same
+timing stats, so they can be benchmarked against each other:
+
+    python ai_policy.py
+"""
+import time
+from collections import namedtuple
+import headless
+from bitboard import place, clear_full_rows
+from movegen import generate_placements
+from evaluation import scan_board
+from tetromino import Tetromino
+
+# What a policy sees: bitboard rows, the current piece's shape and state,
+# the next piece's shape and any further known shapes
+BoardState = namedtuple('BoardState',
+                        ['rows', 'shape_type', 'x', 'y', 'rotation', 'next_piece', 'queue'])
+
+# name -> Policy subclass
+POLICIES = {}
+
+
+def register_policy(name):
+    """Class decorator adding a Policy to the registry under `name`"""
+    def register(cls):
+        cls.name = name
+        POLICIES[name] = cls
+        return cls
+    return register
+
+
+def make_policy(name, **kwargs):
+    """Create a registered policy by name"""
+    if name not in POLICIES:
+        raise ValueError(f"Unknown AI policy {name!r} (choose from {', '.join(POLICIES)})")
+    return POLICIES[name](**kwargs)
+
+
+def state_from_game(game, lookahead=0):
+    """Build the BoardState for a TetrisGame's current piece (None without one)"""
+    piece = game.current_piece
+    if not piece:
+        return None
+    return BoardState(tuple(game.board.rows), piece.shape_type, piece.x, piece.y,
+                      piece.rotation, game.next_piece,
+                      tuple(game.generator.peek_types(lookahead)))
+
+
+class PolicyStats:
+    """Move count and decision times of a policy"""
+
+    def __init__(self):
+        self.moves = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+        self.max_time = 0.0
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.moves if self.moves else 0.0
+
+    def record(self, elapsed):
+        self.moves += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def __repr__(self):
+        return (f"PolicyStats(moves={self.moves}, mean={self.mean_time * 1000:.2f}ms, "
+                f"max={self.max_time * 1000:.2f}ms)")
+
+
+class Policy:
+    """Base policy: greedy one-piece search over every reachable placement
+
+    Subclasses provide evaluate(rows, lines_cleared), or override choose()
+    for a different search. Call select_move(), which times choose().
+    """
+    name = None
+
+    def __init__(self):
+        self.stats = PolicyStats()
+
+    def select_move(self, state):
+        """Pick a movegen Placement for the state (None if the piece can't move)"""
+        start = time.perf_counter()
+        move = self.choose(state)
+        self.stats.record(time.perf_counter() - start)
+        return move
+
+    def choose(self, state):
+        best_score = float('-inf')
+        best_move = None
+        for placement in generate_placements(state.rows, state.shape_type,
+                                             state.x, state.y, state.rotation):
+            new_rows, lines_cleared = clear_full_rows(
+                place(state.rows, state.shape_type, placement.rotation, placement.x, placement.y))
+            score = self.evaluate(new_rows, lines_cleared)
+            # Ties go to the earlier (shorter path) placement
+            if score > best_score:
+                best_score = score
+                best_move = placement
+        return best_move
+
+    def evaluate(self, rows, lines_cleared):
+        """Score bitboard rows after a placement (higher is better)"""
+        raise NotImplementedError
+
+
+class HeuristicPolicy(Policy):
+    """Lines, height, holes, bumpiness and wells - the ai_player_gb/ai_player_old heuristic
+
+    weights is used as given (not copied), so a player can keep tweaking
+    its own weights dict. height_exponent shapes the penalty for stacks
+    taller than 15.
+    """
+    DEFAULT_WEIGHTS = {}
+    height_exponent = 1
+
+    def __init__(self, weights=None):
+        super().__init__()
+        self.weights = weights if weights is not None else dict(self.DEFAULT_WEIGHTS)
+
+    def evaluate(self, rows, lines_cleared):
+        weights = self.weights
+        scan = scan_board(rows)
+        heights = scan.heights
+        bumpiness = sum(abs(heights[col] - heights[col + 1]) for col in range(len(heights) - 1))
+        score = (weights['lines_cleared'] * lines_cleared
+                 + weights['aggregate_height'] * sum(heights)
+                 + weights['bumpiness'] * bumpiness
+                 + weights['holes'] * scan.holes)
+        max_height = max(heights)
+        if max_height > 15:
+            score += weights['height_penalty'] * (max_height - 15) ** self.height_exponent
+        return score + weights['well_depth'] * scan.well_depth()
+
+
+@register_policy('classic')
+class ClassicPolicy(HeuristicPolicy):
+    """ai_player_gb's heuristic, tuned for Game Boy Tetris"""
+    DEFAULT_WEIGHTS = {
+        'aggregate_height': -0.510066,
+        'lines_cleared': 0.760666,
+        'holes': -0.35663,
+        'bumpiness': -0.184483,
+        'height_penalty': -0.2,
+        'well_depth': -0.1
+    }
+
+
+@register_policy('original')
+class OriginalPolicy(HeuristicPolicy):
+    """ai_player_old's heuristic, with a squared height penalty"""
+    DEFAULT_WEIGHTS = {
+        'aggregate_height': -0.510066,
+        'lines_cleared': 0.760666,
+        'holes': -0.35663,
+        'bumpiness': -0.184483,
+        'height_penalty': -0.1,
+        'well_depth': -0.05
+    }
+    height_exponent = 2
+
+
+@register_policy('perfect')
+class PerfectPolicy(Policy):
+    """ai_player.AIPlayer's search: full heuristic, cache, beam search and lookahead
+
+    Uses the given AIPlayer's search (weights, planner depth, cache) or a
+    private headless one.
+    """
+
+    def __init__(self, player=None):
+        super().__init__()
+        if player is None:
+            from ai_player import AIPlayer
+            player = AIPlayer(None)
+        self.player = player
+
+    def choose(self, state):
+        piece = Tetromino(state.shape_type, state.x, state.y)
+        piece.rotation = state.rotation
+        return self.player.search_move(state.rows, piece, state.next_piece, state.queue)
+
+    def evaluate(self, rows, lines_cleared):
+        return self.player.evaluate_rows(rows, lines_cleared)
+
+
+def play_game(policy, seed, max_pieces=500, lookahead=0):
+    """Play one headless game with a policy; returns (lines cleared, pieces placed)
+
+    Each move is locked where the policy put it and TetrisGame handles
+    line clears, scoring and spawning.
+    """
+    from game import TetrisGame
+    game = TetrisGame(seed=seed)
+    headless.play_game(game, lambda: policy.select_move(state_from_game(game, lookahead)),
+                       max_pieces)
+    return game.lines_cleared, game.pieces_dropped
+
+
+def benchmark(names=None, seeds=range(3), max_pieces=500):
+    """Play every policy on the same seeds; returns {name: (mean lines, PolicyStats)}"""
+    results = {}
+    for name in names or POLICIES:
+        policy = make_policy(name)
+        lookahead = policy.player.planner.depth if isinstance(policy, PerfectPolicy) else 0
+        lines = [play_game(policy, seed, max_pieces, lookahead)[0] for seed in seeds]
+        results[name] = (sum(lines) / len(lines), policy.stats)
+    return results
+
+
+if __name__ == "__main__":
+    for name, (lines, stats) in benchmark().items():
+        print(f"{name:10} {lines:7.1f} lines  {stats}")
@@ -0,0 +1,373 @@
+"""Multi-piece search planners for the AI
+
+BeamSearch looks past the current piece into the known piece queue (the
+randomizer deals a fixed sequence, so the upcoming shapes are known). Each
+ply expands every reachable placement (movegen) of the next piece on each
+board in the beam and keeps the best `beam_width` boards by the AI's
+evaluation. The root move that leads to the best board at the deepest
+ply is played.
+
+Expectimax only uses the pieces a player can see (the current and next
+piece) and branches over the rest: the randomizer deals 7-bags, so the
+shapes left in the current bag, and their probabilities, are known.
+
+For real-time play both can also run anytime: iterative deepening
+against a deadline, keeping the best move of the deepest finished search.
+
+With workers > 1 both fan their subtrees out to the parallel_search
+process pool and pick exactly the move the in-process search would.
+"""
+import time
+from collections import deque, Counter
+from bitboard import collides, place, clear_full_rows
+from movegen import generate_placements
+from tetromino import PIECE_TYPES
+from transposition import board_key
+from parallel_search import expand_boards, expectimax_values
+from config import AI_SEARCH_DEPTH, AI_BEAM_WIDTH, AI_EXPECTIMAX_DEPTH, AI_EXPECTIMAX_WIDTH
+
+# Searches remembered in Planner.history
+SEARCH_HISTORY = 1000
+
+# Spawn column per shape, matching TetrisGame.spawn_new_piece
+SPAWN_X = {shape_type: 4 if shape_type == 'O' else 3 for shape_type in PIECE_TYPES}
+
+# Expectimax value of a line where the next piece can't spawn
+TOPOUT_SCORE = -1e6
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its deadline passes"""
+
+
+class SearchStats:
+    """Node count, depth reached and timing of one search"""
+
+    def __init__(self):
+        self.nodes = 0
+        self.depth = 0
+        self.elapsed = 0.0
+        self.timed_out = False
+
+    @property
+    def nodes_per_sec(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"SearchStats(nodes={self.nodes}, depth={self.depth}, "
+                f"elapsed={self.elapsed * 1000:.1f}ms, nodes_per_sec={self.nodes_per_sec:.0f}, "
+                f"timed_out={self.timed_out})")
+
+
+class Planner:
+    """Shared parts of the search planners
+
+    evaluate(rows_list, lines_list) scores a batch of bitboard boards,
+    usually AIPlayer.evaluate_rows_batch (the transposition table, then the
+    NumPy batch evaluator for the misses). The stats of every search are
+    kept in history (most recent last) for tuning.
+
+    workers > 1 searches subtrees on the process pool, whose workers score
+    boards with `weights` (the same weights evaluate uses).
+
+    Budgets and stats.elapsed are wall-clock seconds, unless node_rate is
+    set: then search time is the nodes expanded at node_rate per second,
+    so an anytime search gives the same move on any machine.
+    """
+
+    def __init__(self, evaluate, depth, workers=0, weights=None, node_rate=None):
+        self.evaluate = evaluate
+        self.depth = depth
+        self.workers = workers
+        self.weights = weights
+        self.node_rate = node_rate
+        self.stats = SearchStats()
+        self.history = deque(maxlen=SEARCH_HISTORY)
+
+    @property
+    def parallel(self):
+        return self.workers > 1 and self.weights is not None
+
+    def expand(self, rows, shape_type, x, y, rotation):
+        """Get (placement, rows, lines_cleared) for every reachable placement"""
+        children = []
+        for placement in generate_placements(rows, shape_type, x, y, rotation):
+            # movegen placements are already at their landing y
+            new_rows, lines_cleared = clear_full_rows(
+                place(rows, shape_type, placement.rotation, placement.x, placement.y))
+            children.append((placement, new_rows, lines_cleared))
+        self.stats.nodes += len(children)
+        return children
+
+    def score(self, boards):
+        """Score (rows, lines_cleared) pairs with one evaluate call"""
+        return self.evaluate([rows for rows, _ in boards], [lines for _, lines in boards])
+
+    def _now(self):
+        """Search time in seconds: the wall clock, or the work done at node_rate"""
+        if self.node_rate:
+            return self.stats.nodes / self.node_rate
+        return time.perf_counter()
+
+    def _start_stats(self):
+        self.stats = SearchStats()
+        self._start = self._now()
+
+    def _finish_stats(self, move):
+        self.stats.elapsed = self._now() - self._start
+        self.history.append(self.stats)
+        return move
+
+
+class BeamSearch(Planner):
+    """Beam search over the current piece plus the next `depth` known pieces
+
+    Each ply is scored in one evaluate call. depth 0 is a plain one-piece
+    search. search() runs to a fixed depth; search_until() deepens one
+    piece at a time until a deadline.
+    """
+
+    def __init__(self, evaluate, depth=AI_SEARCH_DEPTH, beam_width=AI_BEAM_WIDTH, workers=0,
+                 weights=None, node_rate=None):
+        super().__init__(evaluate, depth, workers, weights, node_rate)
+        self.beam_width = beam_width
+
+    def search(self, rows, piece, queue):
+        """Return the best Placement for `piece` given the upcoming shapes
+
+        rows are bitboard rows, piece the current Tetromino (searched from
+        its current position) and queue the shapes that follow it; up to
+        self.depth of them are searched. Returns None when the piece has
+        no placement.
+        """
+        self._start_stats()
+        move, self.stats.depth = self._search(rows, piece, queue, self.depth)
+        return self._finish_stats(move)
+
+    def search_until(self, rows, piece, queue, budget, max_depth=None):
+        """Anytime search: deepen one piece at a time until `budget` seconds pass
+
+        The one-piece search always completes, so there is always a move;
+        after that each deeper search only replaces the best move if it
+        finishes before the deadline. Repeated plies are cheap because the
+        evaluations are cached. stats.depth is the deepest completed search.
+        """
+        self._start_stats()
+        deadline = self._now() + budget
+        if max_depth is None:
+            max_depth = len(queue)
+
+        move, _ = self._search(rows, piece, queue, 0)
+        depth = 1
+        while move is not None and depth <= max_depth and depth <= len(queue):
+            try:
+                deeper, reached = self._search(rows, piece, queue, depth, deadline)
+            except SearchTimeout:
+                self.stats.timed_out = True
+                break
+            move = deeper
+            self.stats.depth = reached
+            if reached < depth:
+                break  # Every line topped out, deeper searches find nothing new
+            depth += 1
+        return self._finish_stats(move)
+
+    def _search(self, rows, piece, queue, depth, deadline=None):
+        """Beam search to `depth` queued pieces; returns (move, depth reached)"""
+        children = self.expand(rows, piece.shape_type, piece.x, piece.y, piece.rotation)
+        if not children:
+            return None, 0
+        roots = [placement for placement, _, _ in children]
+        scores = self.score([(new_rows, lines) for _, new_rows, lines in children])
+        # Beam entries: (score, root index, rows)
+        beam = [(score, index, new_rows)
+                for index, ((_, new_rows, _), score) in enumerate(zip(children, scores))]
+
+        reached = 0
+        for shape_type in queue[:depth]:
+            beam = self._prune(beam)
+            if self.parallel and len(beam) > 1:
+                pending, scores = self._expand_on_pool(beam, shape_type, deadline)
+            else:
+                pending, scores = self._expand_ply(beam, shape_type, deadline)
+            if not pending:
+                break
+            beam = [(score, root, new_rows)
+                    for (root, new_rows, _), score in zip(pending, scores)]
+            reached += 1
+
+        best = self._prune(beam)[0]
+        return roots[best[1]], reached
+
+    def _expand_ply(self, beam, shape_type, deadline):
+        """Children (root, rows, lines) of every beam board, and their scores"""
+        spawn_x = SPAWN_X[shape_type]
+        pending = []
+        for _, root, board_rows in beam:
+            if deadline is not None and self._now() > deadline:
+                raise SearchTimeout()
+            if collides(board_rows, shape_type, 0, spawn_x, 0):
+                continue  # Topped out on this line
+            for _, new_rows, lines in self.expand(board_rows, shape_type, spawn_x, 0, 0):
+                pending.append((root, new_rows, lines))
+        if not pending:
+            return pending, []
+        # The whole ply is scored in one batch
+        return pending, self.score([(new_rows, lines) for _, new_rows, lines in pending])
+
+    def _expand_on_pool(self, beam, shape_type, deadline):
+        """_expand_ply with the beam boards spread across the worker pool"""
+        if deadline is not None and self._now() > deadline:
+            raise SearchTimeout()
+        results = expand_boards([board_rows for _, _, board_rows in beam], shape_type,
+                                self.weights, self.workers)
+        if deadline is not None and self._now() > deadline:
+            raise SearchTimeout()
+        pending = []
+        scores = []
+        for (_, root, _), children in zip(beam, results):
+            for new_rows, lines, score in children:
+                pending.append((root, new_rows, lines))
+                scores.append(score)
+        self.stats.nodes += len(pending)
+        return pending, scores
+
+    def _prune(self, beam):
+        """Keep the best beam_width entries; ties keep the earlier root"""
+        return sorted(beam, key=lambda entry: (-entry[0], entry[1]))[:self.beam_width]
+
+
+class Expectimax(Planner):
+    """Expectimax over the randomizer's bag
+
+    Max nodes place a piece; once the known pieces run out, chance nodes
+    branch over every shape left in the 7-bag with its true probability
+    (count / shapes left), and a fresh bag once it is empty. depth is the
+    number of pieces searched after the current one.
+
+    Only the `width` best placements of each max node by the evaluation
+    (cached) are searched deeper, and values of boards reached again
+    within one search are reused.
+    """
+
+    def __init__(self, evaluate, depth=AI_EXPECTIMAX_DEPTH, width=AI_EXPECTIMAX_WIDTH, workers=0,
+                 weights=None, node_rate=None):
+        super().__init__(evaluate, depth, workers, weights, node_rate)
+        self.width = width
+        self._values = {}
+
+    def search(self, rows, piece, known, bag):
+        """Return the best Placement for `piece`
+
+        known are the shapes already visible after it (the next piece) and
+        bag the shapes that can follow those (the rest of their 7-bag, any
+        order). Returns None when the piece has no placement.
+        """
+        self._start_stats()
+        move = self._root(rows, piece, known, bag, self.depth)
+        self.stats.depth = self.depth
+        return self._finish_stats(move)
+
+    def search_until(self, rows, piece, known, bag, budget, max_depth=None):
+        """Anytime expectimax: deepen one piece at a time until `budget` seconds pass"""
+        self._start_stats()
+        deadline = self._now() + budget
+        if max_depth is None:
+            max_depth = self.depth
+
+        move = self._root(rows, piece, known, bag, 0)
+        depth = 1
+        while move is not None and depth <= max_depth:
+            try:
+                move = self._root(rows, piece, known, bag, depth, deadline)
+            except SearchTimeout:
+                self.stats.timed_out = True
+                break
+            self.stats.depth = depth
+            depth += 1
+        return self._finish_stats(move)
+
+    def _root(self, rows, piece, known, bag, depth, deadline=None):
+        self._values = {}
+        if self.parallel and depth > 0:
+            return self._root_on_pool(rows, piece, tuple(known), tuple(bag), depth, deadline)
+        _, move = self._max_node(rows, piece.shape_type, piece.x, piece.y, piece.rotation,
+                                 tuple(known), tuple(bag), depth, deadline)
+        return move
+
+    def _root_on_pool(self, rows, piece, known, bag, depth, deadline):
+        """The root max node with its searched children valued across the worker pool"""
+        children = self.expand(rows, piece.shape_type, piece.x, piece.y, piece.rotation)
+        if not children:
+            return None
+        scores = self.score([(new_rows, lines) for _, new_rows, lines in children])
+        ranked = sorted(range(len(children)), key=lambda index: -scores[index])[:self.width]
+        budget = None
+        if deadline is not None:
+            budget = deadline - self._now()
+            if budget <= 0:
+                raise SearchTimeout()
+        result = expectimax_values([children[index][1] for index in ranked], known, bag,
+                                   depth - 1, self.width, self.weights, self.workers, budget,
+                                   self.node_rate)
+        if result is None:
+            raise SearchTimeout()
+        values, nodes = result
+        self.stats.nodes += nodes
+
+        best_value = float('-inf')
+        best_move = None
+        for index, value in zip(ranked, values):
+            if value > best_value:
+                best_value = value
+                best_move = children[index][0]
+        return best_move
+
+    def _max_node(self, rows, shape_type, x, y, rotation, known, bag, depth, deadline):
+        """Best (value, placement) for placing one piece"""
+        if deadline is not None and self._now() > deadline:
+            raise SearchTimeout()
+        children = self.expand(rows, shape_type, x, y, rotation)
+        if not children:
+            return TOPOUT_SCORE, None
+        scores = self.score([(new_rows, lines) for _, new_rows, lines in children])
+        # Most promising first; ties keep the earlier placement
+        ranked = sorted(range(len(children)), key=lambda index: -scores[index])
+        if depth == 0:
+            return scores[ranked[0]], children[ranked[0]][0]
+
+        best_value = float('-inf')
+        best_move = None
+        for index in ranked[:self.width]:
+            placement, new_rows, _ = children[index]
+            value = self._value(new_rows, known, bag, depth - 1, deadline)
+            if value > best_value:
+                best_value = value
+                best_move = placement
+        return best_value, best_move
+
+    def _value(self, rows, known, bag, depth, deadline):
+        """Expected value of a board before the next piece spawns"""
+        key = (board_key(rows, 0), known, tuple(sorted(bag)), depth)
+        value = self._values.get(key)
+        if value is not None:
+            return value
+
+        if known:
+            shape_type = known[0]
+            if collides(rows, shape_type, 0, SPAWN_X[shape_type], 0):
+                value = TOPOUT_SCORE
+            else:
+                value, _ = self._max_node(rows, shape_type, SPAWN_X[shape_type], 0, 0,
+                                          known[1:], bag, depth, deadline)
+        else:
+            if not bag:
+                bag = PIECE_TYPES  # The next 7-bag starts
+            value = 0.0
+            for shape_type, count in Counter(bag).items():
+                remaining = list(bag)
+                remaining.remove(shape_type)
+                value += count / len(bag) * self._value(rows, (shape_type,), tuple(remaining),
+                                                        depth, deadline)
+        self._values[key] = value
+        return value
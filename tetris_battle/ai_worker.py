@@ -0,0 +1,76 @@
+"""Background thinking for AIPlayer
+
+The move search runs on a worker thread so the render loop never waits
+for it. Requests and results are keyed by a ticket made of the piece's
+spawn ID (TetrisGame.spawn_id) and a request counter: only the newest
+request is searched, and a result is only handed out for the request it
+was computed for, so a piece that locked while the AI was thinking (or
+was re-planned mid-fall) can never receive a stale move.
+"""
+import threading
+import traceback
+
+
+class ThinkWorker:
+    """Runs search(*args) for the latest submitted piece on a daemon thread"""
+
+    def __init__(self, search):
+        self.search = search
+        self._condition = threading.Condition()
+        self._request = None  # (ticket, args) waiting to be searched
+        self._result = None   # (ticket, move) of the last finished search
+        self._requests = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ai-think", daemon=True)
+        self._thread.start()
+
+    def submit(self, spawn_id, *args):
+        """Ask for a move for spawn_id, replacing any request not started yet
+        
+        Returns the ticket to poll() for the result.
+        """
+        with self._condition:
+            self._requests += 1
+            ticket = (spawn_id, self._requests)
+            self._request = (ticket, args)
+            self._condition.notify()
+        return ticket
+
+    def poll(self, ticket):
+        """Return (ready, move) for a submit() ticket without blocking"""
+        with self._condition:
+            if self._result is not None and self._result[0] == ticket:
+                return True, self._result[1]
+            return False, None
+
+    def wait(self, ticket, timeout=None):
+        """Block until the move for a ticket is ready; returns (ready, move)"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._result is not None and self._result[0] == ticket, timeout)
+        return self.poll(ticket)
+
+    def stop(self):
+        """Stop the worker thread after its current search"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._request is not None or not self._running)
+                if not self._running:
+                    return
+                ticket, args = self._request
+                self._request = None
+            try:
+                move = self.search(*args)
+            except Exception:
+                # Don't let one bad search kill the thread; the AI just skips this move
+                traceback.print_exc()
+                move = None
+            with self._condition:
+                self._result = (ticket, move)
+                self._condition.notify_all()
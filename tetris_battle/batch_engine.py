@@ -0,0 +1,286 @@
+"""Batched multi-game engine - N Game Boy Tetris boards stepped in lockstep
+
+Boards are stored struct-of-arrays style as an (N, GRID_HEIGHT) uint16
+NumPy array of bitboard rows (see bitboard.py), with score, lines, level
+and game over flags as (N,) arrays. Every step places one piece on every
+live board, clears lines, scores with SCORE_VALUES and levels up exactly
+like TetrisGame, using array operations over all boards at once.
+
+Placements follow TetrisGame.simulate_placement: the piece is rotated at
+spawn, shifted to x and dropped straight down.
+"""
+import numpy as np
+from bitboard import PIECE_MASKS, X_OFFSET, FULL_ROW
+from tetromino import GameBoyRandomizer, PIECE_TYPES, ROTATION_COUNTS
+from config import *
+
+MAX_ROTATIONS = 4
+X_POSITIONS = GRID_WIDTH + X_OFFSET  # x runs from -X_OFFSET to GRID_WIDTH - 1
+FLOOR_ROWS = 4  # Solid rows below the grid so drops stop at the floor
+
+
+def _build_mask_table():
+    """Build (piece, rotation, x + X_OFFSET, dy) row masks and a validity table
+
+    Rotations past a shape's rotation count wrap around, matching
+    Tetromino.rotate.
+    """
+    masks = np.zeros((len(PIECE_TYPES), MAX_ROTATIONS, X_POSITIONS, 4), dtype=np.uint16)
+    valid = np.zeros((len(PIECE_TYPES), MAX_ROTATIONS, X_POSITIONS), dtype=bool)
+    for code, shape_type in enumerate(PIECE_TYPES):
+        for rotation in range(MAX_ROTATIONS):
+            by_x = PIECE_MASKS[shape_type][rotation % ROTATION_COUNTS[shape_type]]
+            for index, rows in enumerate(by_x):
+                if rows is None:
+                    continue
+                valid[code, rotation, index] = True
+                for dy, mask in rows:
+                    masks[code, rotation, index, dy] = mask
+    return masks, valid
+
+
+MASK_TABLE, VALID_TABLE = _build_mask_table()
+SPAWN_X = np.array([4 if shape_type == 'O' else 3 for shape_type in PIECE_TYPES], dtype=np.int64)
+LINE_SCORES = np.array([0] + [SCORE_VALUES[lines] for lines in range(1, 5)], dtype=np.int64)
+GARBAGE_SENT = np.array([0, 0, 1, 2, 4], dtype=np.int64)  # Same table as TetrisGame.send_garbage_lines
+
+
+def drop_and_place(rows, codes, rotations, xs, ys=None):
+    """Drop pieces on many boards at once and return the results
+
+    rows: (M, GRID_HEIGHT) uint16 bitboards, left unchanged.
+    codes, rotations, xs, ys: (M,) piece index, rotation, x and start y
+    (defaults to the spawn row 0).
+
+    Returns (new_rows, lines_cleared, valid) where valid is False when the
+    piece is out of bounds or already collides at its start position.
+    Invalid entries come back with their board unchanged.
+    """
+    count = rows.shape[0]
+    if ys is None:
+        ys = np.zeros(count, dtype=np.int64)
+    rotations = rotations % MAX_ROTATIONS
+    x_index = np.clip(xs + X_OFFSET, 0, X_POSITIONS - 1)
+    in_range = (xs + X_OFFSET >= 0) & (xs + X_OFFSET < X_POSITIONS)
+    valid = in_range & VALID_TABLE[codes, rotations, x_index]
+    masks = np.where(valid[:, None], MASK_TABLE[codes, rotations, x_index], 0).astype(np.uint16)
+
+    # Collision for every y in one pass: padded[:, y + dy] & mask[dy]
+    padded = np.concatenate(
+        [rows, np.full((count, FLOOR_ROWS), FULL_ROW, dtype=np.uint16)], axis=1)
+    collision = np.zeros((count, GRID_HEIGHT + 1), dtype=bool)
+    for dy in range(4):
+        collision |= (padded[:, dy:dy + GRID_HEIGHT + 1] & masks[:, dy:dy + 1]) != 0
+
+    start_index = np.clip(ys, 0, GRID_HEIGHT)
+    arange = np.arange(count)
+    valid &= ~collision[arange, start_index]
+
+    # Land on the row above the first collision below the start position
+    below_start = np.arange(GRID_HEIGHT + 1)[None, :] > start_index[:, None]
+    landing = np.argmax(collision & below_start, axis=1) - 1
+
+    placed = padded.copy()
+    for dy in range(4):
+        placed[arange, landing + dy] |= masks[:, dy]
+    placed = placed[:, :GRID_HEIGHT]
+    placed[~valid] = rows[~valid]
+
+    new_rows, lines_cleared = clear_lines(placed)
+    return new_rows, lines_cleared, valid
+
+
+def clear_lines(rows):
+    """Remove full rows from every board, shifting the rest down
+
+    Returns (new_rows, lines_cleared) with lines_cleared as an (M,) array.
+    """
+    full = rows == FULL_ROW
+    lines_cleared = full.sum(axis=1)
+    if not lines_cleared.any():
+        return rows, lines_cleared
+    # Stable sort puts full rows on top while keeping the others in order
+    order = np.argsort(~full, axis=1, kind='stable')
+    compacted = np.take_along_axis(rows, order, axis=1)
+    compacted[np.arange(GRID_HEIGHT)[None, :] < lines_cleared[:, None]] = 0
+    return compacted, lines_cleared
+
+
+class BatchTetris:
+    """N Tetris games advanced in lockstep, one piece per step"""
+
+    def __init__(self, num_games, start_level=0, game_type=GAME_TYPE_A, seeds=None):
+        self.num_games = num_games
+        self.start_level = start_level
+        self.game_type = game_type
+        if seeds is None:
+            seeds = [None] * num_games
+        elif isinstance(seeds, int):
+            seeds = [seeds + game for game in range(num_games)]
+        self.seeds = list(seeds)
+        self.reset()
+
+    def reset(self):
+        """Reset every board to an empty, freshly seeded game"""
+        count = self.num_games
+        self.rows = np.zeros((count, GRID_HEIGHT), dtype=np.uint16)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.lines_cleared = np.zeros(count, dtype=np.int64)
+        self.pieces_dropped = np.zeros(count, dtype=np.int64)
+        self.level = np.full(count, self.start_level, dtype=np.int64)
+        self.game_over = np.zeros(count, dtype=bool)
+
+        self._randomizers = [GameBoyRandomizer(seed) for seed in self.seeds]
+        seeded = all(isinstance(seed, int) for seed in self.seeds)
+        self._garbage_rng = np.random.default_rng(self.seeds if seeded else None)
+        self.sequences = np.zeros((count, 0), dtype=np.int8)
+        self.position = np.zeros(count, dtype=np.int64)
+        self._ensure_sequence(256)
+
+    def _ensure_sequence(self, length):
+        """Pre-generate at least `length` pieces for every board"""
+        if self.sequences.shape[1] >= length:
+            return
+        length = max(length, self.sequences.shape[1] * 2)
+        self.sequences = np.stack([
+            np.frombuffer(randomizer.generate_sequence(length), dtype=np.int8)
+            for randomizer in self._randomizers
+        ])
+
+    @property
+    def current_pieces(self):
+        """(N,) PIECE_TYPES index of each board's current piece"""
+        return self.sequences[np.arange(self.num_games), self.position]
+
+    @property
+    def next_pieces(self):
+        """(N,) PIECE_TYPES index of each board's next piece"""
+        return self.sequences[np.arange(self.num_games), self.position + 1]
+
+    def spawn_x(self):
+        """(N,) spawn column of each board's current piece"""
+        return SPAWN_X[self.current_pieces]
+
+    def candidate_placements(self):
+        """Simulate every (rotation, x) for each board's current piece
+
+        Returns (rows, lines_cleared, valid, rotations, xs) with shapes
+        (N, C, GRID_HEIGHT), (N, C), (N, C), (C,) and (C,), where C covers
+        every rotation and x. Same semantics as simulate_placement.
+        """
+        rotations = np.repeat(np.arange(MAX_ROTATIONS), X_POSITIONS)
+        xs = np.tile(np.arange(-X_OFFSET, GRID_WIDTH), MAX_ROTATIONS)
+        count = len(xs)
+
+        codes = self.current_pieces
+        # Rotations past a shape's count duplicate earlier ones
+        unique = rotations[None, :] < np.array(
+            [ROTATION_COUNTS[shape_type] for shape_type in PIECE_TYPES])[codes][:, None]
+
+        flat_rows = np.repeat(self.rows, count, axis=0)
+        new_rows, lines_cleared, valid = drop_and_place(
+            flat_rows, np.repeat(codes, count), np.tile(rotations, self.num_games),
+            np.tile(xs, self.num_games))
+        shape = (self.num_games, count)
+        valid = valid.reshape(shape) & unique & ~self.game_over[:, None]
+        return (new_rows.reshape(shape + (GRID_HEIGHT,)), lines_cleared.reshape(shape),
+                valid, rotations, xs)
+
+    def step(self, xs, rotations, active=None):
+        """Place every live board's current piece at (x, rotation) and drop it
+
+        active optionally limits the step to a boolean (N,) subset of boards.
+        An illegal placement drops the piece at its spawn position instead.
+        Returns (lines_cleared, garbage_to_send) as (N,) arrays.
+        """
+        live = ~self.game_over
+        if active is not None:
+            live &= active
+        codes = self.current_pieces
+        xs = np.asarray(xs, dtype=np.int64)
+        rotations = np.asarray(rotations, dtype=np.int64)
+
+        new_rows, lines, valid = drop_and_place(self.rows, codes, rotations, xs)
+        fallback = live & ~valid
+        if fallback.any():
+            spawn_rows, spawn_lines, _ = drop_and_place(
+                self.rows, codes, np.zeros_like(rotations), SPAWN_X[codes])
+            new_rows[fallback] = spawn_rows[fallback]
+            lines[fallback] = spawn_lines[fallback]
+
+        lines = np.where(live, lines, 0)
+        self.rows = np.where(live[:, None], new_rows, self.rows)
+        self.pieces_dropped += live
+
+        # Game Boy BPS scoring uses the level before any level up
+        points = LINE_SCORES[lines] * (self.level + 1)
+        self.score = np.minimum(self.score + points, MAX_SCORE)
+        self.lines_cleared += lines
+        new_level = self.lines_cleared // LINES_PER_LEVEL
+        self.level = np.where((self.level < MAX_LEVEL) & (new_level > self.level), new_level, self.level)
+
+        # Spawn the next piece; game over if it collides at spawn
+        self.position += live
+        self._ensure_sequence(int(self.position.max()) + 2)
+        self._check_spawn(live)
+
+        return lines, GARBAGE_SENT[lines]
+
+    def _check_spawn(self, boards):
+        """Set game over on boards whose current piece collides at spawn"""
+        codes = self.current_pieces
+        _, _, valid = drop_and_place(self.rows, codes, np.zeros_like(codes), SPAWN_X[codes])
+        self.game_over |= boards & ~valid
+
+    def receive_garbage(self, counts):
+        """Push garbage rows with one random hole each in at the bottom
+
+        counts is an (N,) array of rows per board; finished boards are skipped.
+        """
+        counts = np.where(self.game_over, 0, np.asarray(counts, dtype=np.int64))
+        if not counts.any():
+            return
+        counts = np.minimum(counts, GRID_HEIGHT)
+        source = np.arange(GRID_HEIGHT)[None, :] + counts[:, None]
+        shifted = np.take_along_axis(self.rows, np.minimum(source, GRID_HEIGHT - 1), axis=1)
+        holes = self._garbage_rng.integers(0, GRID_WIDTH, size=(self.num_games, GRID_HEIGHT))
+        garbage = (FULL_ROW & ~(1 << holes)).astype(np.uint16)
+        self.rows = np.where(source < GRID_HEIGHT, shifted, garbage).astype(np.uint16)
+        self._check_spawn(counts > 0)
+
+    def run(self, policy, max_pieces):
+        """Play until every board is over or has dropped max_pieces
+
+        policy(engine) returns (xs, rotations) arrays for all boards.
+        """
+        active = ~self.game_over & (self.pieces_dropped < max_pieces)
+        while active.any():
+            xs, rotations = policy(self)
+            self.step(xs, rotations, active)
+            active = ~self.game_over & (self.pieces_dropped < max_pieces)
+
+
+def ai_policy(ai_player):
+    """Drive a BatchTetris with an AIPlayer's evaluate_grid heuristic
+
+    Scores every candidate placement of every board in one NumPy pass
+    (evaluation.evaluate_batch, the batched evaluate_grid) with the
+    player's weights and picks the best per board.
+    """
+    from evaluation import evaluate_batch, rows_to_cells
+
+    def policy(engine):
+        rows, lines, valid, rotations, xs = engine.candidate_placements()
+        games, candidates = np.nonzero(valid)
+        scores = np.full(valid.shape, -np.inf)
+        scores[games, candidates] = evaluate_batch(
+            rows_to_cells(rows[games, candidates]), lines[games, candidates], ai_player.weights)
+
+        # argmax keeps the first of equal scores, like the serial search
+        best = scores.argmax(axis=1)
+        playable = valid.any(axis=1)
+        best_x = np.where(playable, xs[best], engine.spawn_x())
+        best_rotation = np.where(playable, rotations[best], 0)
+        return best_x, best_rotation
+
+    return policy
@@ -0,0 +1,669 @@
+"""Bitboard board representation - Game Boy Tetris rules
+
+Each row of the playfield is stored as a GRID_WIDTH-bit integer where bit
+``col`` is set when the cell at that column is filled. Pieces are
+precomputed as row masks for every (shape, rotation, x), so collision is
+an AND, full-line detection is a compare against FULL_ROW, and removing a
+row is a list operation on plain ints.
+"""
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+from tetromino import SHAPE_DATA, PIECE_TYPES
+from config import GRID_WIDTH, GRID_HEIGHT, BLACK, COLORS
+
+FULL_ROW = (1 << GRID_WIDTH) - 1
+EMPTY_ROW = 0
+
+# Cell palette: 0 is empty, then one index per piece type, then garbage.
+# Board.cells stores these indices; colors come from config.COLORS at render time.
+PALETTE = (None,) + PIECE_TYPES + ('GARBAGE',)
+PALETTE_INDEX = {name: index for index, name in enumerate(PALETTE)}
+EMPTY_CELL = 0
+GARBAGE_CELL = PALETTE_INDEX['GARBAGE']
+_EMPTY_CELLS = bytes(GRID_WIDTH)
+
+# Pieces live in a 4x4 box, so x can start up to 3 columns left of the grid
+X_OFFSET = 3
+
+
+def _build_piece_masks():
+    """Build row masks for every (shape, rotation, x)
+
+    PIECE_MASKS[shape][rotation][x + X_OFFSET] is a tuple of (dy, mask)
+    pairs, one per occupied row of the 4x4 shape box, or None when the
+    piece would stick out of the left/right walls at that x.
+    """
+    masks = {}
+    for shape_type, rotations in SHAPE_DATA.items():
+        shape_masks = []
+        for data in rotations:
+            min_col, _, max_col, _ = data.bounding_box
+            by_x = []
+            for x in range(-X_OFFSET, GRID_WIDTH):
+                if x + min_col < 0 or x + max_col >= GRID_WIDTH:
+                    by_x.append(None)
+                    continue
+                row_masks = {}
+                for col, row in data.offsets:
+                    row_masks[row] = row_masks.get(row, 0) | (1 << (x + col))
+                by_x.append(tuple(sorted(row_masks.items())))
+            shape_masks.append(by_x)
+        masks[shape_type] = shape_masks
+    return masks
+
+
+PIECE_MASKS = _build_piece_masks()
+
+# Row mask -> tuple of 0/1 cells, used to expand bitboards for list-based code
+ROW_CELLS = tuple(
+    tuple((mask >> col) & 1 for col in range(GRID_WIDTH))
+    for mask in range(1 << GRID_WIDTH)
+)
+
+# Row mask -> filled columns / number of filled cells
+MASK_COLS = tuple(
+    tuple(col for col in range(GRID_WIDTH) if (mask >> col) & 1)
+    for mask in range(1 << GRID_WIDTH)
+)
+POPCOUNT = tuple(len(cols) for cols in MASK_COLS)
+
+
+def piece_rows(shape_type, rotation, x):
+    """Get the (dy, mask) rows for a piece, or None if it is out of bounds"""
+    index = x + X_OFFSET
+    if index < 0 or index >= GRID_WIDTH + X_OFFSET:
+        return None
+    return PIECE_MASKS[shape_type][rotation][index]
+
+
+def collides(rows, shape_type, rotation, x, y):
+    """Check if a piece collides with the walls, floor or filled cells
+
+    Cells above the top of the grid (negative y) only collide with walls.
+    """
+    masks = piece_rows(shape_type, rotation, x)
+    if masks is None:
+        return True
+    for dy, mask in masks:
+        row = y + dy
+        if row >= GRID_HEIGHT:
+            return True
+        if row >= 0 and rows[row] & mask:
+            return True
+    return False
+
+
+def drop_y(rows, shape_type, rotation, x, y):
+    """Return the lowest y the piece can fall to from y"""
+    masks = piece_rows(shape_type, rotation, x)
+    if masks is None:
+        return y
+    while True:
+        for dy, mask in masks:
+            row = y + 1 + dy
+            if row >= GRID_HEIGHT or (row >= 0 and rows[row] & mask):
+                return y
+        y += 1
+
+
+# (shape, rotation) -> ((x, masks), ...) for every x where the piece fits between the walls
+DROP_COLUMNS = {
+    shape_type: tuple(
+        tuple((index - X_OFFSET, masks) for index, masks in enumerate(by_x) if masks is not None)
+        for by_x in shape_masks)
+    for shape_type, shape_masks in PIECE_MASKS.items()
+}
+
+
+def drop_placements(rows, shape_type, y=0):
+    """List (x, landing y, rotation) for every straight drop of a piece from row y
+
+    Every rotation at every column the piece fits in is tried; drops that
+    already collide at row y are left out. Works on raw bitboard rows with
+    no piece or game objects.
+    """
+    placements = []
+    for rotation, columns in enumerate(DROP_COLUMNS[shape_type]):
+        for x, masks in columns:
+            if not _fits(rows, masks, y):
+                continue
+            land = y
+            while _fits(rows, masks, land + 1):
+                land += 1
+            placements.append((x, land, rotation))
+    return placements
+
+
+def _fits(rows, masks, y):
+    """Check that (dy, mask) piece rows at y are clear of the floor and cells"""
+    for dy, mask in masks:
+        row = y + dy
+        if row >= GRID_HEIGHT or (row >= 0 and rows[row] & mask):
+            return False
+    return True
+
+
+def place(rows, shape_type, rotation, x, y):
+    """Return a copy of rows with the piece written in
+
+    Cells outside the grid are dropped, matching TetrisGame.lock_piece.
+    """
+    new_rows = list(rows)
+    masks = piece_rows(shape_type, rotation, x)
+    if masks is None:
+        return new_rows
+    for dy, mask in masks:
+        row = y + dy
+        if 0 <= row < GRID_HEIGHT:
+            new_rows[row] |= mask
+    return new_rows
+
+
+def full_rows(rows):
+    """Get the indices of all completed rows"""
+    return [row for row in range(GRID_HEIGHT) if rows[row] == FULL_ROW]
+
+
+def clear_full_rows(rows):
+    """Remove completed rows and return (new_rows, lines_cleared)"""
+    kept = [mask for mask in rows if mask != FULL_ROW]
+    lines_cleared = GRID_HEIGHT - len(kept)
+    if lines_cleared:
+        kept[:0] = [EMPTY_ROW] * lines_cleared
+    return kept, lines_cleared
+
+
+def column_heights(rows):
+    """Get the height of each column with one top-down pass over the rows"""
+    heights = [0] * GRID_WIDTH
+    seen = 0
+    for row in range(GRID_HEIGHT):
+        new_cols = rows[row] & ~seen
+        if new_cols:
+            height = GRID_HEIGHT - row
+            for col in MASK_COLS[new_cols]:
+                heights[col] = height
+            seen |= new_cols
+            if seen == FULL_ROW:
+                break
+    return heights
+
+
+def rows_to_grid(rows):
+    """Expand bitboard rows into a list-of-lists grid of 0/1 cells"""
+    return [list(ROW_CELLS[mask]) for mask in rows]
+
+
+def grid_to_rows(grid):
+    """Pack a list-of-lists grid into bitboard rows"""
+    rows = []
+    for grid_row in grid:
+        mask = 0
+        for col in range(GRID_WIDTH):
+            if grid_row[col]:
+                mask |= 1 << col
+        rows.append(mask)
+    return rows
+
+
+BoardSnapshot = namedtuple('BoardSnapshot', ['buffer', 'cells', 'counts', 'offset', 'heights',
+                                             'filled_cells'])
+
+
+class Board:
+    """Bitboard playfield storage for TetrisGame
+    
+    The board contents are one palette-indexed cell array (``cells``, a
+    bytearray with one byte per cell, see PALETTE). Row bitmasks are kept
+    alongside it as an occupancy index for collision and line checks.
+    
+    Rows live in a circular buffer: logical row 0 (the top of the grid)
+    sits at physical slot ``offset``, for both the row masks and the
+    cells. Pushing garbage moves the offset instead of shifting every
+    row, and line clears compact whichever side of the cleared rows is
+    shorter, reusing the freed slots for the new empty rows. The row
+    masks are stored twice back to back so ``rows`` can be a plain
+    contiguous read-only view for the collision code.
+    
+    Per-column heights, the filled cells per row (by physical slot, like
+    the masks) and in total are kept up to date: placing, clearing and
+    garbage shift them instead of rescanning the whole grid, so heights,
+    holes and full lines are always at hand.
+    """
+
+    def __init__(self):
+        self._buffer = array('H', [EMPTY_ROW]) * (2 * GRID_HEIGHT)
+        self._view = memoryview(self._buffer)
+        self._bytes_view = self._view.cast('B')
+        self.offset = 0
+        self.cells = bytearray(GRID_HEIGHT * GRID_WIDTH)
+        self.heights = [0] * GRID_WIDTH
+        self._counts = bytearray(GRID_HEIGHT)
+        self.filled_cells = 0
+        self._snapshot = None  # Last snapshot taken/restored, while still current
+        self._update_view()
+        self.grid = GridView(self)
+        self.grid_colors = ColorView(self)
+
+    def _update_view(self):
+        self.rows = self._view[self.offset:self.offset + GRID_HEIGHT].toreadonly()
+
+    def _index(self, row):
+        """Physical slot of a logical row"""
+        index = self.offset + row
+        return index - GRID_HEIGHT if index >= GRID_HEIGHT else index
+
+    def _write(self, row, mask):
+        """Store a row mask (both copies) and keep the filled cell counts"""
+        index = self._index(row)
+        count = POPCOUNT[mask]
+        self._snapshot = None
+        self.filled_cells += count - self._counts[index]
+        self._counts[index] = count
+        self._buffer[index] = self._buffer[index + GRID_HEIGHT] = mask
+
+    def _write_cells(self, row, mask, value=GARBAGE_CELL):
+        """Write a row mask, giving newly filled cells palette index `value`"""
+        old_mask = self.rows[row]
+        base = self._index(row) * GRID_WIDTH
+        cells = self.cells
+        for col in MASK_COLS[mask & ~old_mask]:
+            cells[base + col] = value
+        for col in MASK_COLS[old_mask & ~mask]:
+            cells[base + col] = EMPTY_CELL
+        self._write(row, mask)
+
+    def _blank(self, row):
+        """Empty a row in place"""
+        self._write(row, EMPTY_ROW)
+        base = self._index(row) * GRID_WIDTH
+        self.cells[base:base + GRID_WIDTH] = _EMPTY_CELLS
+
+    def _arrange(self, start, sources):
+        """Move rows `sources` (a permutation of start..) into start, start+1, ..."""
+        rows = self.rows
+        cells = self.cells
+        moved = []
+        for row in sources:
+            base = self._index(row) * GRID_WIDTH
+            moved.append((rows[row], cells[base:base + GRID_WIDTH]))
+        for row, (mask, row_cells) in enumerate(moved, start):
+            self._write(row, mask)
+            base = self._index(row) * GRID_WIDTH
+            cells[base:base + GRID_WIDTH] = row_cells
+
+    @property
+    def aggregate_height(self):
+        return sum(self.heights)
+
+    @property
+    def holes(self):
+        """Empty cells with a filled cell somewhere above them"""
+        return sum(self.heights) - self.filled_cells
+
+    @property
+    def row_counts(self):
+        """Filled cells in each row, top to bottom"""
+        counts = self._counts
+        return list(counts[self.offset:] + counts[:self.offset])
+
+    def clear(self):
+        """Empty the whole board"""
+        for index in range(2 * GRID_HEIGHT):
+            self._buffer[index] = EMPTY_ROW
+        self.cells[:] = bytes(len(self.cells))
+        self._snapshot = None
+        self.offset = 0
+        self._update_view()
+        self.heights[:] = [0] * GRID_WIDTH
+        self._counts[:] = bytes(GRID_HEIGHT)
+        self.filled_cells = 0
+
+    def refresh_stats(self):
+        """Recompute heights and the filled cell counts from the rows"""
+        self.heights[:] = column_heights(self.rows)
+        for index in range(GRID_HEIGHT):
+            self._counts[index] = POPCOUNT[self._buffer[index]]
+        self.filled_cells = sum(self._counts)
+
+    def get_cell(self, row, col):
+        return (self.rows[row] >> col) & 1
+
+    def get_palette_index(self, row, col):
+        return self.cells[self._index(row) * GRID_WIDTH + col]
+
+    def set_cell(self, row, col, value):
+        if value:
+            self._write_cells(row, self.rows[row] | (1 << col))
+        else:
+            self._write_cells(row, self.rows[row] & ~(1 << col))
+        self.heights[:] = column_heights(self.rows)
+
+    def set_grid(self, grid):
+        """Replace the board contents from a list-of-lists grid"""
+        for row, mask in enumerate(grid_to_rows(grid)):
+            self._write_cells(row, mask)
+        self.heights[:] = column_heights(self.rows)
+
+    def set_row(self, row, mask):
+        self._write_cells(row, mask)
+        self.heights[:] = column_heights(self.rows)
+
+    def get_cells(self):
+        """Palette indices for the whole board, top row first, as bytes"""
+        split = self.offset * GRID_WIDTH
+        return bytes(self.cells[split:]) + bytes(self.cells[:split])
+
+    def set_cells(self, data):
+        """Replace the board contents from get_cells() output"""
+        self.offset = 0
+        self._update_view()
+        self.cells[:] = data
+        for row in range(GRID_HEIGHT):
+            base = row * GRID_WIDTH
+            mask = 0
+            for col in range(GRID_WIDTH):
+                if data[base + col]:
+                    mask |= 1 << col
+            self._write(row, mask)
+        self.heights[:] = column_heights(self.rows)
+
+    def snapshot(self):
+        """Capture the board as an immutable BoardSnapshot
+        
+        The whole board packs into a few hundred bytes, so a snapshot is a
+        flat copy; it is shared by every snapshot() and restore() until the
+        board next changes, so repeated snapshots of an unchanged board and
+        restoring an untouched board cost nothing.
+        """
+        if self._snapshot is None:
+            self._snapshot = BoardSnapshot(self._buffer.tobytes(), bytes(self.cells),
+                                           bytes(self._counts), self.offset,
+                                           tuple(self.heights), self.filled_cells)
+        return self._snapshot
+
+    def restore(self, snapshot):
+        """Roll the board back to a snapshot() exactly"""
+        if snapshot is self._snapshot:
+            return
+        self._bytes_view[:] = snapshot.buffer
+        self.cells[:] = snapshot.cells
+        self._counts[:] = snapshot.counts
+        if self.offset != snapshot.offset:
+            self.offset = snapshot.offset
+            self._update_view()
+        self.heights[:] = snapshot.heights
+        self.filled_cells = snapshot.filled_cells
+        self._snapshot = snapshot
+
+    def collides(self, shape_type, rotation, x, y):
+        return collides(self.rows, shape_type, rotation, x, y)
+
+    def place(self, shape_type, rotation, x, y):
+        """Write a piece into the board in place
+        
+        Updates heights and the filled count in O(piece size) and returns
+        the rows the piece touched, the only rows that can have become full.
+        """
+        masks = piece_rows(shape_type, rotation, x)
+        if masks is None:
+            return []
+        touched = []
+        heights = self.heights
+        rows = self.rows
+        cells = self.cells
+        value = PALETTE_INDEX[shape_type]
+        for dy, mask in masks:
+            row = y + dy
+            if 0 <= row < GRID_HEIGHT:
+                self._write(row, rows[row] | mask)
+                height = GRID_HEIGHT - row
+                base = self._index(row) * GRID_WIDTH
+                for col in MASK_COLS[mask]:
+                    cells[base + col] = value
+                    if heights[col] < height:
+                        heights[col] = height
+                touched.append(row)
+        return touched
+
+    def full_rows(self, candidates=None):
+        """Get the completed rows, optionally only checking `candidates`"""
+        if candidates is None:
+            return full_rows(self.rows)
+        return sorted(row for row in candidates if self.rows[row] == FULL_ROW)
+
+    def remove_rows(self, rows_to_remove):
+        """Remove the given rows and shift everything above them down
+        
+        Rows above the cleared ones are shifted down when that side is
+        shorter; otherwise the rows below are shifted up and the offset
+        moves, so a clear near the floor only touches a few rows.
+        """
+        removed = sorted(set(rows_to_remove))
+        count = len(removed)
+        if not count:
+            return
+        top, bottom = removed[0], removed[-1]
+        removed_set = set(removed)
+        self._shift_heights(removed, removed_set)
+
+        if bottom + 1 <= GRID_HEIGHT - top:
+            kept = [row for row in range(bottom + 1) if row not in removed_set]
+            self._arrange(0, removed + kept)
+            for row in range(count):
+                self._blank(row)
+        else:
+            kept = [row for row in range(top, GRID_HEIGHT) if row not in removed_set]
+            self._arrange(top, kept + removed)
+            for row in range(GRID_HEIGHT - count, GRID_HEIGHT):
+                self._blank(row)
+            # The recycled bottom slots become the new top rows
+            self.offset = (self.offset - count) % GRID_HEIGHT
+            self._update_view()
+
+    def _shift_heights(self, removed, removed_set):
+        """Heights after removing the (sorted) rows, from the rows before
+
+        A column's top block drops by the number of removed rows below it;
+        only a column whose top block is itself removed looks further down.
+        """
+        rows = self.rows
+        heights = self.heights
+        count = len(removed)
+        for col in range(GRID_WIDTH):
+            if not heights[col]:
+                continue
+            bit = 1 << col
+            row = GRID_HEIGHT - heights[col]
+            while row < GRID_HEIGHT and (row in removed_set or not rows[row] & bit):
+                row += 1
+            if row < GRID_HEIGHT:
+                heights[col] = GRID_HEIGHT - row - (count - bisect_right(removed, row))
+            else:
+                heights[col] = 0
+
+    def push_garbage(self, garbage_rows):
+        """Push rows in at the bottom, dropping the same number off the top"""
+        count = len(garbage_rows)
+        if not count:
+            return
+
+        # The top rows' slots become the new bottom rows
+        self.offset = (self.offset + count) % GRID_HEIGHT
+        self._update_view()
+        first_garbage_row = GRID_HEIGHT - count
+        for row, mask in enumerate(garbage_rows, first_garbage_row):
+            self._blank(row)
+            self._write_cells(row, mask)
+
+        # Everything moved up by count rows; empty columns get the top garbage
+        # cell, and columns pushed off the top the first block left
+        heights = self.heights
+        rows = self.rows
+        for col in range(GRID_WIDTH):
+            if heights[col] and heights[col] + count <= GRID_HEIGHT:
+                heights[col] += count
+                continue
+            bit = 1 << col
+            row = first_garbage_row if not heights[col] else 0
+            while row < GRID_HEIGHT and not rows[row] & bit:
+                row += 1
+            heights[col] = GRID_HEIGHT - row
+
+
+class GridRow:
+    """List-like view of one board row so grid[row][col] keeps working"""
+
+    __slots__ = ('board', 'row')
+
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return list(ROW_CELLS[self.board.rows[self.row]])[col]
+        if col < 0:
+            col += GRID_WIDTH
+        return (self.board.rows[self.row] >> col) & 1
+
+    def __setitem__(self, col, value):
+        if col < 0:
+            col += GRID_WIDTH
+        self.board.set_cell(self.row, col, value)
+
+    def __len__(self):
+        return GRID_WIDTH
+
+    def __iter__(self):
+        return iter(ROW_CELLS[self.board.rows[self.row]])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class GridView:
+    """List-of-lists view over a Board for renderers and legacy callers"""
+
+    def __init__(self, board):
+        self.board = board
+        self._rows = tuple(GridRow(board, row) for row in range(GRID_HEIGHT))
+
+    def __getitem__(self, row):
+        return self._rows[row]
+
+    def __setitem__(self, row, values):
+        mask = 0
+        for col in range(GRID_WIDTH):
+            if values[col]:
+                mask |= 1 << col
+        self.board.set_row(row, mask)
+
+    def __len__(self):
+        return GRID_HEIGHT
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __repr__(self):
+        return repr(rows_to_grid(self.board.rows))
+
+
+# Colors written through grid_colors that no palette entry has, after PALETTE
+_CUSTOM_COLORS = []
+_COLOR_INDEX = {}
+for _index, _name in enumerate(PALETTE[1:], 1):
+    _COLOR_INDEX.setdefault(tuple(COLORS[_name]), _index)
+
+
+def palette_color(index):
+    """Resolve a palette index to its display color"""
+    if index == EMPTY_CELL:
+        return BLACK
+    if index >= len(PALETTE):
+        custom = index - len(PALETTE)
+        # A peer's custom color this process never saw shows as garbage
+        return _CUSTOM_COLORS[custom] if custom < len(_CUSTOM_COLORS) else COLORS['GARBAGE']
+    return COLORS[PALETTE[index]]
+
+
+def color_index(color):
+    """Palette index that displays as `color` (custom colors get one on first use)"""
+    color = tuple(color)
+    index = _COLOR_INDEX.get(color)
+    if index is None:
+        index = len(PALETTE) + len(_CUSTOM_COLORS)
+        if index > 0xFF:
+            raise ValueError("Too many custom cell colors for the palette")
+        _CUSTOM_COLORS.append(color)
+        _COLOR_INDEX[color] = index
+    return index
+
+
+class ColorRow:
+    """List-like view of one row's cell colors, like the old grid_colors rows
+
+    Colors belong to filled cells: writing one recolors a filled cell,
+    writing BLACK to an empty cell is a no-op and any other color on an
+    empty cell is a ValueError (fill it through grid first).
+    """
+
+    __slots__ = ('board', 'row')
+
+    def __init__(self, board, row):
+        self.board = board
+        self.row = row
+
+    def _cells(self):
+        base = self.board._index(self.row) * GRID_WIDTH
+        return self.board.cells[base:base + GRID_WIDTH]
+
+    def __getitem__(self, col):
+        colors = [palette_color(index) for index in self._cells()]
+        return colors[col]
+
+    def __setitem__(self, col, color):
+        if col < 0:
+            col += GRID_WIDTH
+        board = self.board
+        if not (board.rows[self.row] >> col) & 1:
+            if tuple(color) == tuple(BLACK):
+                return
+            raise ValueError(f"Cell ({self.row}, {col}) is empty; fill it before coloring it")
+        cell = board._index(self.row) * GRID_WIDTH + col
+        if palette_color(board.cells[cell]) != tuple(color):
+            board.cells[cell] = color_index(color)
+            board._snapshot = None
+
+    def __len__(self):
+        return GRID_WIDTH
+
+    def __iter__(self):
+        return (palette_color(index) for index in self._cells())
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class ColorView:
+    """grid_colors[row][col] view resolving cell palette indices"""
+
+    def __init__(self, board):
+        self.board = board
+        self._rows = tuple(ColorRow(board, row) for row in range(GRID_HEIGHT))
+
+    def __getitem__(self, row):
+        return self._rows[row]
+
+    def __len__(self):
+        return GRID_HEIGHT
+
+    def __iter__(self):
+        return (self[row] for row in range(GRID_HEIGHT))
@@ -1,4 +1,5 @@
 # Game Configuration - 1989 Game Boy Tetris Style
+import os
 import pygame
 
 # Screen dimensions - Game Boy style
@@ -40,6 +41,7 @@ COLORS = {
     'Z': TETROMINO_COLOR,
     'J': TETROMINO_COLOR,
     'L': TETROMINO_COLOR,
+    'GARBAGE': GB_DARK_GRAY,
     'GHOST': GB_DARK_GRAY
 }
 
@@ -54,10 +56,15 @@ FRAME_TIME = 1000 / 59.73
 def frames_to_ms(frames):
     return frames * FRAME_TIME
 
+# Game timing in frames - used directly by frame-stepped simulation
+DAS_DELAY_FRAMES = 24  # 24 frames for DAS activation (Game Boy authentic)
+DAS_SPEED_FRAMES = 10  # 10 frames between DAS moves
+LINE_CLEAR_FRAMES = 5  # 5 frames for clearing animation (Game Boy authentic)
+
 # Game timing - Game Boy Tetris authentic timings
 SOFT_DROP_SPEED = frames_to_ms(1)  # 1 frame per row when soft dropping
-DAS_DELAY = frames_to_ms(24)  # 24 frames for DAS activation (Game Boy authentic)
-DAS_SPEED = frames_to_ms(10)  # 10 frames between DAS moves
+DAS_DELAY = frames_to_ms(DAS_DELAY_FRAMES)
+DAS_SPEED = frames_to_ms(DAS_SPEED_FRAMES)
 
 # Soft drop is 1/3 of normal gravity in Game Boy (approximately 0.19 seconds per cell)
 SOFT_DROP_MULTIPLIER = 3  # Soft drop is 3x faster than normal gravity
@@ -103,3 +110,22 @@ AUTHENTIC_SPAWN_DELAY = True  # Use authentic spawn delays
 
 # AI settings - Perfect AI configuration
 AI_THINK_TIME = 0.05  # Faster thinking for perfect play (50ms)
+AI_SEARCH_DEPTH = 1  # Known upcoming pieces the beam search looks ahead (0 = current piece only)
+AI_BEAM_WIDTH = 8  # Boards kept per ply by the beam search
+AI_MAX_SEARCH_DEPTH = 4  # Deepest lookahead the anytime search tries
+AI_THINK_ROWS = 1  # Rows a piece may fall while the anytime search thinks
+AI_HEADLESS_NODE_RATE = 20000  # Search nodes per second of anytime budget in frame-stepped games
+AI_WEIGHTS_FILE = 'ai_weights.json'  # Weights profile in tetris_battle/ the tuners write and main.py --weights loads
+def weights_path(name=AI_WEIGHTS_FILE):
+    """Weights profiles live in tetris_battle/, whatever the working directory"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+AI_CACHE_MB = 16  # Memory cap for the AI's board evaluation cache (transposition table)
+AI_PARALLEL_WORKERS = 0  # Worker processes for move search (0/1 = search in-process)
+AI_SEARCH_MODE = 'beam'  # 'beam' (known piece queue), 'expectimax' (next piece + 7-bag odds) or 'rollout'
+AI_EXPECTIMAX_DEPTH = 2  # Pieces expectimax searches after the current one
+AI_EXPECTIMAX_WIDTH = 4  # Placements per piece expectimax searches deeper
+AI_ROLLOUTS = 32  # Monte Carlo rollouts per candidate in 'rollout' search mode
+AI_ROLLOUT_DEPTH = 8  # Pieces each rollout plays
+AI_ROLLOUT_WIDTH = 6  # Best candidates by the heuristic that get rolled out
+AI_ROLLOUT_WORKERS = 4  # Worker processes for the rollouts (0/1 = in-process)
+AI_TAP_FRAMES = 2  # Fastest the AI re-presses a button (press + release frame)
@@ -554,7 +554,7 @@ class EnhancedOnlineBattle:
         spectator_data = {
             'game_state': 'playing',
             'player1_state': {
-                'grid': self.local_player.game.grid,
+                'grid': self.local_player.game.get_grid_state(),
                 'score': self.local_player.game.score,
                 'level': self.local_player.game.level,
                 'lines_cleared': self.local_player.game.lines_cleared,
@@ -562,7 +562,7 @@ class EnhancedOnlineBattle:
                 'next_piece': self._get_piece_data(self.local_player.game.next_piece)
             },
             'player2_state': {
-                'grid': self.remote_player.game.grid,
+                'grid': self.remote_player.game.get_grid_state(),
                 'score': self.remote_player.game.score,
                 'level': self.remote_player.game.level,
                 'lines_cleared': self.remote_player.game.lines_cleared,
@@ -629,7 +629,7 @@ class EnhancedOnlineBattle:
         
         game_data = {
             'player_id': self.player_id,
-            'grid': self.local_player.game.grid,
+            'grid': self.local_player.game.get_grid_state(),
             'score': self.local_player.game.score,
             'level': self.local_player.game.level,
             'lines_cleared': self.local_player.game.lines_cleared,
@@ -0,0 +1,284 @@
+"""Batched board evaluation - AIPlayer.evaluate_grid for many boards at once
+
+evaluate_grid works out a dozen features with Python loops over one
+list-of-lists grid. Here the same features are computed for a whole stack
+of boards as a (N, 20, 10) NumPy array: column heights from argmax, holes
+from a cumulative OR down each column, bumpiness and wells from diffs of
+the heights. The weighted sum is one matrix-vector product with the
+weights in FEATURES order, and scores match evaluate_grid to within
+floating point rounding.
+
+For one board at a time, board_features gets the same vector from a
+single top-down pass over the bitboard rows instead of evaluate_grid's
+separate scans of the 200-cell grid.
+"""
+import numpy as np
+from bitboard import MASK_COLS, POPCOUNT
+from config import GRID_WIDTH, GRID_HEIGHT
+
+# (feature, AIPlayer.weights key); None means the feature is added unweighted
+FEATURES = (
+    ('lines_bonus', 'lines_cleared'),
+    ('threat', 'threat_assessment'),
+    ('tall_stack', 'height_penalty'),
+    ('aggregate_height', 'aggregate_height'),
+    ('holes', 'holes'),
+    ('bumpiness', 'bumpiness'),
+    ('height_variance', 'height_variance'),
+    ('well_suitability', None),
+    ('stack_stability', 'stack_stability'),
+    ('future_mobility', 'future_mobility'),
+    ('perfect_play', None),
+)
+FEATURE_NAMES = tuple(name for name, _ in FEATURES)
+
+# evaluate_grid's line clear bonus multiplier by lines cleared. More than
+# four only happens on boards that still hold full rows (mid clear
+# animation, garbage) and gets no bonus, as in evaluate_grid
+LINE_MULTIPLIERS = (0.0, 1.0, 2.0, 3.0, 6.0) + (0.0,) * (GRID_HEIGHT - 3)
+
+_COLUMN_BITS = np.arange(GRID_WIDTH, dtype=np.uint16)
+
+# Row transitions only count pairs of neighbouring cells inside the row
+_PAIR_MASK = (1 << (GRID_WIDTH - 1)) - 1
+
+
+def well_depth(heights):
+    """Depth of the columns lower than both neighbours (the walls count as height 0)"""
+    depth = 0
+    last = len(heights) - 1
+    for col, height in enumerate(heights):
+        left = heights[col - 1] if col > 0 else 0
+        right = heights[col + 1] if col < last else 0
+        if height < left and height < right:
+            depth += min(left, right) - height
+    return depth
+
+
+class BoardScan:
+    """Everything one pass over a board's rows finds (see scan_board)
+
+    heights: column heights, like AIPlayer.get_column_heights
+    holes, weighted_holes: like AIPlayer.count_advanced_holes
+    overhangs: filled cells above an empty one (-calculate_stack_stability)
+    column_transitions, row_transitions: like the AIPlayer count_* helpers
+    """
+    __slots__ = ('heights', 'holes', 'weighted_holes', 'overhangs',
+                 'column_transitions', 'row_transitions')
+
+    def __init__(self, heights, holes, weighted_holes, overhangs,
+                 column_transitions, row_transitions):
+        self.heights = heights
+        self.holes = holes
+        self.weighted_holes = weighted_holes
+        self.overhangs = overhangs
+        self.column_transitions = column_transitions
+        self.row_transitions = row_transitions
+
+    def well_depth(self):
+        """Like AIPlayer.calculate_well_depth"""
+        return well_depth(self.heights)
+
+    def pit_depth(self):
+        """Like AIPlayer.calculate_pit_depth"""
+        heights = self.heights
+        pits = 0
+        for col, height in enumerate(heights):
+            left = heights[col - 1] if col > 0 else height
+            right = heights[col + 1] if col < GRID_WIDTH - 1 else height
+            if height < left - 2 and height < right - 2:
+                depth = min(left, right) - height
+                pits += depth * depth
+        return pits
+
+    def tetris_setup(self):
+        """Like AIPlayer.evaluate_tetris_setup"""
+        heights = self.heights
+        bonus = 0
+        others = heights[:-1]
+        if heights[-1] <= max(others) - 3:
+            bonus += 2
+            if len(set(others)) <= 2:
+                bonus += 1
+        if min(heights) < sum(heights) / GRID_WIDTH - 2:
+            bonus += 0.5
+        return bonus
+
+
+def scan_board(rows):
+    """Walk bitboard rows once, top to bottom, and return a BoardScan
+
+    Each row is handled as a 10-bit mask, so heights, holes, overhangs and
+    transitions for all columns come out of the same loop.
+    """
+    heights = [0] * GRID_WIDTH
+    depths = [0] * GRID_WIDTH  # Current run of holes per column
+    covered = 0  # Columns with a block at or above this row
+    in_hole = 0  # Columns whose cell above was a hole
+    holes = weighted_holes = overhangs = column_transitions = row_transitions = 0
+    above = None
+    for row_index, row in enumerate(rows):
+        new_cols = row & ~covered
+        if new_cols:
+            height = GRID_HEIGHT - row_index
+            for col in MASK_COLS[new_cols]:
+                heights[col] = height
+            covered |= new_cols
+        # A block under a run of holes starts the count again
+        for col in MASK_COLS[row & in_hole]:
+            depths[col] = 0
+        in_hole = covered & ~row
+        if in_hole:
+            holes += POPCOUNT[in_hole]
+            for col in MASK_COLS[in_hole]:
+                depths[col] += 1
+                weighted_holes += depths[col]
+        if above is not None:
+            column_transitions += POPCOUNT[above ^ row]
+            overhangs += POPCOUNT[above & ~row]
+        row_transitions += POPCOUNT[(row ^ (row >> 1)) & _PAIR_MASK]
+        above = row
+    return BoardScan(heights, holes, weighted_holes, overhangs,
+                     column_transitions, row_transitions)
+
+
+def board_features(rows, lines_cleared):
+    """The FEATURES vector of one board from a single scan_board pass
+
+    Returns (features, max_height) like batch_features does for one board.
+    """
+    scan = scan_board(rows)
+    heights = scan.heights
+    max_height = max(heights)
+    aggregate = sum(heights)
+    variance = max_height - min(heights)
+
+    if max_height > 15:
+        threat, tall = (max_height - 15) ** 2, 0.0
+    elif max_height > 12:
+        threat, tall = 0.0, (max_height - 12) ** 1.5
+    else:
+        threat = tall = 0.0
+
+    bumpiness = 0
+    wells = 0
+    for col in range(GRID_WIDTH - 1):
+        diff = heights[col] - heights[col + 1]
+        bumpiness += diff * diff
+        if 0 < col and heights[col] < heights[col - 1] - 1 and heights[col] < heights[col + 1] - 1:
+            wells += 1
+
+    rightmost = heights[-1]
+    left_neighbors = heights[-4:-1]
+    if all(height > rightmost + 2 for height in left_neighbors):
+        well = 3.0
+    elif rightmost < max(left_neighbors) - 1:
+        well = 1.0
+    else:
+        well = 0.0
+    if wells > 1:
+        well -= wells * 2.0
+
+    average = aggregate / GRID_WIDTH
+    mobility = sum(1 for height in heights if height < GRID_HEIGHT - 4)
+    mobility += 2 if average < 8 else 1 if average < 12 else 0
+
+    perfect = 10 if lines_cleared == 4 else 0
+    perfect += 5 if max_height <= 8 else 2 if max_height <= 12 else 0
+    perfect += 3 if variance <= 2 else 1 if variance <= 4 else 0
+
+    features = (lines_cleared * LINE_MULTIPLIERS[lines_cleared], threat, tall, aggregate,
+                scan.holes, bumpiness, variance, well, -scan.overhangs, mobility, perfect)
+    return features, max_height
+
+
+def evaluate_board(rows, lines_cleared, weights):
+    """Score one board of bitboard rows like AIPlayer.evaluate_grid"""
+    features, max_height = board_features(rows, lines_cleared)
+    score = 0.0
+    for value, (_, key) in zip(features, FEATURES):
+        score += value if key is None else weights[key] * value
+    if lines_cleared >= 2 and max_height <= 10:
+        score *= weights['efficiency_multiplier']
+    return score
+
+
+def weight_vector(weights):
+    """Order an AIPlayer weights dict to match FEATURES"""
+    return np.array([1.0 if key is None else weights[key] for _, key in FEATURES])
+
+
+def rows_to_cells(rows):
+    """Unpack (N, 20) bitboard rows into a (N, 20, 10) boolean cell array"""
+    rows = np.asarray(rows, dtype=np.uint16)
+    return ((rows[..., None] >> _COLUMN_BITS) & 1).astype(bool)
+
+
+def batch_features(cells, lines_cleared):
+    """Compute the FEATURES matrix (N, len(FEATURES)) for a stack of boards
+
+    Also returns the max column height per board, which the efficiency
+    multiplier needs.
+    """
+    filled = np.asarray(cells) != 0
+    lines = np.asarray(lines_cleared, dtype=np.int64)
+    count = filled.shape[0]
+
+    # Column heights: first filled row from the top
+    has_block = filled.any(axis=1)
+    heights = np.where(has_block, GRID_HEIGHT - filled.argmax(axis=1), 0)
+    max_height = heights.max(axis=1)
+    min_height = heights.min(axis=1)
+    aggregate = heights.sum(axis=1)
+    variance = max_height - min_height
+
+    # Holes: empty cells below the first block of their column
+    covered = np.logical_or.accumulate(filled, axis=1)
+    holes = (covered & ~filled).sum(axis=(1, 2))
+
+    bumpiness = (np.diff(heights, axis=1) ** 2).sum(axis=1)
+
+    # Well suitability: right-side Tetris well, minus scattered wells
+    rightmost = heights[:, -1]
+    left_neighbors = heights[:, -4:-1]
+    well = np.where((left_neighbors > rightmost[:, None] + 2).all(axis=1), 3.0,
+                    np.where(rightmost < left_neighbors.max(axis=1) - 1, 1.0, 0.0))
+    middle = heights[:, 1:-1]
+    wells = ((middle < heights[:, :-2] - 1) & (middle < heights[:, 2:] - 1)).sum(axis=1)
+    well -= np.where(wells > 1, wells * 2.0, 0.0)
+
+    # Stability: filled cells with an empty cell right below
+    overhangs = (filled[:, :-1] & ~filled[:, 1:]).sum(axis=(1, 2))
+
+    average = aggregate / GRID_WIDTH
+    mobility = ((heights < GRID_HEIGHT - 4).sum(axis=1)
+                + np.where(average < 8, 2, np.where(average < 12, 1, 0)))
+
+    perfect = (np.where(lines == 4, 10, 0)
+               + np.where(max_height <= 8, 5, np.where(max_height <= 12, 2, 0))
+               + np.where(variance <= 2, 3, np.where(variance <= 4, 1, 0)))
+
+    over = max_height.astype(float)
+    features = np.empty((count, len(FEATURES)))
+    features[:, 0] = lines * np.take(LINE_MULTIPLIERS, lines)
+    features[:, 1] = np.where(max_height > 15, (over - 15) ** 2, 0.0)
+    features[:, 2] = np.where((max_height > 12) & (max_height <= 15),
+                              np.abs(over - 12) ** 1.5, 0.0)
+    features[:, 3] = aggregate
+    features[:, 4] = holes
+    features[:, 5] = bumpiness
+    features[:, 6] = variance
+    features[:, 7] = well
+    features[:, 8] = -overhangs
+    features[:, 9] = mobility
+    features[:, 10] = perfect
+    return features, max_height
+
+
+def evaluate_batch(cells, lines_cleared, weights):
+    """Score a stack of boards like AIPlayer.evaluate_grid, returns an (N,) array"""
+    lines = np.asarray(lines_cleared, dtype=np.int64)
+    features, max_height = batch_features(cells, lines)
+    scores = features @ weight_vector(weights)
+    efficient = (lines >= 2) & (max_height <= 10)
+    return np.where(efficient, scores * weights['efficiency_multiplier'], scores)
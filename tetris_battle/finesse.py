@@ -0,0 +1,127 @@
+"""Finesse-optimal input schedules for the AI
+
+A placement from the move generator is turned into a schedule: a deque
+with one entry per frame, each a tuple of the actions pressed on that
+frame. The timing follows the same input model as a human player
+(player.py / TetrisGame.step):
+
+- A new press moves the piece at once; the same button can be pressed
+  again every AI_TAP_FRAMES frames (press + release).
+- Holding a direction moves once, charges DAS for DAS_DELAY_FRAMES and
+  then repeats every DAS_SPEED_FRAMES, the first repeat coming
+  DAS_DELAY_FRAMES + DAS_SPEED_FRAMES after the press. Whichever of
+  tapping or holding gets the piece there sooner is used.
+- Rotations and shifts can happen on the same frame.
+- Soft drop moves one row at once, then one every gravity //
+  SOFT_DROP_MULTIPLIER frames held until the piece locks.
+
+The AI taps faster than DAS on purpose: a release and a new press also
+move the piece at once for player.py, just no human re-presses every
+AI_TAP_FRAMES. So every shift of two or more columns is tapped, and
+holding only wins (as a tie) for a single column.
+
+Schedules for plain placements (rotate, shift, drop) from the spawn
+position are precomputed per (piece, rotation, column) in FINESSE_TABLE.
+Tucks, spins and moves planned mid-fall follow their input path step by
+step, in the order the move generator checked.
+"""
+from collections import deque
+from bitboard import DROP_COLUMNS
+from ai_search import SPAWN_X
+from tetromino import PIECE_TYPES
+from config import (DAS_DELAY_FRAMES, DAS_SPEED_FRAMES, SOFT_DROP_MULTIPLIER, GRAVITY_TABLE,
+                    MAX_LEVEL, AI_TAP_FRAMES)
+
+# Last schedule entry: keep soft dropping until the piece locks
+SOFT_DROP = ('soft_drop',)
+
+
+def held_frames(distance):
+    """Frame offsets of each move for a `distance`-column shift with the button held
+
+    The same DAS timing as player.py and TetrisGame.step: a move on the
+    press, then repeats once DAS has charged.
+    """
+    if distance <= 0:
+        return []
+    return [0] + [DAS_DELAY_FRAMES + (move + 1) * DAS_SPEED_FRAMES
+                  for move in range(distance - 1)]
+
+
+def shift_frames(distance):
+    """Frame offsets of each move for a `distance`-column shift
+
+    Tapping moves every AI_TAP_FRAMES, holding at the DAS timing
+    (held_frames). The faster one wins (ties go to holding, which is fewer
+    presses).
+    """
+    if distance <= 0:
+        return []
+    taps = [move * AI_TAP_FRAMES for move in range(distance)]
+    held = held_frames(distance)
+    return held if held[-1] <= taps[-1] else taps
+
+
+def build_schedule(rotations, shift):
+    """Per-frame actions for `rotations` rotate presses and a signed column shift"""
+    direction = 'move_right' if shift > 0 else 'move_left'
+    timeline = {}
+    for rotation in range(rotations):
+        timeline.setdefault(rotation * AI_TAP_FRAMES, []).append('rotate')
+    for frame in shift_frames(abs(shift)):
+        timeline.setdefault(frame, []).append(direction)
+    length = max(timeline) + 1 if timeline else 0
+    return tuple(tuple(timeline.get(frame, ())) for frame in range(length))
+
+
+def _build_finesse_table():
+    """Schedules from the spawn position to every (shape, rotation, column)"""
+    table = {}
+    for shape_type in PIECE_TYPES:
+        for rotation, columns in enumerate(DROP_COLUMNS[shape_type]):
+            for x, _ in columns:
+                table[shape_type, rotation, x] = build_schedule(rotation, x - SPAWN_X[shape_type])
+    return table
+
+
+FINESSE_TABLE = _build_finesse_table()
+
+
+def drop_interval(level):
+    """Frames per row of the AI's soft drop at a level (as TetrisGame.step holds down)"""
+    return max(1, GRAVITY_TABLE[min(level, MAX_LEVEL)] // SOFT_DROP_MULTIPLIER)
+
+
+def _is_plain(path):
+    """True for rotations and shifts one way, followed only by drops"""
+    moves = list(path)
+    while moves and moves[-1] == 'move_down':
+        moves.pop()
+    return 'move_down' not in moves and not ('move_left' in moves and 'move_right' in moves)
+
+
+def plan_inputs(placement, shape_type, x, rotation, level):
+    """Build the frame schedule (a deque) that takes a piece to a placement
+
+    x and rotation are where the piece is now; level sets the soft drop
+    rate for tucks. The schedule always ends with SOFT_DROP, which the
+    player keeps at the front of the deque until the piece locks.
+    """
+    path = placement.path
+    if x == SPAWN_X[shape_type] and rotation == 0 and _is_plain(path):
+        schedule = deque(FINESSE_TABLE[shape_type, placement.rotation, placement.x])
+    else:
+        # One input per press, drops at the soft drop rate
+        schedule = deque()
+        interval = drop_interval(level)
+        previous = None
+        for action in path:
+            if action == 'move_down':
+                schedule.extend([()] * (interval - 1))
+            elif action == previous:
+                schedule.extend([()] * (AI_TAP_FRAMES - 1))  # Release before pressing again
+            schedule.append((action,))
+            previous = action
+    schedule.append(SOFT_DROP)
+    return schedule
+
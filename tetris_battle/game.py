@@ -1,23 +1,42 @@
-import pygame
-import time
 import random
-from tetromino import Tetromino, GameBoyRandomizer
+from collections import namedtuple
+from contextlib import contextmanager
+from tetromino import GameBoyRandomizer
+from bitboard import Board, FULL_ROW, collides, drop_y, place, clear_full_rows, rows_to_grid
+from sim_clock import SystemClock
 from config import *
 
+# Plain attributes captured by TetrisGame.snapshot()
+SNAPSHOT_FIELDS = (
+    'seed', 'score', 'lines_cleared', 'pieces_dropped', 'spawn_id', 'level', 'lines_needed',
+    'fall_time', 'last_fall', 'game_over', 'next_piece',
+    'clear_animation_timer', 'clear_animation_active',
+    'frame_count', 'gravity_frames', 'clear_animation_frames',
+    'soft_drop_frames', 'das_frames', 'das_direction', 'held_inputs',
+)
+
+GameSnapshot = namedtuple('GameSnapshot', [
+    'board', 'fields', 'clearing_lines', 'piece', 'piece_state',
+    'generator', 'generator_position', 'garbage_rng',
+])
+
+
 class TetrisGame:
-    def __init__(self, start_level=0, game_type="A-TYPE", sound_manager=None):
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.grid_colors = [[BLACK for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.generator = GameBoyRandomizer()
+    def __init__(self, start_level=0, game_type="A-TYPE", sound_manager=None, clock=None, seed=None):
+        self.board = Board()
+        self.seed = seed
+        self._seed_streams()
         self.current_piece = None
         self.next_piece = None
         self.score = 0
         self.lines_cleared = 0
         self.pieces_dropped = 0  # Track pieces dropped for statistics
+        self.spawn_id = 0  # Counts every piece spawned, never reset (identifies a piece)
         self.level = start_level
         self.start_level = start_level
         self.game_type = game_type
         self.sound_manager = sound_manager
+        self.clock = clock if clock is not None else SystemClock()
         self.fall_time = frames_to_ms(GRAVITY_TABLE[min(self.level, MAX_LEVEL)])
         self.last_fall = 0
         self.game_over = False
@@ -26,11 +45,54 @@ class TetrisGame:
         # Line clearing animation state
         self.clearing_lines = []
         self.clear_animation_timer = 0
-        self.clear_animation_duration = frames_to_ms(5)  # 5 frames for clearing animation (Game Boy authentic)
+        self.clear_animation_duration = frames_to_ms(LINE_CLEAR_FRAMES)
         self.clear_animation_active = False
         
+        self._reset_frame_state()
         self.spawn_new_piece()
+    
+    @property
+    def grid(self):
+        """List-of-lists style view of the bitboard (grid[row][col])"""
+        return self.board.grid
+    
+    @grid.setter
+    def grid(self, grid):
+        self.board.set_grid(grid)
+    
+    @property
+    def grid_colors(self):
+        """Cell colors from the palette (grid_colors[row][col]; filled cells can be recolored)"""
+        return self.board.grid_colors
+    
+    def get_cells(self):
+        """Board cells as palette indices (bytes, row-major, top row first)"""
+        return self.board.get_cells()
+    
+    def set_cells(self, data):
+        """Replace the board from get_cells() output"""
+        self.board.set_cells(data)
         
+    def _seed_streams(self):
+        """Create the piece and garbage random streams from self.seed
+        
+        Games with the same seed get the same pieces and garbage holes.
+        """
+        self.generator = GameBoyRandomizer(self.seed)
+        garbage_seed = None if self.seed is None else f"{self.seed}:garbage"
+        self.garbage_rng = random.Random(garbage_seed)
+        self._garbage_rng_shared = False  # Held by a snapshot, copy before drawing
+    
+    def _reset_frame_state(self):
+        """Reset the counters used by frame-stepped simulation (step)"""
+        self.frame_count = 0
+        self.gravity_frames = 0
+        self.clear_animation_frames = 0
+        self.soft_drop_frames = 0
+        self.das_frames = 0
+        self.das_direction = 0
+        self.held_inputs = frozenset()
+    
     def _calculate_lines_needed(self):
         """Calculate lines needed for next level - Game Boy Tetris style
         
@@ -51,6 +113,7 @@ class TetrisGame:
         """Spawn a new piece at the top of the grid - Game Boy style"""
         self.current_piece = self.generator.get_next()
         self.next_piece = self.generator.current_piece
+        self.spawn_id += 1
         
         # Game Boy authentic spawn positions
         piece_type = self.current_piece.shape_type
@@ -72,6 +135,8 @@ class TetrisGame:
             self.current_piece.x = 3
             self.current_piece.y = 0
         
+        self.gravity_frames = 0
+        
         # Check if the new piece can be placed (Game Over condition)
         if self.check_collision(self.current_piece):
             self.game_over = True
@@ -81,19 +146,8 @@ class TetrisGame:
     
     def check_collision(self, piece, dx=0, dy=0):
         """Check if piece would collide at the given offset"""
-        for block_x, block_y in piece.get_blocks():
-            new_x = block_x + dx
-            new_y = block_y + dy
-            
-            # Check boundaries
-            if new_x < 0 or new_x >= GRID_WIDTH or new_y >= GRID_HEIGHT:
-                return True
-            
-            # Check collision with placed blocks (ignore blocks above the grid)
-            if new_y >= 0 and self.grid[new_y][new_x] != 0:
-                return True
-        
-        return False
+        return collides(self.board.rows, piece.shape_type, piece.rotation,
+                        piece.x + dx, piece.y + dy)
     
     def move_piece(self, dx, dy):
         """Move the current piece by the given offset"""
@@ -146,16 +200,14 @@ class TetrisGame:
             return
         
         # Place the piece on the grid
-        for block_x, block_y in self.current_piece.get_blocks():
-            if 0 <= block_x < GRID_WIDTH and 0 <= block_y < GRID_HEIGHT:
-                self.grid[block_y][block_x] = 1
-                self.grid_colors[block_y][block_x] = self.current_piece.color
+        piece = self.current_piece
+        touched_rows = self.board.place(piece.shape_type, piece.rotation, piece.x, piece.y)
         
         # Increment pieces dropped counter
         self.pieces_dropped += 1
         
-        # Check for line clears
-        lines_cleared = self.clear_lines()
+        # Check for line clears - only the rows the piece touched can be full
+        lines_cleared = self.clear_lines(touched_rows)
         if lines_cleared > 0:
             # Don't update score or spawn new piece until animation completes
             return
@@ -173,19 +225,19 @@ class TetrisGame:
         # Spawn new piece after clearing
         self.spawn_new_piece()
     
-    def clear_lines(self):
-        """Clear completed lines and return the number cleared - Game Boy style"""
-        lines_to_clear = []
+    def clear_lines(self, candidate_rows=None):
+        """Clear completed lines and return the number cleared - Game Boy style
         
+        candidate_rows limits the check to rows that may have changed.
+        """
         # Find completed lines
-        for row in range(GRID_HEIGHT):
-            if all(self.grid[row][col] != 0 for col in range(GRID_WIDTH)):
-                lines_to_clear.append(row)
+        lines_to_clear = self.board.full_rows(candidate_rows)
         
         if lines_to_clear:
             # Start line clearing animation
             self.clearing_lines = lines_to_clear
             self.clear_animation_timer = 0
+            self.clear_animation_frames = 0
             self.clear_animation_active = True
             return len(lines_to_clear)
         
@@ -196,13 +248,8 @@ class TetrisGame:
         if not self.clearing_lines:
             return
         
-        # Remove completed lines
-        for row in reversed(self.clearing_lines):
-            del self.grid[row]
-            del self.grid_colors[row]
-            # Add new empty line at top
-            self.grid.insert(0, [0 for _ in range(GRID_WIDTH)])
-            self.grid_colors.insert(0, [BLACK for _ in range(GRID_WIDTH)])
+        # Remove completed lines (empty lines come in at the top)
+        self.board.remove_rows(self.clearing_lines)
         
         lines_cleared = len(self.clearing_lines)
         self.lines_cleared += lines_cleared
@@ -241,7 +288,7 @@ class TetrisGame:
         if self.game_over:
             return
         
-        current_time = pygame.time.get_ticks()
+        current_time = self.clock.get_ticks()
         
         # Handle line clearing animation
         if self.clear_animation_active:
@@ -260,53 +307,141 @@ class TetrisGame:
                     self.lock_piece()
             self.last_fall = current_time
     
+    @property
+    def sim_time(self):
+        """Milliseconds of simulated time covered by step()"""
+        return frames_to_ms(self.frame_count)
+    
+    def step(self, frames=1, inputs=()):
+        """Advance the game by whole frames with the given buttons held
+        
+        inputs is a collection of 'left', 'right', 'down' and 'rotate'.
+        Gravity (GRAVITY_TABLE), soft drop, DAS and the line clear animation
+        are all counted in frames, so this runs without a display and as
+        fast as the CPU allows.
+        """
+        inputs = frozenset(inputs)
+        for _ in range(frames):
+            if self.game_over:
+                break
+            self.frame_count += 1
+            self._step_frame(inputs)
+            self.held_inputs = inputs
+    
+    def _step_frame(self, inputs):
+        """Run one frame of simulation"""
+        # Handle line clearing animation
+        if self.clear_animation_active:
+            self.clear_animation_frames += 1
+            self.clear_animation_timer = frames_to_ms(self.clear_animation_frames)
+            if self.clear_animation_frames >= LINE_CLEAR_FRAMES:
+                self.finish_line_clear()
+            return  # Don't update falling pieces during animation
+        
+        gravity = GRAVITY_TABLE[min(self.level, MAX_LEVEL)]
+        self._step_inputs(inputs, gravity)
+        
+        # A soft drop may have locked the piece this frame
+        if self.clear_animation_active or not self.current_piece or self.game_over:
+            return
+        
+        # Handle piece falling
+        self.gravity_frames += 1
+        if self.gravity_frames >= gravity:
+            self.gravity_frames = 0
+            if not self.check_collision(self.current_piece, 0, 1):
+                self.current_piece.y += 1
+            else:
+                # Piece has landed, lock immediately (no lock delay in Game Boy)
+                self.lock_piece()
+    
+    def _step_inputs(self, inputs, gravity):
+        """Apply held buttons for one frame - same DAS rules as Player"""
+        held = self.held_inputs
+        
+        # Rotation only triggers on the frame the button is pressed
+        if 'rotate' in inputs and 'rotate' not in held:
+            self.rotate_piece()
+        
+        # Horizontal movement with DAS (Delayed Auto Shift)
+        left_pressed = 'left' in inputs
+        right_pressed = 'right' in inputs
+        if left_pressed and not right_pressed:
+            direction = -1
+        elif right_pressed and not left_pressed:
+            direction = 1
+        else:
+            direction = 0
+        
+        if direction == 0:
+            self.das_direction = 0
+            self.das_frames = 0
+        elif direction != self.das_direction:
+            # Immediate move on first press
+            self.das_direction = direction
+            self.das_frames = 0
+            self.move_piece(direction, 0)
+        else:
+            # Same direction held - repeat every DAS_SPEED_FRAMES once DAS is charged
+            self.das_frames += 1
+            repeat_frames = self.das_frames - DAS_DELAY_FRAMES
+            if repeat_frames > 0 and repeat_frames % DAS_SPEED_FRAMES == 0:
+                self.move_piece(direction, 0)
+        
+        # Soft drop - Game Boy soft drop is 1/3 of normal gravity
+        if 'down' in inputs:
+            if 'down' not in held:
+                self.soft_drop_frames = 0
+                self.soft_drop()
+            else:
+                self.soft_drop_frames += 1
+                if self.soft_drop_frames >= max(1, gravity // SOFT_DROP_MULTIPLIER):
+                    self.soft_drop_frames = 0
+                    self.soft_drop()
+    
     def get_ghost_piece(self):
         """Get ghost piece position"""
         if not self.current_piece:
             return None
         
         ghost = self.current_piece.copy()
-        while not self.check_collision(ghost, 0, 1):
-            ghost.y += 1
+        ghost.y = drop_y(self.board.rows, ghost.shape_type, ghost.rotation, ghost.x, ghost.y)
         
         return ghost
     
+    def get_column_heights(self):
+        """Height of each column, kept up to date by the board"""
+        return list(self.board.heights)
+    
+    def get_row_fill_counts(self):
+        """Number of filled cells in each row, top to bottom"""
+        return list(self.board.row_counts)
+    
+    def get_hole_count(self):
+        """Number of empty cells covered by a filled cell"""
+        return self.board.holes
+    
     def get_grid_state(self):
         """Get current grid state for AI"""
-        return [row[:] for row in self.grid]
+        return rows_to_grid(self.board.rows)
     
     def simulate_placement(self, piece, x, y, rotation):
         """Simulate placing a piece and return the resulting grid state"""
-        # Create a copy of the grid
-        test_grid = [row[:] for row in self.grid]
-        
-        # Create piece at specified position and rotation
-        test_piece = piece.copy()
-        test_piece.x = x
-        test_piece.y = y
-        test_piece.rotation = rotation
-        
-        # Drop the piece
-        while not self.check_collision_on_grid(test_piece, test_grid, 0, 1):
-            test_piece.y += 1
-        
-        # Place the piece
-        for block_x, block_y in test_piece.get_blocks():
-            if 0 <= block_x < GRID_WIDTH and 0 <= block_y < GRID_HEIGHT:
-                test_grid[block_y][block_x] = 1
-        
-        # Clear lines and count them
-        lines_cleared = 0
-        row = GRID_HEIGHT - 1
-        while row >= 0:
-            if all(test_grid[row][col] != 0 for col in range(GRID_WIDTH)):
-                del test_grid[row]
-                test_grid.insert(0, [0 for _ in range(GRID_WIDTH)])
-                lines_cleared += 1
-            else:
-                row -= 1
+        test_rows, lines_cleared = self.simulate_placement_rows(piece.shape_type, x, y, rotation)
+        return rows_to_grid(test_rows), lines_cleared
+    
+    def simulate_placement_rows(self, shape_type, x, y, rotation, rows=None):
+        """Simulate placing a piece on bitboard rows (defaults to this board)
         
-        return test_grid, lines_cleared
+        Returns the resulting rows and the number of lines cleared.
+        """
+        if rows is None:
+            rows = self.board.rows
+        
+        # Drop the piece, place it and clear any completed lines
+        y = drop_y(rows, shape_type, rotation, x, y)
+        test_rows = place(rows, shape_type, rotation, x, y)
+        return clear_full_rows(test_rows)
     
     def check_collision_on_grid(self, piece, grid, dx=0, dy=0):
         """Check collision on a specific grid"""
@@ -322,11 +457,16 @@ class TetrisGame:
         
         return False
     
-    def reset(self):
-        """Reset the game state"""
-        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.grid_colors = [[BLACK for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.generator = GameBoyRandomizer()
+    def reset(self, seed=None):
+        """Reset the game state
+        
+        Passing a seed switches to that seed; otherwise a seeded game replays
+        the same piece sequence.
+        """
+        if seed is not None:
+            self.seed = seed
+        self.board.clear()
+        self._seed_streams()
         self.current_piece = None
         self.next_piece = None
         self.score = 0
@@ -343,8 +483,69 @@ class TetrisGame:
         self.clear_animation_timer = 0
         self.clear_animation_active = False
         
+        self._reset_frame_state()
         self.spawn_new_piece()
     
+    def snapshot(self):
+        """Capture everything needed to roll the game back exactly
+        
+        The board snapshot is shared copy-on-write (see Board.snapshot),
+        the piece sequence is only rewound (pieces generated past the
+        snapshot are the same ones the game would deal again), the garbage
+        stream is copied only if garbage is drawn before the next restore,
+        and the current piece object is kept so restore() hands back the
+        same one.
+        """
+        piece = self.current_piece
+        piece_state = None
+        if piece is not None:
+            piece_state = (piece.shape_type, piece.x, piece.y, piece.rotation)
+        return GameSnapshot(
+            self.board.snapshot(),
+            tuple(getattr(self, name) for name in SNAPSHOT_FIELDS),
+            tuple(self.clearing_lines),
+            piece, piece_state,
+            self.generator, self.generator.position,
+            self._share_garbage_rng(),
+        )
+    
+    def restore(self, snapshot):
+        """Roll back to a snapshot() taken from this game"""
+        self.board.restore(snapshot.board)
+        for name, value in zip(SNAPSHOT_FIELDS, snapshot.fields):
+            setattr(self, name, value)
+        self.clearing_lines = list(snapshot.clearing_lines)
+        
+        self.current_piece = snapshot.piece
+        if snapshot.piece is not None:
+            (snapshot.piece.shape_type, snapshot.piece.x,
+             snapshot.piece.y, snapshot.piece.rotation) = snapshot.piece_state
+        
+        self.generator = snapshot.generator
+        self.generator.position = snapshot.generator_position
+        self.garbage_rng = snapshot.garbage_rng
+        self._garbage_rng_shared = True
+    
+    def _share_garbage_rng(self):
+        """Hand the garbage stream to a snapshot, copying it on the next draw"""
+        self._garbage_rng_shared = True
+        return self.garbage_rng
+    
+    @contextmanager
+    def speculative(self):
+        """Play moves inside a with block and roll them all back afterwards
+        
+        Sounds are muted while speculating.
+        """
+        snapshot = self.snapshot()
+        sound_manager = self.sound_manager
+        self.sound_manager = None
+        try:
+            yield self
+        finally:
+            self.sound_manager = sound_manager
+            self.restore(snapshot)
+    
     def send_garbage_lines(self, lines_cleared):
         """Send garbage lines to opponent based on Game Boy Tetris rules"""
         if lines_cleared == 2:  # Double
@@ -361,25 +562,22 @@ class TetrisGame:
         if self.game_over or num_lines <= 0:
             return
         
-        # Remove lines from top to make room
-        for _ in range(num_lines):
-            if len(self.grid) > 0:
-                self.grid.pop(0)
-                self.grid_colors.pop(0)
+        if self._garbage_rng_shared:
+            # A snapshot still needs the stream as it is
+            garbage_rng = random.Random()
+            garbage_rng.setstate(self.garbage_rng.getstate())
+            self.garbage_rng = garbage_rng
+            self._garbage_rng_shared = False
         
-        # Add garbage lines at bottom
+        # Add garbage lines at bottom, pushing lines off the top
+        garbage_rows = []
         for _ in range(num_lines):
             # Game Boy garbage lines have a shared hole pattern
-            garbage_line = [1] * GRID_WIDTH
-            garbage_color_line = [GB_DARK_GRAY] * GRID_WIDTH
-            
             # Add a hole (Game Boy uses shared hole positions)
-            hole_position = random.randint(0, GRID_WIDTH - 1)
-            garbage_line[hole_position] = 0
-            garbage_color_line[hole_position] = BLACK
-            
-            self.grid.append(garbage_line)
-            self.grid_colors.append(garbage_color_line)
+            hole_position = self.garbage_rng.randint(0, GRID_WIDTH - 1)
+            garbage_rows.append(FULL_ROW & ~(1 << hole_position))
+        
+        self.board.push_garbage(garbage_rows[-GRID_HEIGHT:])
     
     def check_lines_win_condition(self):
         """Check if player has cleared enough lines to win (Game Boy: 30 lines)"""
@@ -0,0 +1,48 @@
+"""Shared pieces of the offline AI tools (tune_weights, selfplay, ai_policy)
+
+play_game runs a TetrisGame in fast-forward: each move is locked where the
+chooser put it and TetrisGame does the line clears, scoring, levels and
+spawns, so whatever is measured carries straight over to live play.
+save_json writes results and checkpoints so that a run killed mid-write
+keeps the previous file.
+"""
+import contextlib
+import io
+import json
+import os
+
+
+def play_game(game, choose_move, max_pieces, on_move=None):
+    """Play `game` until it ends or max_pieces pieces are placed
+
+    choose_move() returns the Placement for game.current_piece, or None
+    when it has none. on_move(piece, move), if given, sees each move
+    before the piece locks (the board still as the chooser saw it).
+    Returns True if the game topped out, False if it hit the piece limit.
+    """
+    # Keep level-up messages from thousands of games out of the log
+    with contextlib.redirect_stdout(io.StringIO()):
+        while game.pieces_dropped < max_pieces:
+            if game.game_over:
+                return True
+            move = choose_move()
+            if move is None:
+                return True
+            piece = game.current_piece
+            if on_move is not None:
+                on_move(piece, move)
+            piece.x, piece.y, piece.rotation = move.x, move.y, move.rotation
+            game.lock_piece()
+            if game.clear_animation_active:
+                game.finish_line_clear()
+    return False
+
+
+def save_json(data, path):
+    """Write JSON atomically (temp file + rename)"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
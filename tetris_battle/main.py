@@ -1,3 +1,4 @@
+import argparse
 import pygame
 import time
 import numpy as np
@@ -15,7 +16,7 @@ except ImportError:
     print("Note: matplotlib not installed. Statistics graphs will be disabled.")
 
 class TetrisBattle:
-    def __init__(self):
+    def __init__(self, weights_file=None):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Tetris Battle - Game Boy Style")
@@ -29,7 +30,9 @@ class TetrisBattle:
         # Game state
         self.sound_manager = SoundManager()
         self.player = Player(self.sound_manager, start_level=0)
-        self.ai_player = AIPlayer(self.sound_manager, start_level=0)
+        # Think off the render thread, but only plan with the one next piece the player sees
+        self.ai_player = AIPlayer(self.sound_manager, start_level=0, background=True,
+                                  anytime=False, weights_file=weights_file)
         
         # VS mode system (Game Boy style)
         self.current_round = 1
@@ -534,18 +537,26 @@ class TetrisBattle:
     def run(self):
         """Main game loop"""
         running = True
-        while running:
-            dt = self.clock.tick(60) / 1000.0
-            
-            running = self.handle_events()
-            self.update(dt)
-            self.draw()
+        try:
+            while running:
+                dt = self.clock.tick(60) / 1000.0
+                
+                running = self.handle_events()
+                self.update(dt)
+                self.draw()
+        finally:
+            # Quit or back to the menu: stop the AI's thinking thread and worker pools
+            self.ai_player.close()
         
         pygame.quit()
 
 def main():
     """Main function"""
-    game = TetrisBattle()
+    parser = argparse.ArgumentParser(description="Tetris Battle - Game Boy Style")
+    parser.add_argument('--weights', nargs='?', const=AI_WEIGHTS_FILE, default=None,
+                        help="play the AI with a saved weights profile (default: %(const)s)")
+    args = parser.parse_args()
+    game = TetrisBattle(weights_file=args.weights)
     game.run()
 
 if __name__ == "__main__":
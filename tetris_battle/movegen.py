@@ -0,0 +1,84 @@
+"""Reachable-placement move generator - Game Boy rotation rules
+
+Breadth-first search over (x, y, rotation) states from the piece's
+current position using the same inputs a player has: move left, move
+right, rotate (Tetromino.rotate, no wall kicks) and soft drop. Every
+state where the piece cannot move down is a lockable placement, so
+tucks under overhangs and spins into gaps are found along with the
+usual straight drops, and anything returned can actually be reached.
+
+Results are deduplicated by the cells the piece ends up covering, so
+the symmetric I/S/Z orientations only appear once, and each placement
+comes with its shortest input path.
+"""
+from collections import namedtuple, deque
+from functools import lru_cache
+from bitboard import collides, piece_rows
+from tetromino import ROTATION_COUNTS
+
+# path is a tuple of 'rotate', 'move_left', 'move_right' and 'move_down'
+Placement = namedtuple('Placement', ['x', 'y', 'rotation', 'path'])
+
+MOVES = (
+    ('rotate', 0, 0, 1),
+    ('move_left', -1, 0, 0),
+    ('move_right', 1, 0, 0),
+    ('move_down', 0, 1, 0),
+)
+
+
+def generate_placements(rows, shape_type, x, y, rotation=0):
+    """Get every distinct lockable placement reachable from (x, y, rotation)
+
+    rows are bitboard rows (list or tuple). Returns a list of Placement
+    in breadth-first order, each with the shortest input path.
+    """
+    return list(_generate(tuple(rows), shape_type, x, y, rotation))
+
+
+@lru_cache(maxsize=4096)
+def _generate(rows, shape_type, x, y, rotation):
+    """Memoized search, keyed on the exact board and start state"""
+    if collides(rows, shape_type, rotation, x, y):
+        return ()
+
+    rotations = ROTATION_COUNTS[shape_type]
+    start = (x, y, rotation)
+    parents = {start: None}
+    queue = deque([start])
+    placements = []
+    seen_cells = set()
+
+    while queue:
+        state = queue.popleft()
+        state_x, state_y, state_rotation = state
+
+        for action, dx, dy, turn in MOVES:
+            next_state = (state_x + dx, state_y + dy, (state_rotation + turn) % rotations)
+            if next_state in parents:
+                continue
+            if collides(rows, shape_type, next_state[2], next_state[0], next_state[1]):
+                if action == 'move_down':
+                    # Can't fall any further: this state locks here
+                    cells = tuple((state_y + row, mask) for row, mask in
+                                  piece_rows(shape_type, state_rotation, state_x))
+                    if cells not in seen_cells:
+                        seen_cells.add(cells)
+                        placements.append(Placement(state_x, state_y, state_rotation,
+                                                    _path_to(parents, state)))
+                continue
+            parents[next_state] = (state, action)
+            queue.append(next_state)
+
+    return tuple(placements)
+
+
+def _path_to(parents, state):
+    """Walk parent links back to the start state"""
+    path = []
+    while parents[state] is not None:
+        state, action = parents[state]
+        path.append(action)
+    path.reverse()
+    return tuple(path)
+
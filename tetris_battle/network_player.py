@@ -214,7 +214,7 @@ class NetworkPlayer:
         
         # Create state snapshot
         state = {
-            'grid': self.game.grid,
+            'cells': self.game.get_cells().hex(),  # Palette indices, row-major
             'score': self.game.score,
             'lines_cleared': self.game.lines_cleared,
             'pieces_dropped': self.game.pieces_dropped,
@@ -254,19 +254,8 @@ class NetworkPlayer:
             if current_state.get(field) != self.last_sent_state.get(field):
                 return True
         
-        # Check grid changes (only compare a few key rows for performance)
-        current_grid = current_state.get('grid', [])
-        last_grid = self.last_sent_state.get('grid', [])
-        
-        if len(current_grid) != len(last_grid):
-            return True
-        
-        # Compare bottom 5 rows (most likely to change)
-        for i in range(max(0, len(current_grid) - 5), len(current_grid)):
-            if current_grid[i] != last_grid[i]:
-                return True
-        
-        return False
+        # Check grid changes (the packed cells compare as one string)
+        return current_state.get('cells') != self.last_sent_state.get('cells')
     
     def _handle_remote_input(self, message: NetworkMessage):
         """Handle input from remote player"""
@@ -309,7 +298,9 @@ class NetworkPlayer:
         self.game.clear_animation_active = state.get('clear_animation_active', False)
         
         # Update grid state
-        if 'grid' in state:
+        if 'cells' in state:
+            self.game.set_cells(bytes.fromhex(state['cells']))
+        elif 'grid' in state:
             self.game.grid = state['grid']
         
         # Update current piece
@@ -0,0 +1,162 @@
+"""Process-pool candidate evaluation for AIPlayer
+
+Scoring a placement (simulate, evaluate_grid, lookahead) is pure Python
+and independent per candidate, so the candidates for one move can be
+split across worker processes. A pool of each size is created once and
+reused for every move; each task only carries the bitboard rows (a tuple
+of ints), the piece shapes, a slice of (x, y, rotation) placements and
+the heuristic weights - never a pickled TetrisGame.
+
+The deeper searches use it the same way: the beam search sends each
+ply's boards (starting with the root children) with the next shape to
+expand and score, and expectimax sends its root children with the known
+pieces and bag to value their subtrees.
+
+Results come back in candidate order, so picking the best move from them
+gives exactly the same answer as the serial search.
+"""
+import atexit
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker pools by size, so users of different sizes (e.g. the rollout
+# evaluator and AIPlayer.parallel_workers) don't restart each other's
+_pools = {}
+
+# Per-process AIPlayer the scoring tasks use inside the workers, made on first use
+_evaluator = None
+
+
+def get_pool(workers):
+    """Get the shared pool of `workers` processes, starting it on first use"""
+    pool = _pools.get(workers)
+    if pool is None:
+        # spawn: workers must not inherit pygame/SDL or thread state from the game
+        context = multiprocessing.get_context('spawn')
+        pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    return pool
+
+
+def shutdown_pool():
+    """Stop every pool's worker processes (called automatically at exit)"""
+    while _pools:
+        _, pool = _pools.popitem()
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pool)
+
+
+def _player(weights):
+    """This worker's AIPlayer, scoring with `weights`"""
+    global _evaluator
+    if _evaluator is None:
+        from ai_player import AIPlayer
+        _evaluator = AIPlayer(None)
+    if weights != _evaluator.weights:
+        _evaluator.weights = weights  # Also clears the worker's evaluation cache
+    return _evaluator
+
+
+def _score_chunk(rows, shape_type, placements, next_piece, weights):
+    """Worker task: score a slice of placements for one board"""
+    player = _player(weights)
+    return [player.score_placement(rows, shape_type, x, y, rotation, next_piece)
+            for x, y, rotation in placements]
+
+
+def _expand_chunk(boards, shape_type, weights):
+    """Worker task: expand and score a slice of beam boards with the next shape"""
+    from ai_search import SPAWN_X
+    from bitboard import collides
+    planner = _player(weights).planner
+    results = []
+    for rows in boards:
+        if collides(rows, shape_type, 0, SPAWN_X[shape_type], 0):
+            results.append([])  # Topped out on this line
+            continue
+        children = planner.expand(rows, shape_type, SPAWN_X[shape_type], 0, 0)
+        scores = planner.score([(new_rows, lines) for _, new_rows, lines in children])
+        results.append([(tuple(new_rows), lines, score)
+                        for (_, new_rows, lines), score in zip(children, scores)])
+    return results
+
+
+def _value_chunk(boards, known, bag, depth, width, weights, budget, node_rate):
+    """Worker task: expectimax values of a slice of root children
+
+    Returns (values, nodes), or None if the budget (seconds) ran out.
+    """
+    from ai_search import Expectimax, SearchTimeout
+    planner = Expectimax(_player(weights).evaluate_rows_batch, depth, width,
+                         node_rate=node_rate)
+    deadline = None if budget is None else planner._now() + budget
+    try:
+        values = [planner._value(rows, known, bag, depth, deadline) for rows in boards]
+    except SearchTimeout:
+        return None
+    return values, planner.stats.nodes
+
+
+def _chunks(items, workers):
+    """Contiguous slices, one per worker, keep the per-task overhead down"""
+    chunk_size = -(-len(items) // workers)
+    return [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def score_placements(rows, shape_type, placements, next_piece, weights, workers):
+    """Score every placement on the pool and return the scores in order
+
+    placements are (x, y, rotation) tuples (movegen Placements work too,
+    their paths are dropped before sending).
+    """
+    pool = get_pool(workers)
+    rows = tuple(rows)
+    states = [(placement[0], placement[1], placement[2]) for placement in placements]
+    futures = [pool.submit(_score_chunk, rows, shape_type, chunk, next_piece, dict(weights))
+               for chunk in _chunks(states, workers)]
+    scores = []
+    for future in futures:
+        scores.extend(future.result())
+    return scores
+
+
+def expand_boards(boards, shape_type, weights, workers):
+    """Expand every board with a spawned piece on the pool
+
+    Returns, per board in order, a list of (rows, lines_cleared, score)
+    children in move generator order (empty if the piece can't spawn).
+    """
+    pool = get_pool(workers)
+    futures = [pool.submit(_expand_chunk, chunk, shape_type, dict(weights))
+               for chunk in _chunks([tuple(rows) for rows in boards], workers)]
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
+def expectimax_values(boards, known, bag, depth, width, weights, workers, budget=None,
+                      node_rate=None):
+    """Expectimax values of boards before the next piece spawns, on the pool
+
+    Returns (values in board order, nodes searched), or None when the
+    budget (seconds, counted in nodes with a node_rate) runs out in any
+    worker.
+    """
+    pool = get_pool(workers)
+    futures = [pool.submit(_value_chunk, chunk, tuple(known), tuple(bag), depth, width,
+                           dict(weights), budget, node_rate)
+               for chunk in _chunks([tuple(rows) for rows in boards], workers)]
+    values = []
+    nodes = 0
+    timed_out = False
+    for future in futures:
+        result = future.result()
+        if result is None:
+            timed_out = True
+            continue
+        values.extend(result[0])
+        nodes += result[1]
+    return None if timed_out else (values, nodes)
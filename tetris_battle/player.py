@@ -5,8 +5,8 @@ from sounds import SoundManager
 from config import *
 
 class Player:
-    def __init__(self, sound_manager, start_level=0):
-        self.game = TetrisGame(start_level, sound_manager=sound_manager)
+    def __init__(self, sound_manager, start_level=0, seed=None):
+        self.game = TetrisGame(start_level, sound_manager=sound_manager, seed=seed)
         self.sound_manager = sound_manager
         self.keys_pressed = set()
         self.last_move_time = 0
@@ -0,0 +1,258 @@
+"""Monte Carlo rollout evaluation for AIPlayer
+
+Instead of trusting the heuristic's score of the board a placement
+leaves, play it out: deal random continuations of the piece sequence
+(the known next piece, then the rest of its 7-bag and fresh bags after
+that in random order) and let a cheap greedy policy place a fixed number
+of pieces on each. A candidate is judged by how often its rollouts
+survive and what they clear.
+
+Every candidate is played on the same continuations, so the differences
+between them come from the boards and not from luckier piece sequences.
+The greedy policy only tries straight drops and scores them with the
+four-term 'classic' heuristic in a single pass over the bitboard rows.
+
+Rollouts are independent, so they are split across the shared process
+pool (parallel_search); each task carries bitboard rows and shape
+sequences only.
+"""
+import random
+from collections import namedtuple
+from ai_search import Planner, SPAWN_X
+from ai_policy import ClassicPolicy
+from bitboard import (collides, drop_placements, place, clear_full_rows, DROP_COLUMNS, FULL_ROW,
+                      MASK_COLS, POPCOUNT)
+from parallel_search import get_pool
+from tetromino import PIECE_TYPES
+from config import (GRID_WIDTH, GRID_HEIGHT, AI_ROLLOUTS, AI_ROLLOUT_DEPTH, AI_ROLLOUT_WIDTH,
+                    AI_ROLLOUT_WORKERS)
+
+# Weights of the rollout policy's heuristic
+GREEDY_WEIGHTS = ClassicPolicy.DEFAULT_WEIGHTS
+
+# One candidate's rollouts: survival is the fraction that placed every
+# piece, value the mean greedy score of where they ended (lines included)
+RolloutStats = namedtuple('RolloutStats',
+                          ['rollouts', 'survival', 'mean_pieces', 'mean_lines', 'mean_value'])
+
+
+def _build_drop_profiles():
+    """shape -> ((rotation, x, ((col, top dy, bottom dy), ...)), ...) for every straight drop
+
+    Every tetromino column is one unbroken run of cells, so its top and
+    bottom row are all a drop needs.
+    """
+    profiles = {}
+    for shape_type, by_rotation in DROP_COLUMNS.items():
+        entries = []
+        for rotation, columns in enumerate(by_rotation):
+            for x, masks in columns:
+                cells = {}
+                for dy, mask in masks:
+                    for col in MASK_COLS[mask]:
+                        top, bottom = cells.get(col, (dy, dy))
+                        cells[col] = (min(top, dy), max(bottom, dy))
+                entries.append((rotation, x, tuple((col, top, bottom)
+                                                   for col, (top, bottom) in sorted(cells.items()))))
+        profiles[shape_type] = tuple(entries)
+    return profiles
+
+
+DROP_PROFILES = _build_drop_profiles()
+
+# Rows a piece can reach below its spawn row (the vertical I)
+PIECE_ROWS = 4
+
+
+def surface(rows):
+    """Column heights and hole count in one top-down pass"""
+    heights = [0] * GRID_WIDTH
+    covered = 0
+    holes = 0
+    top = 0
+    while top < GRID_HEIGHT and not rows[top]:
+        top += 1  # Skip the empty rows above the stack
+    for index in range(top, GRID_HEIGHT):
+        row = rows[index]
+        new_cols = row & ~covered
+        if new_cols:
+            for col in MASK_COLS[new_cols]:
+                heights[col] = GRID_HEIGHT - index
+            covered |= new_cols
+        holes += POPCOUNT[covered & ~row]
+    return heights, holes
+
+
+def _score(heights, holes, lines_cleared, weights):
+    bumpiness = 0
+    previous = heights[0]
+    for height in heights[1:]:
+        bumpiness += abs(previous - height)
+        previous = height
+    return (weights['lines_cleared'] * lines_cleared
+            + weights['aggregate_height'] * sum(heights)
+            + weights['holes'] * holes
+            + weights['bumpiness'] * bumpiness)
+
+
+def greedy_score(rows, lines_cleared, weights=GREEDY_WEIGHTS):
+    """Lines, aggregate height, holes and bumpiness of a board"""
+    heights, holes = surface(rows)
+    return _score(heights, holes, lines_cleared, weights)
+
+
+def greedy_move(rows, shape_type, heights=None, holes=None):
+    """Best straight drop by greedy_score
+
+    Returns (rows, lines, heights, holes) after the drop, or None when the
+    piece can't spawn. A drop from above the stack lands on the column
+    heights, so those and the holes are updated instead of rescanned
+    unless lines clear; pass the board's own (heights, holes) to skip the
+    first scan too. A stack reaching the spawn rows uses the bitboard drops.
+    """
+    if collides(rows, shape_type, 0, SPAWN_X[shape_type], 0):
+        return None
+    if heights is None:
+        heights, holes = surface(rows)
+    if max(heights) > GRID_HEIGHT - PIECE_ROWS:
+        # Pieces can start under an overhang here, so fall the slow way
+        drops = [(rotation, x, y, None) for x, y, rotation in drop_placements(rows, shape_type)]
+    else:
+        drops = [(rotation, x, min(GRID_HEIGHT - 1 - heights[col] - bottom
+                                   for col, _, bottom in profile), profile)
+                 for rotation, x, profile in DROP_PROFILES[shape_type]]
+
+    best_score = float('-inf')
+    best = None
+    for rotation, x, y, profile in drops:
+        new_rows = place(rows, shape_type, rotation, x, y)
+        if profile is None or FULL_ROW in new_rows:
+            new_rows, lines_cleared = clear_full_rows(new_rows)
+            new_heights, new_holes = surface(new_rows)
+        else:
+            lines_cleared = 0
+            new_heights = list(heights)
+            new_holes = holes
+            for col, top, bottom in profile:
+                # Empty cells between the piece and the old top of the column
+                new_holes += GRID_HEIGHT - 1 - heights[col] - y - bottom
+                new_heights[col] = GRID_HEIGHT - y - top
+        score = _score(new_heights, new_holes, lines_cleared, GREEDY_WEIGHTS)
+        if score > best_score:
+            best_score = score
+            best = (new_rows, lines_cleared, new_heights, new_holes)
+    return best
+
+
+def rollout(rows, lines_cleared, sequence):
+    """Play a shape sequence greedily; returns (pieces placed, lines, value)"""
+    heights, holes = surface(rows)
+    pieces = 0
+    for shape_type in sequence:
+        result = greedy_move(rows, shape_type, heights, holes)
+        if result is None:
+            break  # Topped out
+        rows, lines, heights, holes = result
+        lines_cleared += lines
+        pieces += 1
+    return pieces, lines_cleared, _score(heights, holes, lines_cleared, GREEDY_WEIGHTS)
+
+
+def deal_sequences(rng, known, bag, count, depth):
+    """Draw `count` random continuations of `depth` shapes
+
+    known shapes come first in order, then the rest of the bag and fresh
+    7-bags, each shuffled.
+    """
+    sequences = []
+    for _ in range(count):
+        sequence = list(known[:depth])
+        remaining = list(bag)
+        while len(sequence) < depth:
+            if not remaining:
+                remaining = list(PIECE_TYPES)  # The next 7-bag starts
+            rng.shuffle(remaining)
+            sequence.extend(remaining[:depth - len(sequence)])
+            remaining = []
+        sequences.append(tuple(sequence))
+    return sequences
+
+
+def _rollout_chunk(boards, sequences):
+    """Worker task: play every sequence on every (rows, lines) board"""
+    return [[rollout(rows, lines, sequence) for sequence in sequences]
+            for rows, lines in boards]
+
+
+def summarize(results, depth):
+    """RolloutStats for one candidate's (pieces, lines, value) results"""
+    count = len(results)
+    return RolloutStats(
+        count,
+        sum(1 for pieces, _, _ in results if pieces == depth) / count,
+        sum(pieces for pieces, _, _ in results) / count,
+        sum(lines for _, lines, _ in results) / count,
+        sum(value for _, _, value in results) / count)
+
+
+class RolloutEvaluator(Planner):
+    """Pick moves by Monte Carlo rollouts instead of the heuristic alone
+
+    The `width` best placements by the AI's own evaluation (cached) are
+    each played out `rollouts` times, `depth` pieces deep, on `workers`
+    processes (0/1 = in-process). The move with the best survival rate
+    wins, then the best mean value. seed makes the dealt continuations
+    repeatable.
+    """
+
+    def __init__(self, evaluate, rollouts=AI_ROLLOUTS, depth=AI_ROLLOUT_DEPTH,
+                 width=AI_ROLLOUT_WIDTH, workers=AI_ROLLOUT_WORKERS, seed=None):
+        super().__init__(evaluate, depth)
+        self.rollouts = rollouts
+        self.width = width
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.results = []  # (placement, RolloutStats) of the last search, best first
+
+    def search(self, rows, piece, known, bag):
+        """Return the best Placement for `piece`
+
+        known are the visible shapes after it and bag the shapes that can
+        follow those, as for Expectimax. Returns None when the piece has
+        no placement.
+        """
+        self._start_stats()
+        children = self.expand(rows, piece.shape_type, piece.x, piece.y, piece.rotation)
+        if not children:
+            self.results = []
+            return self._finish_stats(None)
+        scores = self.score([(new_rows, lines) for _, new_rows, lines in children])
+        ranked = sorted(range(len(children)), key=lambda index: -scores[index])[:self.width]
+
+        boards = [(tuple(children[index][1]), children[index][2]) for index in ranked]
+        sequences = deal_sequences(self.rng, tuple(known), tuple(bag), self.rollouts, self.depth)
+        stats = self.rollout_stats(boards, sequences)
+        self.stats.nodes += round(sum(entry.rollouts * entry.mean_pieces for entry in stats))
+        self.stats.depth = self.depth
+
+        results = [(children[index][0], entry) for index, entry in zip(ranked, stats)]
+        # Ties keep the placement the heuristic preferred
+        results.sort(key=lambda result: (-result[1].survival, -result[1].mean_value))
+        self.results = results
+        return self._finish_stats(results[0][0])
+
+    def rollout_stats(self, boards, sequences):
+        """RolloutStats for each (rows, lines) board, all played on the same sequences"""
+        if self.workers > 1:
+            pool = get_pool(self.workers)
+            # Split the sequences so every worker gets a share of each board
+            chunk_size = -(-len(sequences) // self.workers)
+            futures = [pool.submit(_rollout_chunk, boards, sequences[start:start + chunk_size])
+                       for start in range(0, len(sequences), chunk_size)]
+            per_board = [[] for _ in boards]
+            for future in futures:
+                for results, chunk in zip(per_board, future.result()):
+                    results.extend(chunk)
+        else:
+            per_board = _rollout_chunk(boards, sequences)
+        return [summarize(results, self.depth) for results in per_board]
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Headless AIPlayer self-play dataset generator
+
+Games run in fast-forward on the real TetrisGame rules (headless.play_game)
+on a process pool, and every decision becomes one fixed-width record of
+RECORD_DTYPE: the bitboard rows before the move, the piece, the next
+shapes, the placement chosen, the evaluation features of the board it
+left and how the game went from there.
+
+Records are stored as structured .npy shards, each holding whole games in
+move order, so a shard opens with np.load(path, mmap_mode='r') and reads
+straight from disk; iter_chunks() streams a whole dataset that way. The
+dataset's index.json lists the shards and is rewritten as each one is
+finished, so an interrupted run keeps the shards it completed and a new
+run into the same directory adds to them.
+
+    python selfplay.py --games 1000 --workers 8 --out selfplay_data
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from bitboard import place, clear_full_rows
+from evaluation import FEATURES, board_features
+from tetromino import PIECE_TYPES
+import headless
+from headless import save_json
+from config import GRID_HEIGHT, AI_SEARCH_MODE, AI_SEARCH_DEPTH
+
+DATASET_VERSION = 1
+INDEX_FILE = 'index.json'
+SHARD_NAME = 'shard-{:05d}.npy'
+SHARD_PATTERN = re.compile(r'shard-(\d+)\.npy')
+
+# Shapes recorded after the current piece, next piece first
+QUEUE_LENGTH = 5
+
+# Records count moves and lines in uint16
+MAX_PIECES = 0xFFFF
+
+RECORD_DTYPE = np.dtype([
+    ('game', '<u4'),                        # Game number in the dataset
+    ('move', '<u2'),                        # Piece number within the game
+    ('board', '<u2', (GRID_HEIGHT,)),       # Bitboard rows before the move
+    ('piece', 'u1'),                        # PIECE_TYPES index of the piece placed
+    ('queue', 'u1', (QUEUE_LENGTH,)),       # PIECE_TYPES indices of the next shapes
+    ('x', 'i1'),                            # Placement chosen
+    ('y', 'i1'),
+    ('rotation', 'u1'),
+    ('lines', 'u1'),                        # Lines the move cleared
+    ('features', '<f4', (len(FEATURES),)),  # board_features of the board after the move
+    ('lines_to_go', '<u2'),                 # Lines cleared from this move to the end
+    ('pieces_to_go', '<u2'),                # Pieces placed after this one
+    ('topped_out', '?'),                    # The game ended at the top, not the piece limit
+])
+
+_SHAPE_CODES = {shape_type: code for code, shape_type in enumerate(PIECE_TYPES)}
+
+
+def play_game(seed, max_pieces, game=0, mode=AI_SEARCH_MODE, depth=AI_SEARCH_DEPTH,
+              weights_path=None):
+    """Play one self-play game and return its records (a RECORD_DTYPE array)"""
+    from ai_player import AIPlayer
+    ai = AIPlayer(None, seed=seed)
+    ai.search_mode = mode
+    ai.planner.depth = depth
+    ai.rollout.workers = 0  # The games already run on the pool
+    if weights_path:
+        ai.load_weights(weights_path)
+    tetris = ai.game
+    records = []
+
+    def record(piece, move):
+        rows = tuple(tetris.board.rows)
+        queue = [_SHAPE_CODES[shape_type]
+                 for shape_type in tetris.generator.peek_types(QUEUE_LENGTH)]
+        after, lines = clear_full_rows(place(rows, piece.shape_type, move.rotation,
+                                             move.x, move.y))
+        features, _ = board_features(after, lines)
+        records.append((game, len(records), rows, _SHAPE_CODES[piece.shape_type], queue,
+                        move.x, move.y, move.rotation, lines, features, 0, 0, False))
+
+    topped_out = headless.play_game(tetris, ai.find_best_move, max_pieces, record)
+    records = np.array(records, dtype=RECORD_DTYPE)
+    lines = records['lines'].astype(np.int64)
+    records['lines_to_go'] = np.cumsum(lines[::-1])[::-1]
+    records['pieces_to_go'] = np.arange(len(records) - 1, -1, -1)
+    records['topped_out'] = topped_out
+    return records
+
+
+def shard_number(name):
+    """Number of a shard file, from its SHARD_NAME; None for other files"""
+    match = SHARD_PATTERN.fullmatch(name)
+    return int(match.group(1)) if match else None
+
+
+def write_shard(path, games, seed, max_pieces, mode, depth, weights_path):
+    """Worker task: play games (numbers) into one .npy shard; returns its index entry
+
+    An existing shard is never overwritten (FileExistsError).
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    records = np.concatenate([play_game(seed + game, max_pieces, game, mode, depth, weights_path)
+                              for game in games])
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        np.save(f, records)
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    os.replace(temp_path, path)
+    return {
+        'file': os.path.basename(path),
+        'records': len(records),
+        'games': [games[0], games[-1] + 1],
+        'lines': int(records['lines'].sum()),
+    }
+
+
+def new_index():
+    return {
+        'version': DATASET_VERSION,
+        'dtype': RECORD_DTYPE.descr,
+        'pieces': list(PIECE_TYPES),
+        'features': [name for name, _ in FEATURES],
+        'records': 0,
+        'games': 0,
+        'shards': [],
+    }
+
+
+def load_index(directory):
+    """Read a dataset's index, checking it matches this RECORD_DTYPE"""
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        index = json.load(f)
+    if index.get('version') != DATASET_VERSION or np.dtype(
+            [tuple(field) for field in index['dtype']]) != RECORD_DTYPE:
+        raise ValueError(f"{directory} is not a compatible self-play dataset")
+    return index
+
+
+def generate(directory, games, games_per_shard=20, max_pieces=1000, mode=AI_SEARCH_MODE,
+             depth=AI_SEARCH_DEPTH, weights_path=None, seed=0, workers=None, log=print):
+    """Play `games` self-play games into `directory`, adding to any dataset there
+
+    Game n uses seed + n. Shards finish in any order, so after an
+    interrupted run the index can have gaps; new games and shards are
+    numbered after the highest ones already there (on disk too, for a
+    shard finished after the index was last written). Returns the
+    updated index.
+    """
+    if not 0 < max_pieces <= MAX_PIECES:
+        raise ValueError(f"max_pieces must be between 1 and {MAX_PIECES}")
+    os.makedirs(directory, exist_ok=True)
+    index_path = os.path.join(directory, INDEX_FILE)
+    index = load_index(directory) if os.path.exists(index_path) else new_index()
+
+    first_game = max((shard['games'][1] for shard in index['shards']), default=0)
+    numbers = [shard_number(name) for name in os.listdir(directory)]
+    first_shard = max((number for number in numbers if number is not None), default=-1) + 1
+    blocks = [list(range(start, min(start + games_per_shard, first_game + games)))
+              for start in range(first_game, first_game + games, games_per_shard)]
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(write_shard,
+                               os.path.join(directory, SHARD_NAME.format(first_shard + number)),
+                               block, seed, max_pieces, mode, depth, weights_path)
+                   for number, block in enumerate(blocks)]
+        for future in as_completed(futures):
+            shard = future.result()
+            index['shards'].append(shard)
+            index['shards'].sort(key=lambda entry: shard_number(entry['file']))
+            index['records'] += shard['records']
+            index['games'] += shard['games'][1] - shard['games'][0]
+            save_json(index, index_path)
+            log(f"{shard['file']}: games {shard['games'][0]}-{shard['games'][1] - 1}, "
+                f"{shard['records']} positions, {shard['lines']} lines")
+    return index
+
+
+def open_shards(directory):
+    """Memory-map every shard of a dataset (read-only RECORD_DTYPE arrays)"""
+    index = load_index(directory)
+    return [np.load(os.path.join(directory, shard['file']), mmap_mode='r')
+            for shard in index['shards']]
+
+
+def iter_chunks(directory, chunk_size=1 << 20):
+    """Yield a dataset's records in slices of up to chunk_size, shard by shard
+
+    Slices are views of the memory-mapped shards, so only the rows a
+    consumer touches are read. A game never spans two shards.
+    """
+    for shard in open_shards(directory):
+        for start in range(0, len(shard), chunk_size):
+            yield shard[start:start + chunk_size]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate an AIPlayer self-play dataset")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--games-per-shard', type=int, default=20)
+    parser.add_argument('--max-pieces', type=int, default=1000, help="piece limit per game")
+    parser.add_argument('--mode', default=AI_SEARCH_MODE, help="AIPlayer search mode")
+    parser.add_argument('--depth', type=int, default=AI_SEARCH_DEPTH, help="beam search depth")
+    parser.add_argument('--weights', default=None, help="weights file for AIPlayer.load_weights")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0, help="seed of game 0")
+    parser.add_argument('--out', default='selfplay_data')
+    args = parser.parse_args()
+
+    index = generate(args.out, args.games, args.games_per_shard, args.max_pieces, args.mode,
+                     args.depth, args.weights, args.seed, args.workers)
+    print(f"{args.out}: {index['records']} positions from {index['games']} games "
+          f"in {len(index['shards'])} shards")
+
+
+if __name__ == "__main__":
+    main()
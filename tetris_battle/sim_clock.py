@@ -0,0 +1,39 @@
+"""Simulation clocks - injectable time sources for TetrisGame and AIPlayer
+
+SystemClock follows pygame's wall clock and is the default for interactive
+play. FrameClock only moves when it is advanced, so a driver can run games
+headless and as fast as the CPU allows while keeping Game Boy frame timing.
+"""
+import pygame
+from config import FRAME_TIME
+
+
+class SystemClock:
+    """Wall clock backed by pygame.time.get_ticks()"""
+
+    def get_ticks(self):
+        """Milliseconds since pygame.init()"""
+        return pygame.time.get_ticks()
+
+    def advance(self, frames=1):
+        """Wall time moves on its own"""
+        pass
+
+
+class FrameClock:
+    """Deterministic clock counted in Game Boy frames (59.73 FPS)
+
+    Time only moves when advance() is called, so runs are reproducible and
+    not tied to real time.
+    """
+
+    def __init__(self, frame=0):
+        self.frame = frame
+
+    def get_ticks(self):
+        """Milliseconds of simulated time"""
+        return self.frame * FRAME_TIME
+
+    def advance(self, frames=1):
+        """Move the clock forward by whole frames"""
+        self.frame += frames
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Test script to verify the beam search and expectimax planners"""
+
+from ai_player import AIPlayer
+from ai_search import BeamSearch, Expectimax, SPAWN_X
+from movegen import generate_placements
+from config import AI_HEADLESS_NODE_RATE
+
+
+def test_depth_zero_is_greedy():
+    """With no lookahead the beam search must pick the best-scoring placement"""
+    ai = AIPlayer(None, seed=4)
+    piece = ai.game.current_piece
+    rows = ai.game.board.rows
+    planner = BeamSearch(ai.evaluate_rows_batch, depth=0, beam_width=4)
+
+    children = planner.expand(rows, piece.shape_type, piece.x, piece.y, piece.rotation)
+    scores = planner.score([(new_rows, lines) for _, new_rows, lines in children])
+    scored = [(score, placement) for (placement, _, _), score in zip(children, scores)]
+    best_score = max(score for score, _ in scored)
+    move = planner.search(rows, piece, [])
+    assert move in generate_placements(rows, piece.shape_type, piece.x, piece.y, piece.rotation)
+    assert dict((placement, score) for score, placement in scored)[move] == best_score
+    print("✓ SUCCESS: Depth 0 beam search is the greedy search")
+
+
+def test_beam_search_stats():
+    """Deeper searches must expand the queued pieces and report their speed"""
+    ai = AIPlayer(None, seed=4)
+    piece = ai.game.current_piece
+    queue = ai.game.generator.peek_types(2)
+    planner = BeamSearch(ai.evaluate_rows_batch, depth=2, beam_width=3)
+
+    assert planner.search(ai.game.board.rows, piece, queue) is not None
+    stats = planner.stats
+    assert stats.depth == 2
+    # Root candidates plus up to beam_width boards' worth of children per ply
+    assert stats.nodes > len(generate_placements(ai.game.board.rows, piece.shape_type,
+                                                 piece.x, piece.y, piece.rotation))
+    assert stats.nodes_per_sec > 0
+    print(f"✓ SUCCESS: {stats}")
+
+
+def test_headless_beam_ai():
+    """A depth 1 beam search AI should survive two simulated minutes"""
+    ai = AIPlayer(None, seed=2)
+    ai.planner.depth = 1
+    ai.step(60 * 120)
+    assert not ai.game.game_over
+    assert ai.game.lines_cleared > 0
+    print(f"✓ SUCCESS: Beam search AI cleared {ai.game.lines_cleared} lines")
+
+
+def test_anytime_search():
+    """The anytime search must always return a move and deepen with more time"""
+    ai = AIPlayer(None, seed=4)
+    piece = ai.game.current_piece
+    rows = ai.game.board.rows
+    queue = ai.game.generator.peek_types(3)
+    planner = BeamSearch(ai.evaluate_rows_batch, depth=0, beam_width=4)
+
+    # No time at all still gives the one-piece move
+    move = planner.search_until(rows, piece, queue, budget=0)
+    assert move == planner.search(rows, piece, [])
+    assert planner.history[-2].timed_out and planner.history[-2].depth == 0
+
+    # Plenty of time reaches the end of the queue and matches a fixed-depth search
+    move = planner.search_until(rows, piece, queue, budget=60)
+    assert planner.stats.depth == 3 and not planner.stats.timed_out
+    planner.depth = 3
+    assert move == planner.search(rows, piece, queue)
+    print(f"✓ SUCCESS: Anytime search reached depth {planner.history[-2].depth}")
+
+
+def test_think_budget_follows_gravity():
+    """Faster gravity must shrink the per-move search budget"""
+    ai = AIPlayer(None, anytime=True)
+    slow = ai.think_budget()
+    ai.game.level = 20
+    fast = ai.think_budget()
+    assert 0 < fast < slow
+    ai.step(60 * 5)
+    assert ai.planner.history and all(stats.elapsed < 1 for stats in ai.planner.history)
+    print(f"✓ SUCCESS: Think budget {slow * 1000:.0f}ms at level 0, {fast * 1000:.0f}ms at level 20")
+
+
+def test_expectimax_bag_odds():
+    """Chance nodes weight each shape left in the bag by its probability"""
+    ai = AIPlayer(None, seed=4)
+    piece = ai.game.current_piece
+    rows = ai.game.board.rows
+    next_piece = ai.game.next_piece
+
+    # Without pruning, one known piece gives the best board two placements deep
+    search = Expectimax(ai.evaluate_rows_batch, depth=1, width=100)
+    value, move = search._max_node(rows, piece.shape_type, piece.x, piece.y, piece.rotation,
+                                   (next_piece,), (), 1, None)
+    best_pair = float('-inf')
+    for placement, new_rows, _ in search.expand(rows, piece.shape_type, piece.x, piece.y,
+                                                piece.rotation):
+        children = search.expand(new_rows, next_piece, SPAWN_X[next_piece], 0, 0)
+        pair = max(search.score([(child_rows, lines) for _, child_rows, lines in children]))
+        if placement == move:
+            assert pair == value
+        best_pair = max(best_pair, pair)
+    assert value == best_pair
+    assert search.search(rows, piece, [next_piece], []) == move
+
+    # A bag of I, I, O: the unknown piece is I two times in three
+    def best(shape_type):
+        value, _ = search._max_node(rows, shape_type, SPAWN_X[shape_type], 0, 0, (), (), 0, None)
+        return value
+    search._values = {}
+    value = search._value(rows, (), ('I', 'O', 'I'), 0, None)
+    assert abs(value - (2 / 3 * best('I') + 1 / 3 * best('O'))) < 1e-9
+
+    # An empty bag means a fresh one: all seven shapes equally likely
+    search._values = {}
+    fresh = search._value(rows, (), (), 0, None)
+    shapes = ('I', 'O', 'T', 'S', 'Z', 'J', 'L')
+    assert abs(fresh - sum(best(shape_type) for shape_type in shapes) / 7) < 1e-9
+    print("✓ SUCCESS: Expectimax weights the bag by its true odds")
+
+
+def test_expectimax_ai():
+    """The bag the AI branches over matches the randomizer, and it plays within budget"""
+    ai = AIPlayer(None, seed=6, anytime=True)
+    ai.search_mode = 'expectimax'
+    generator = ai.game.generator
+    *_, bag = ai.search_request()
+    # Whatever follows next_piece comes from the rest of its bag
+    upcoming = generator.peek_types(1 + len(bag))[1:]
+    assert sorted(upcoming) == sorted(bag)
+
+    ai.step(60 * 60)  # The AI soft-drops at the player speed, 1/3 gravity
+    assert not ai.game.game_over and ai.game.pieces_dropped > 10
+    history = ai.expectimax.history
+    assert history and max(stats.depth for stats in history) >= 1
+    assert all(stats.elapsed < ai.think_budget() + 0.1 for stats in history)
+    print(f"✓ SUCCESS: Expectimax AI placed {ai.game.pieces_dropped} pieces, last search {history[-1]}")
+
+
+def test_headless_anytime_is_reproducible():
+    """Frame-stepped anytime games spend their budget in nodes, so a seed replays exactly"""
+    def play(search_mode):
+        ai = AIPlayer(None, seed=8, anytime=True)
+        ai.search_mode = search_mode
+        ai.step(60 * 20)
+        planner = ai.expectimax if search_mode == 'expectimax' else ai.planner
+        assert planner.node_rate == AI_HEADLESS_NODE_RATE
+        return ai.game.pieces_dropped, [(stats.depth, stats.nodes) for stats in planner.history]
+
+    for search_mode in ('beam', 'expectimax'):
+        first = play(search_mode)
+        assert first[1] and first == play(search_mode)
+    print(f"✓ SUCCESS: Same seed, same searches ({len(first[1])} moves)")
+
+
+if __name__ == "__main__":
+    test_depth_zero_is_greedy()
+    test_beam_search_stats()
+    test_headless_beam_ai()
+    test_anytime_search()
+    test_think_budget_follows_gravity()
+    test_expectimax_bag_odds()
+    test_expectimax_ai()
+    test_headless_anytime_is_reproducible()
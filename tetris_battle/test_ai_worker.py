@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Test script to verify background AI thinking"""
+
+import threading
+from ai_player import AIPlayer
+from ai_worker import ThinkWorker
+
+
+def test_results_keyed_by_spawn_id():
+    """A result must only be handed out for the request it was searched for"""
+    release = threading.Event()
+
+    def search(value):
+        release.wait()
+        return value * 10
+
+    worker = ThinkWorker(search)
+    try:
+        first = worker.submit(1, 1)
+        second = worker.submit(2, 2)  # May replace the first request before it starts
+        release.set()
+        assert worker.wait(second, timeout=5) == (True, 20)
+        assert worker.poll(first) == (False, None)
+
+        # Re-planning the same piece must not hand back the older result
+        again = worker.submit(2, 3)
+        assert again != second
+        assert worker.wait(again, timeout=5) == (True, 30)
+        assert worker.poll(second) == (False, None)
+    finally:
+        worker.stop()
+    print("✓ SUCCESS: Worker results are keyed by spawn ID")
+
+
+def test_background_matches_foreground():
+    """The background search must pick the same move as find_best_move"""
+    background = AIPlayer(None, seed=6, background=True, anytime=False)
+    try:
+        for _ in range(120 * 60):
+            if background.game.game_over:
+                break
+            background.step(1)
+            if background.thinking:
+                # Let the worker finish so the game is reproducible
+                background.worker.wait(background.think_ticket, timeout=5)
+        assert background.game.pieces_dropped > 20
+
+        # A fresh player on the same board and piece finds the same move
+        foreground = AIPlayer(None)
+        foreground.game.set_cells(background.game.get_cells())
+        foreground.game.current_piece = background.game.current_piece.copy()
+        foreground.game.generator = background.game.generator
+        ticket = background.worker.submit(background.game.spawn_id, *background.search_request())
+        assert background.worker.wait(ticket, timeout=5) == (True, foreground.find_best_move())
+
+        # A new round gets a fresh thread; closing stops it for good
+        old_worker = background.worker
+        background.reset()
+        assert background.worker is not old_worker and not old_worker._thread.is_alive()
+    finally:
+        background.close()
+    assert background.worker is None
+    print(f"✓ SUCCESS: Background AI dropped {background.game.pieces_dropped} pieces")
+
+
+if __name__ == "__main__":
+    test_results_keyed_by_spawn_id()
+    test_background_matches_foreground()
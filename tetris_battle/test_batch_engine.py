@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Test script to verify the batched NumPy engine plays by TetrisGame's rules"""
+
+import numpy as np
+from config import GRID_WIDTH
+from game import TetrisGame
+from batch_engine import BatchTetris
+from tetromino import PIECE_TYPES
+
+
+def choose_placement(game):
+    """Pick the legal spawn placement that clears most lines, then stays lowest"""
+    piece = game.current_piece
+    best = None
+    for rotation in range(len(piece.SHAPES[piece.shape_type])):
+        for x in range(-3, GRID_WIDTH):
+            test_piece = piece.copy()
+            test_piece.rotation = rotation
+            test_piece.x = x
+            test_piece.y = 0
+            if game.check_collision(test_piece):
+                continue
+            grid, lines = game.simulate_placement(test_piece, x, 0, rotation)
+            key = (-lines, sum(1 for row in grid if any(row)), x, rotation)
+            if best is None or key < best[0]:
+                best = (key, x, rotation)
+    return best[1], best[2]
+
+
+def test_batch_matches_tetris_game():
+    """Boards, score, lines and levels must match TetrisGame move for move"""
+    print("Testing batched engine against TetrisGame...")
+
+    games = [TetrisGame(start_level=0, seed=100 + index) for index in range(6)]
+    engine = BatchTetris(len(games), seeds=100)
+
+    for _ in range(150):
+        xs, rotations = [], []
+        for index, game in enumerate(games):
+            if game.game_over:
+                xs.append(0)
+                rotations.append(0)
+                continue
+            assert PIECE_TYPES[engine.current_pieces[index]] == game.current_piece.shape_type
+            x, rotation = choose_placement(game)
+            xs.append(x)
+            rotations.append(rotation)
+
+            piece = game.current_piece
+            piece.x = x
+            piece.rotation = rotation
+            while not game.check_collision(piece, 0, 1):
+                piece.y += 1
+            game.lock_piece()
+            if game.clear_animation_active:
+                game.finish_line_clear()
+
+        engine.step(np.array(xs), np.array(rotations))
+
+        for index, game in enumerate(games):
+            assert bool(engine.game_over[index]) == game.game_over
+            if not game.game_over:
+                assert engine.rows[index].tolist() == list(game.board.rows)
+                assert engine.score[index] == game.score
+                assert engine.lines_cleared[index] == game.lines_cleared
+                assert engine.level[index] == game.level
+
+    print(f"✓ SUCCESS: Lines cleared {engine.lines_cleared.tolist()} match TetrisGame")
+
+
+if __name__ == "__main__":
+    test_batch_matches_tetris_game()
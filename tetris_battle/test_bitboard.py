@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Test script to verify the bitboard backend matches the list-based grid rules"""
+
+import random
+from config import GRID_WIDTH, GRID_HEIGHT, BLACK
+from bitboard import (Board, FULL_ROW, EMPTY_CELL, GARBAGE_CELL, PALETTE_INDEX, rows_to_grid,
+                      grid_to_rows, column_heights, drop_placements)
+from game import TetrisGame
+from tetromino import Tetromino, PIECE_TYPES
+
+
+def reference_collision(grid, piece):
+    """Cell-by-cell collision check (the original list-of-lists implementation)"""
+    for block_x, block_y in piece.get_blocks():
+        if block_x < 0 or block_x >= GRID_WIDTH or block_y >= GRID_HEIGHT:
+            return True
+        if block_y >= 0 and grid[block_y][block_x] != 0:
+            return True
+    return False
+
+
+def reference_placement(grid, piece):
+    """Drop, place and clear on a plain list-of-lists grid"""
+    test_grid = [row[:] for row in grid]
+    test_piece = piece.copy()
+    while True:
+        test_piece.y += 1
+        if reference_collision(test_grid, test_piece):
+            test_piece.y -= 1
+            break
+    for block_x, block_y in test_piece.get_blocks():
+        if 0 <= block_x < GRID_WIDTH and 0 <= block_y < GRID_HEIGHT:
+            test_grid[block_y][block_x] = 1
+    kept = [row for row in test_grid if not all(row)]
+    lines_cleared = GRID_HEIGHT - len(kept)
+    return [[0] * GRID_WIDTH for _ in range(lines_cleared)] + kept, lines_cleared
+
+
+def random_grid(rng):
+    """Build a random bottom-heavy grid with some nearly full rows"""
+    grid = [[1 if rng.random() < 0.5 * row / GRID_HEIGHT else 0 for _ in range(GRID_WIDTH)]
+            for row in range(GRID_HEIGHT)]
+    for row in range(GRID_HEIGHT - 4, GRID_HEIGHT):
+        if rng.random() < 0.5:
+            grid[row] = [1] * GRID_WIDTH
+            grid[row][rng.randrange(GRID_WIDTH)] = rng.choice([0, 1])
+    return grid
+
+
+def rotated_piece(shape_type, x, rotation):
+    """Piece at the top row with the given rotation"""
+    piece = Tetromino(shape_type, x, 0)
+    piece.rotation = rotation
+    return piece
+
+
+def test_bitboard_matches_grid():
+    """Collision and simulated placement must match the list-based rules"""
+    print("Testing bitboard collision and placement...")
+
+    rng = random.Random(1989)
+    game = TetrisGame(start_level=0)
+    checks = 0
+
+    for _ in range(50):
+        grid = random_grid(rng)
+        game.grid = grid
+        assert game.get_grid_state() == grid
+
+        for shape_type, rotations in Tetromino.SHAPES.items():
+            for rotation in range(len(rotations)):
+                for x in range(-3, GRID_WIDTH):
+                    piece = Tetromino(shape_type, x, 0)
+                    piece.rotation = rotation
+                    collision = game.check_collision(piece)
+                    assert collision == reference_collision(grid, piece)
+                    if not collision:
+                        result = game.simulate_placement(piece, x, 0, rotation)
+                        assert result == reference_placement(grid, piece)
+                    checks += 1
+
+    print(f"✓ SUCCESS: {checks} placements match the list-based grid")
+
+
+def test_grid_view_writes():
+    """Writing through game.grid[row][col] must update the bitboard"""
+    game = TetrisGame(start_level=0)
+    for col in range(GRID_WIDTH):
+        game.grid[GRID_HEIGHT - 1][col] = 1
+    assert game.board.full_rows() == [GRID_HEIGHT - 1]
+
+    game.grid[GRID_HEIGHT - 1][0] = 0
+    assert game.board.full_rows() == []
+    assert game.grid[GRID_HEIGHT - 1][0] == 0
+    assert game.grid[GRID_HEIGHT - 1][1] == 1
+    print("✓ SUCCESS: Grid view writes reach the bitboard")
+
+
+def test_incremental_stats():
+    """Heights, row counts and holes must match a full rescan after every change"""
+    print("Testing incrementally maintained board stats...")
+
+    rng = random.Random(7)
+    game = TetrisGame(start_level=0, seed=7)
+    for _ in range(400):
+        if game.game_over:
+            game.reset()
+        piece = game.current_piece
+        piece.rotation = rng.randrange(len(Tetromino.SHAPES[piece.shape_type]))
+        piece.x = rng.randrange(-2, GRID_WIDTH)
+        if game.check_collision(piece):
+            piece.x, piece.rotation = 3, 0
+        while not game.check_collision(piece, 0, 1):
+            piece.y += 1
+        game.lock_piece()
+        if game.clear_animation_active:
+            game.finish_line_clear()
+        if rng.random() < 0.1:
+            game.receive_garbage_lines(rng.randint(1, 4))
+
+        grid = game.get_grid_state()
+        heights = []
+        for col in range(GRID_WIDTH):
+            filled = [row for row in range(GRID_HEIGHT) if grid[row][col]]
+            heights.append(GRID_HEIGHT - filled[0] if filled else 0)
+        holes = sum(heights) - sum(sum(row) for row in grid)
+
+        assert game.get_column_heights() == heights
+        assert game.get_row_fill_counts() == [sum(row) for row in grid]
+        assert game.get_hole_count() == holes
+
+    print("✓ SUCCESS: Board stats stay in sync with the grid")
+
+
+def test_ring_buffer_rows():
+    """Line clears and garbage on the ring buffer must match plain list shifts"""
+    print("Testing ring buffer row storage...")
+
+    rng = random.Random(2024)
+    board = Board()
+    cells = [[EMPTY_CELL] * GRID_WIDTH for _ in range(GRID_HEIGHT)]
+
+    for _ in range(2000):
+        action = rng.random()
+        if action < 0.5:
+            shape_type = rng.choice(PIECE_TYPES)
+            piece = Tetromino(shape_type, rng.randrange(-1, GRID_WIDTH - 2), rng.randrange(GRID_HEIGHT))
+            piece.rotation = rng.randrange(len(Tetromino.SHAPES[shape_type]))
+            if board.collides(shape_type, piece.rotation, piece.x, piece.y):
+                continue
+            board.place(shape_type, piece.rotation, piece.x, piece.y)
+            for col, row in piece.get_blocks():
+                cells[row][col] = PALETTE_INDEX[shape_type]
+        elif action < 0.8:
+            count = rng.randint(1, 4)
+            garbage = [FULL_ROW & ~(1 << rng.randrange(GRID_WIDTH)) for _ in range(count)]
+            board.push_garbage(garbage)
+            del cells[:count]
+            for mask in garbage:
+                cells.append([GARBAGE_CELL if (mask >> col) & 1 else EMPTY_CELL
+                              for col in range(GRID_WIDTH)])
+        else:
+            removed = rng.sample(range(GRID_HEIGHT), rng.randint(1, 4))
+            board.remove_rows(removed)
+            for row in sorted(removed, reverse=True):
+                del cells[row]
+            for _ in removed:
+                cells.insert(0, [EMPTY_CELL] * GRID_WIDTH)
+
+        grid = [[1 if cell else 0 for cell in row] for row in cells]
+        assert rows_to_grid(board.rows) == grid
+        assert board.get_cells() == bytes(cell for row in cells for cell in row)
+        assert board.row_counts == [sum(row) for row in grid]
+        assert board.filled_cells == sum(sum(row) for row in grid)
+        assert board.heights == column_heights(board.rows)  # Shifted, not rescanned
+
+    restored = Board()
+    restored.set_cells(board.get_cells())
+    assert list(restored.rows) == list(board.rows)
+    assert restored.heights == board.heights
+    assert list(restored.grid_colors) == list(board.grid_colors)
+
+    # Colors written through grid_colors stick to filled cells and move with them
+    board = Board()
+    board.set_row(GRID_HEIGHT - 1, FULL_ROW & ~1)
+    board.set_row(GRID_HEIGHT - 2, 1)
+    board.grid_colors[GRID_HEIGHT - 1][3] = (255, 255, 255)
+    assert board.grid_colors[-1][3] == (255, 255, 255)
+    board.grid_colors[GRID_HEIGHT - 1][0] = BLACK  # Empty cells stay empty
+    try:
+        board.grid_colors[GRID_HEIGHT - 1][0] = (255, 255, 255)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("coloring an empty cell must fail")
+    board.push_garbage([FULL_ROW & ~2])
+    assert board.grid_colors[-2][3] == (255, 255, 255)
+
+    print("✓ SUCCESS: Ring buffer matches list-based row shifting")
+
+
+def test_drop_placements():
+    """Straight drops cover every column and land like the list-based rules"""
+    print("Testing straight-drop placements...")
+
+    from ai_player import AIPlayer
+    rng = random.Random(19)
+    ai = AIPlayer(None)
+    for _ in range(30):
+        grid = random_grid(rng)
+        rows = grid_to_rows(grid)
+        for shape_type, rotations in Tetromino.SHAPES.items():
+            expected = []
+            for rotation in range(len(rotations)):
+                for x in range(-3, GRID_WIDTH):
+                    piece = Tetromino(shape_type, x, 0)
+                    piece.rotation = rotation
+                    if not reference_collision(grid, piece):
+                        expected.append((x, rotation))
+            placements = drop_placements(rows, shape_type)
+            assert sorted((x, rotation) for x, _, rotation in placements) == sorted(expected)
+
+            # Lookahead takes the best of those drops, for a shape name or a piece
+            best = max(ai.evaluate_grid(*reference_placement(grid, rotated_piece(shape_type, x, rotation)))
+                       for x, rotation in expected) if expected else 0
+            assert abs(ai.evaluate_lookahead(grid, shape_type) - best) < 1e-6
+            assert ai.lookahead_rows(rows, Tetromino(shape_type)) == ai.lookahead_rows(rows, shape_type)
+
+    print("✓ SUCCESS: Straight drops and lookahead match the list-based rules")
+
+
+if __name__ == "__main__":
+    test_bitboard_matches_grid()
+    test_grid_view_writes()
+    test_incremental_stats()
+    test_ring_buffer_rows()
+    test_drop_placements()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Test script to verify the batched and fused evaluators match evaluate_grid"""
+
+import random
+import numpy as np
+from config import GRID_WIDTH, GRID_HEIGHT
+from ai_player import AIPlayer
+from bitboard import grid_to_rows
+from evaluation import evaluate_batch, evaluate_board, rows_to_cells, scan_board
+
+
+def random_board(rng):
+    """Random stack of varying height with holes and overhangs"""
+    top = rng.randrange(GRID_HEIGHT + 1)
+    density = rng.choice([0.3, 0.6, 0.9])
+    return [[1 if row >= top and rng.random() < density else 0 for _ in range(GRID_WIDTH)]
+            for row in range(GRID_HEIGHT)]
+
+
+def test_batch_matches_scalar():
+    """Every batched score must match evaluate_grid on the same board"""
+    print("Testing batched evaluation against evaluate_grid...")
+
+    rng = random.Random(14)
+    ai = AIPlayer(None)
+    grids = [random_board(rng) for _ in range(500)]
+    # Flat and empty boards hit the well and bonus thresholds
+    grids.append([[0] * GRID_WIDTH for _ in range(GRID_HEIGHT)])
+    grids.append([[0] * GRID_WIDTH] * 16 + [[1] * (GRID_WIDTH - 1) + [0]] * 4)
+    # More than 4 lines happens when a board still holds full rows
+    lines = [rng.randint(0, 6) for _ in grids]
+
+    expected = np.array([ai.evaluate_grid(grid, count) for grid, count in zip(grids, lines)])
+    cells = np.array(grids, dtype=bool)
+    assert np.allclose(evaluate_batch(cells, lines, ai.weights), expected, rtol=1e-9, atol=1e-9)
+
+    # Bitboard rows unpack to the same cells
+    rows = [grid_to_rows(grid) for grid in grids]
+    assert (rows_to_cells(rows) == cells).all()
+    assert np.allclose(ai.evaluate_rows_batch(rows, lines), expected, rtol=1e-9, atol=1e-9)
+    print(f"✓ SUCCESS: {len(grids)} batched scores match evaluate_grid")
+
+
+def test_fused_scan_matches_helpers():
+    """The single-pass scan must agree with every AIPlayer helper it replaces"""
+    print("Testing the fused board scan against the AIPlayer helpers...")
+
+    rng = random.Random(18)
+    ai = AIPlayer(None)
+    grids = [random_board(rng) for _ in range(300)]
+    grids.append([[0] * GRID_WIDTH for _ in range(GRID_HEIGHT)])
+    grids.append([[0] * GRID_WIDTH] * 16 + [[1] * (GRID_WIDTH - 1) + [0]] * 4)
+
+    for grid in grids:
+        rows = grid_to_rows(grid)
+        scan = scan_board(rows)
+        heights = ai.get_column_heights(grid)
+        assert scan.heights == heights
+        assert (scan.holes, scan.weighted_holes) == ai.count_advanced_holes(grid)
+        assert -scan.overhangs == ai.calculate_stack_stability(grid)
+        assert scan.column_transitions == ai.count_column_transitions(grid)
+        assert scan.row_transitions == ai.count_row_transitions(grid)
+        assert scan.well_depth() == ai.calculate_well_depth(grid, heights)
+        assert scan.pit_depth() == ai.calculate_pit_depth(grid, heights)
+        assert scan.tetris_setup() == ai.evaluate_tetris_setup(grid, heights)
+        for lines in range(7):
+            assert np.isclose(evaluate_board(rows, lines, ai.weights),
+                              ai.evaluate_grid(grid, lines), rtol=1e-9, atol=1e-9)
+    print(f"✓ SUCCESS: Fused scan matches the helpers on {len(grids)} boards")
+
+
+if __name__ == "__main__":
+    test_batch_matches_scalar()
+    test_fused_scan_matches_helpers()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Test script for the AI's finesse input planner"""
+
+from ai_player import AIPlayer
+from bitboard import DROP_COLUMNS
+from finesse import (FINESSE_TABLE, SOFT_DROP, shift_frames, held_frames, build_schedule,
+                     drop_interval, plan_inputs)
+from game import TetrisGame
+from movegen import generate_placements
+from tetromino import PIECE_TYPES, Tetromino
+from config import (DAS_DELAY_FRAMES, DAS_SPEED_FRAMES, AI_TAP_FRAMES, GRAVITY_TABLE,
+                    SOFT_DROP_MULTIPLIER)
+
+
+def test_schedules():
+    """Schedules use the faster of tapping and DAS, and cover every column"""
+    print("Testing finesse schedules...")
+
+    for distance in range(1, 10):
+        frames = shift_frames(distance)
+        assert len(frames) == distance
+        held = DAS_DELAY_FRAMES + (distance - 1) * DAS_SPEED_FRAMES if distance > 1 else 0
+        assert frames[-1] == min(held, (distance - 1) * AI_TAP_FRAMES)
+
+    # Rotations and shifts are pressed on the same frames
+    schedule = build_schedule(2, -3)
+    assert schedule[0] == ('rotate', 'move_left')
+    assert sum(actions.count('rotate') for actions in schedule) == 2
+    assert sum(actions.count('move_left') for actions in schedule) == 3
+
+    for shape_type in PIECE_TYPES:
+        for rotation, columns in enumerate(DROP_COLUMNS[shape_type]):
+            for x, _ in columns:
+                assert (shape_type, rotation, x) in FINESSE_TABLE
+
+    # Spawn placements come from the table, and end with a soft drop
+    rows = [0] * 20
+    for placement in generate_placements(rows, 'T', 3, 0, 0):
+        schedule = plan_inputs(placement, 'T', 3, 0, level=0)
+        assert schedule[-1] == SOFT_DROP
+        assert tuple(schedule)[:-1] == FINESSE_TABLE['T', placement.rotation, placement.x]
+    print("✓ SUCCESS: Finesse schedules are minimal and cover every placement")
+
+
+def test_held_shift_matches_game():
+    """The held schedule must move on the same frames as TetrisGame.step's DAS"""
+    print("Testing the DAS model against the game...")
+
+    game = TetrisGame(0, seed=1)
+    game.current_piece = Tetromino('O', x=0, y=5)
+    moved = []
+    for frame in range(120):
+        x = game.current_piece.x
+        game.step(1, inputs=('right',))
+        if game.current_piece.x != x:
+            moved.append(frame)
+    assert len(moved) >= 5 and moved == held_frames(len(moved))  # Moves until the wall
+    assert drop_interval(0) == GRAVITY_TABLE[0] // SOFT_DROP_MULTIPLIER
+    print(f"✓ SUCCESS: Held shifts move on frames {moved}")
+
+
+def test_ai_lands_planned_moves_at_speed():
+    """The AI reaches its planned placements even at the fastest gravity"""
+    print("Testing AI placement at high levels...")
+
+    for level in (0, 19):
+        ai = AIPlayer(None, start_level=level, seed=3)
+        ai.planner.depth = 0
+        landed = []
+        plan_actions, lock_piece = ai.plan_actions, ai.game.lock_piece
+
+        def plan():
+            if ai.planned_move and ai.think_spawn_id == ai.game.spawn_id:
+                planned = ai.planned_move
+                landed.append([ai.game.spawn_id, (planned.x, planned.y, planned.rotation), None])
+            plan_actions()
+
+        def lock():
+            piece = ai.game.current_piece
+            if landed and landed[-1][0] == ai.game.spawn_id:
+                landed[-1][2] = (piece.x, piece.y, piece.rotation)
+            lock_piece()
+
+        ai.plan_actions, ai.game.lock_piece = plan, lock
+        frames = 0
+        while not ai.game.game_over and ai.game.pieces_dropped < 40:
+            ai.step(1)
+            frames += 1
+        assert not ai.game.game_over
+        on_target = sum(1 for _, planned, actual in landed if planned == actual)
+        assert on_target >= 38, f"only {on_target}/40 pieces landed as planned at level {level}"
+        print(f"  level {level}: {frames / ai.game.pieces_dropped:.1f} frames per piece")
+    print("✓ SUCCESS: AI lands its planned moves at every speed")
+
+
+if __name__ == "__main__":
+    test_schedules()
+    test_held_shift_matches_game()
+    test_ai_lands_planned_moves_at_speed()
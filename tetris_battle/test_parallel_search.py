@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Test script to verify parallel move search matches the serial search"""
+
+import random
+from ai_player import AIPlayer
+from movegen import generate_placements
+from parallel_search import shutdown_pool
+
+
+def test_parallel_matches_serial():
+    """Scoring candidates on the process pool must pick the same moves"""
+    print("Testing parallel candidate evaluation...")
+
+    rng = random.Random(3)
+    serial = AIPlayer(None, seed=21)
+    parallel = AIPlayer(None, seed=21)
+    parallel.parallel_workers = 2
+
+    try:
+        for _ in range(15):
+            game = serial.game
+            if game.game_over:
+                break
+            serial_move = serial.find_best_move()
+            parallel_move = parallel.find_best_move()
+            assert serial_move == parallel_move
+
+            # Play the chosen move on both boards, with some garbage mixed in
+            for ai in (serial, parallel):
+                piece = ai.game.current_piece
+                piece.x, piece.y, piece.rotation = serial_move.x, serial_move.y, serial_move.rotation
+                ai.game.lock_piece()
+                if ai.game.clear_animation_active:
+                    ai.game.finish_line_clear()
+            if rng.random() < 0.3:
+                serial.game.receive_garbage_lines(1)
+                parallel.game.receive_garbage_lines(1)
+    finally:
+        shutdown_pool()
+
+    print("✓ SUCCESS: Parallel search picks the same moves as the serial search")
+
+
+def test_parallel_planners_match_serial():
+    """Beam search and expectimax on the pool must pick the serial moves"""
+    print("Testing parallel beam search and expectimax...")
+
+    ai = AIPlayer(None, seed=8)
+    ai.game.receive_garbage_lines(3)
+    rows, piece, next_piece, queue, _, bag = ai.search_request()
+    try:
+        for workers in (0, 2):
+            ai.parallel_workers = workers
+            ai.search_mode = 'beam'
+            ai.planner.depth = 2
+            beam_move = ai.search_move(rows, piece, next_piece, queue)
+            beam_nodes = ai.planner.stats.nodes
+            ai.search_mode = 'expectimax'
+            expectimax_move = ai.search_move(rows, piece, next_piece, queue, bag=bag)
+            if workers:
+                assert (beam_move, expectimax_move) == serial_moves
+                assert beam_nodes == serial_nodes
+            else:
+                serial_moves = beam_move, expectimax_move
+                serial_nodes = beam_nodes
+        assert ai.expectimax.stats.nodes > len(generate_placements(
+            rows, piece.shape_type, piece.x, piece.y, piece.rotation))
+    finally:
+        shutdown_pool()
+
+    print(f"✓ SUCCESS: Pool searches match ({ai.planner.stats})")
+
+
+if __name__ == "__main__":
+    test_parallel_matches_serial()
+    test_parallel_planners_match_serial()
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Test script to verify that all 7 tetrominoes appear in the randomizer"""
 
-from tetromino import GameBoyRandomizer
+from tetromino import GameBoyRandomizer, PIECE_TYPES
 
 def test_randomizer():
     """Test that all 7 pieces appear in the randomizer"""
@@ -31,5 +31,31 @@ def test_randomizer():
         missing = expected_shapes - pieces_seen
         print(f"✗ FAILED: Missing pieces: {missing}")
 
+def test_seeded_randomizer():
+    """Test that seeded randomizers deal identical, bag-balanced sequences"""
+    print("Testing seeded randomizer...")
+    
+    first = GameBoyRandomizer(seed=1989)
+    second = GameBoyRandomizer(seed=1989)
+    
+    # Bulk generation and dealing piece by piece must agree
+    sequence = GameBoyRandomizer.sequence_for_seed(1989, 71)
+    dealt = [first.get_next().shape_type for _ in range(71)]
+    assert [PIECE_TYPES[code] for code in sequence] == dealt
+    
+    # Every bag after the first free pick holds all seven shapes
+    for start in range(1, 71, 7):
+        assert sorted(PIECE_TYPES[code] for code in sequence[start:start + 7]) == sorted(PIECE_TYPES)
+    
+    # The first bag is dealt in the original generator's fixed order
+    assert dealt[1:8] == ['L', 'J', 'Z', 'S', 'T', 'O', 'I']
+    
+    # peek() shows the real upcoming queue
+    upcoming = [piece.shape_type for piece in second.peek(5)]
+    assert upcoming == [second.get_next().shape_type for _ in range(5)]
+    
+    print("✓ SUCCESS: Seeded randomizers are reproducible!")
+
 if __name__ == "__main__":
     test_randomizer()
+    test_seeded_randomizer()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Test script to verify the Monte Carlo rollout evaluator"""
+
+import random
+from collections import Counter
+from ai_player import AIPlayer
+from bitboard import drop_placements, place, clear_full_rows
+from movegen import generate_placements
+from parallel_search import get_pool, shutdown_pool
+from rollout import RolloutEvaluator, deal_sequences, greedy_move, greedy_score, surface
+from tetromino import PIECE_TYPES
+from config import GRID_WIDTH, GRID_HEIGHT
+
+
+def test_greedy_move_matches_bitboard():
+    """The rollout policy's height-based drops must match the bitboard drops"""
+    print("Testing the rollout policy against every straight drop...")
+
+    rng = random.Random(23)
+    checked = 0
+    for _ in range(1500):
+        top = rng.randrange(GRID_HEIGHT + 1)
+        density = rng.choice([0.3, 0.7, 0.95])
+        rows = [0 if row < top else
+                sum(1 << col for col in range(GRID_WIDTH) if rng.random() < density)
+                for row in range(GRID_HEIGHT)]
+        shape_type = rng.choice(PIECE_TYPES)
+        result = greedy_move(rows, shape_type)
+        if result is None:
+            continue
+        new_rows, lines, heights, holes = result
+        # The updated heights and holes are what a rescan finds
+        assert (heights, holes) == surface(new_rows)
+        boards = [clear_full_rows(place(rows, shape_type, rotation, x, y))
+                  for x, y, rotation in drop_placements(rows, shape_type)]
+        assert (new_rows, lines) in boards
+        best = max(greedy_score(board_rows, count) for board_rows, count in boards)
+        assert abs(greedy_score(new_rows, lines) - best) < 1e-9
+        checked += 1
+    print(f"✓ SUCCESS: Greedy drops match the bitboard on {checked} boards")
+
+
+def test_deal_sequences():
+    """Continuations must keep the known pieces and follow the 7-bag"""
+    sequences = deal_sequences(random.Random(1), ('T',), ('I', 'O', 'S'), 50, 12)
+    for sequence in sequences:
+        assert len(sequence) == 12 and sequence[0] == 'T'
+        # The rest of the current bag, then a whole fresh bag
+        assert sorted(sequence[1:4]) == ['I', 'O', 'S']
+        assert sorted(sequence[4:11]) == sorted(PIECE_TYPES)
+    assert len(set(sequences)) > 1
+    assert sequences == deal_sequences(random.Random(1), ('T',), ('I', 'O', 'S'), 50, 12)
+    print("✓ SUCCESS: Rollout continuations follow the 7-bag")
+
+
+def test_rollout_search():
+    """Rollouts on the pool must give the same statistics and move as in-process"""
+    print("Testing rollout search serial and parallel...")
+
+    ai = AIPlayer(None, seed=9)
+    rows, piece, next_piece, _, _, bag = ai.search_request()
+    known = (next_piece,)
+    assert Counter(bag) <= Counter(PIECE_TYPES)  # The rest of one 7-bag
+
+    serial = RolloutEvaluator(ai.evaluate_rows_batch, rollouts=12, depth=6, width=4,
+                              workers=0, seed=5)
+    parallel = RolloutEvaluator(ai.evaluate_rows_batch, rollouts=12, depth=6, width=4,
+                                workers=2, seed=5)
+    try:
+        move = serial.search(rows, piece, known, bag)
+        assert parallel.search(rows, piece, known, bag) == move
+        # A pool of another size (AIPlayer.parallel_workers) leaves this one running
+        pool = get_pool(2)
+        get_pool(3)
+        assert get_pool(2) is pool
+    finally:
+        shutdown_pool()
+    assert serial.results == parallel.results
+
+    assert move in generate_placements(rows, piece.shape_type, piece.x, piece.y, piece.rotation)
+    assert move == serial.results[0][0] and len(serial.results) == 4
+    for _, stats in serial.results:
+        assert stats.rollouts == 12
+        assert 0.0 <= stats.survival <= 1.0 and stats.mean_pieces <= 6
+    # An empty board survives every short rollout
+    assert serial.results[0][1].survival == 1.0
+    print(f"✓ SUCCESS: {serial.results[0][1]} ({serial.stats})")
+
+
+def test_rollout_ai():
+    """An AIPlayer in rollout mode should keep playing"""
+    ai = AIPlayer(None, seed=3)
+    ai.search_mode = 'rollout'
+    ai.rollout = RolloutEvaluator(ai.evaluate_rows_batch, rollouts=8, depth=4, workers=0, seed=3)
+    ai.step(60 * 30)
+    assert not ai.game.game_over
+    assert ai.game.pieces_dropped > 5
+    print(f"✓ SUCCESS: Rollout AI placed {ai.game.pieces_dropped} pieces")
+
+
+if __name__ == "__main__":
+    test_greedy_move_matches_bitboard()
+    test_deal_sequences()
+    test_rollout_search()
+    test_rollout_ai()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Test script for the self-play dataset generator and its shards"""
+
+import os
+import tempfile
+import numpy as np
+from bitboard import place, clear_full_rows
+from evaluation import board_features
+from selfplay import (generate, iter_chunks, load_index, open_shards, play_game, write_shard,
+                      INDEX_FILE, RECORD_DTYPE)
+from tetromino import PIECE_TYPES
+from headless import save_json
+
+
+def test_selfplay_records_replay():
+    """Each record's move must lead to the next record's board"""
+    print("Testing self-play records...")
+
+    records = play_game(5, 40, game=3, depth=0)
+    assert records.dtype == RECORD_DTYPE and len(records) == 40
+    assert (records['game'] == 3).all() and (records['move'] == np.arange(40)).all()
+    assert np.array_equal(play_game(5, 40, game=3, depth=0), records)  # Seeded games repeat
+
+    for record, following in zip(records[:-1], records[1:]):
+        after, lines = clear_full_rows(place(tuple(int(row) for row in record['board']),
+                                             PIECE_TYPES[record['piece']], int(record['rotation']),
+                                             int(record['x']), int(record['y'])))
+        assert lines == record['lines']
+        assert list(following['board']) == after
+        assert np.allclose(record['features'], board_features(after, lines)[0])
+        assert following['piece'] == record['queue'][0]
+
+    assert records['lines_to_go'][0] == records['lines'].sum()
+    assert records['pieces_to_go'][-1] == 0 and not records['topped_out'].any()
+    print(f"✓ SUCCESS: {len(records)} records replay move by move")
+
+
+def test_selfplay_shards():
+    """Shards must memory-map, stream in chunks and grow with another run"""
+    print("Testing self-play shards and index...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        settings = dict(max_pieces=20, depth=0, workers=2, log=lambda message: None)
+        index = generate(folder, 3, games_per_shard=2, **settings)
+        assert index['games'] == 3 and len(index['shards']) == 2
+        assert index['records'] == 60
+
+        shards = open_shards(folder)
+        assert all(isinstance(shard, np.memmap) for shard in shards)
+        chunks = list(iter_chunks(folder, chunk_size=16))
+        assert max(len(chunk) for chunk in chunks) == 16
+        records = np.concatenate(chunks)
+        assert sorted(set(records['game'])) == [0, 1, 2]
+        assert np.array_equal(records[records['game'] == 1], play_game(1, 20, game=1, depth=0))
+
+        # A second run adds games and shards after the existing ones
+        index = generate(folder, 1, **settings)
+        assert load_index(folder) == index
+        assert index['games'] == 4 and len(index['shards']) == 3
+        assert index['shards'][-1]['games'] == [3, 4]
+
+    print("✓ SUCCESS: Self-play shards memory-map and append")
+
+
+def test_selfplay_resume_after_gap():
+    """A run resumed after shards finished out of order must not reuse files or games"""
+    print("Testing a resumed self-play run...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        settings = dict(max_pieces=10, depth=0, workers=1, log=lambda message: None)
+        index = generate(folder, 3, games_per_shard=1, **settings)
+
+        # Shard 2 finished but shard 1 never did before the run was stopped
+        dropped = index['shards'].pop(1)
+        os.remove(os.path.join(folder, dropped['file']))
+        index['records'] -= dropped['records']
+        index['games'] -= 1
+        save_json(index, os.path.join(folder, INDEX_FILE))
+        kept = np.load(os.path.join(folder, 'shard-00002.npy'))
+
+        index = generate(folder, 2, games_per_shard=1, **settings)
+        assert [shard['file'] for shard in index['shards']] == [
+            'shard-00000.npy', 'shard-00002.npy', 'shard-00003.npy', 'shard-00004.npy']
+        assert index['shards'][-1]['games'] == [4, 5] and index['games'] == 4
+        assert np.array_equal(np.load(os.path.join(folder, 'shard-00002.npy')), kept)
+        games = np.concatenate(open_shards(folder))['game']
+        assert sorted(set(games)) == [0, 2, 3, 4]
+
+        # Shards are never written over
+        try:
+            write_shard(os.path.join(folder, 'shard-00002.npy'), [9], 0, 10, 'beam', 0, None)
+        except FileExistsError:
+            pass
+        else:
+            raise AssertionError("write_shard overwrote an existing shard")
+
+    print("✓ SUCCESS: Resumed runs number shards and games after the existing ones")
+
+
+if __name__ == "__main__":
+    test_selfplay_records_replay()
+    test_selfplay_shards()
+    test_selfplay_resume_after_gap()
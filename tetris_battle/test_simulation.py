@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Test script to verify frame-stepped headless simulation"""
+
+import random
+from config import GRAVITY_TABLE, DAS_DELAY_FRAMES, DAS_SPEED_FRAMES
+from game import TetrisGame
+from ai_player import AIPlayer
+from sim_clock import FrameClock
+
+
+def test_gravity_frames():
+    """A piece must fall one row every GRAVITY_TABLE frames"""
+    game = TetrisGame(start_level=0, clock=FrameClock())
+    start_y = game.current_piece.y
+    game.step(GRAVITY_TABLE[0] - 1)
+    assert game.current_piece.y == start_y
+    game.step(1)
+    assert game.current_piece.y == start_y + 1
+    print("✓ SUCCESS: Gravity follows the frame table")
+
+
+def test_das_frames():
+    """Holding a direction moves once, then repeats after the DAS delay"""
+    game = TetrisGame(start_level=9)
+    start_x = game.current_piece.x
+
+    game.step(1, ['right'])
+    assert game.current_piece.x == start_x + 1
+    game.step(DAS_DELAY_FRAMES, ['right'])
+    assert game.current_piece.x == start_x + 1
+    game.step(DAS_SPEED_FRAMES, ['right'])
+    assert game.current_piece.x == start_x + 2
+    print("✓ SUCCESS: DAS timing is frame based")
+
+
+def test_headless_ai():
+    """An AI game runs headless without touching the wall clock"""
+    ai = AIPlayer(None, start_level=0)
+    ai.step(60 * 60)
+    assert ai.game.pieces_dropped > 0
+    assert ai.game.frame_count <= 60 * 60
+    print(f"✓ SUCCESS: Headless AI dropped {ai.game.pieces_dropped} pieces in one simulated minute")
+
+
+def game_state(game):
+    """Everything observable about a game, for comparing rollbacks"""
+    piece = game.current_piece
+    return (game.get_cells(), game.get_column_heights(), game.get_hole_count(),
+            game.score, game.lines_cleared, game.pieces_dropped, game.level,
+            game.game_over, game.next_piece, list(game.clearing_lines),
+            (piece.shape_type, piece.x, piece.y, piece.rotation),
+            game.generator.peek_types(10), game.garbage_rng.getstate())
+
+
+def play_randomly(game, rng, pieces):
+    """Hard drop pieces at random columns, with some garbage and clears"""
+    for _ in range(pieces):
+        if game.game_over:
+            return
+        game.current_piece.x = rng.randrange(-1, 9)
+        if game.check_collision(game.current_piece):
+            game.current_piece.x = 3
+        while game.move_piece(0, 1):
+            pass
+        game.lock_piece()
+        if game.clear_animation_active:
+            game.finish_line_clear()
+        if rng.random() < 0.2:
+            game.receive_garbage_lines(rng.randint(1, 3))
+
+
+def test_snapshot_restore():
+    """speculative() must roll a game back exactly, garbage and clears included"""
+    rng = random.Random(5)
+    game = TetrisGame(start_level=0, clock=FrameClock(), seed=11)
+    play_randomly(game, rng, 20)
+
+    snapshot = game.snapshot()
+    expected = game_state(game)
+    game.restore(snapshot)
+
+    for _ in range(20):
+        piece = game.current_piece
+        with game.speculative():
+            play_randomly(game, rng, rng.randint(1, 15))
+            if rng.random() < 0.3:
+                game.reset(seed=rng.randrange(100))
+        assert game.current_piece is piece
+        assert game_state(game) == expected
+        game.restore(snapshot)
+
+    # A rolled-back game keeps playing exactly like one that never speculated
+    twin = TetrisGame(start_level=0, clock=FrameClock(), seed=11)
+    play_randomly(twin, random.Random(5), 20)
+    play_randomly(game, random.Random(9), 30)
+    play_randomly(twin, random.Random(9), 30)
+    assert game_state(game) == game_state(twin)
+    print("✓ SUCCESS: Snapshots roll back exactly")
+
+
+if __name__ == "__main__":
+    test_gravity_frames()
+    test_das_frames()
+    test_headless_ai()
+    test_snapshot_restore()
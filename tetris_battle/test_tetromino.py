@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Test script to verify the precomputed tetromino tables match the shape matrices"""
+
+from tetromino import Tetromino, SHAPE_DATA, ROTATION_COUNTS
+
+
+def test_shape_tables():
+    """Offsets, bounding boxes and bottom profiles must match Tetromino.SHAPES"""
+    print("Testing precomputed tetromino tables...")
+
+    for shape_type, rotations in Tetromino.SHAPES.items():
+        assert ROTATION_COUNTS[shape_type] == len(rotations)
+        for rotation, shape in enumerate(rotations):
+            data = SHAPE_DATA[shape_type][rotation]
+            cells = [(col, row) for row in range(4) for col in range(4) if shape[row][col]]
+            assert sorted(data.offsets) == sorted(cells)
+
+            cols = [col for col, _ in cells]
+            rows = [row for _, row in cells]
+            assert data.bounding_box == (min(cols), min(rows), max(cols), max(rows))
+
+            for col, bottom in data.bottom_profile:
+                assert shape[bottom][col]
+                assert not any(shape[row][col] for row in range(bottom + 1, 4))
+
+            piece = Tetromino(shape_type, 5, 7)
+            piece.rotation = rotation
+            blocks = piece.get_blocks()
+            assert blocks == tuple((5 + col, 7 + row) for col, row in data.offsets)
+            # Built once per position, then shared
+            assert piece.copy().get_blocks() is blocks
+            piece.rotation = (rotation - 1) % len(rotations)
+            assert piece.get_rotated_blocks() is blocks
+
+    print("✓ SUCCESS: Tetromino tables match the shape matrices")
+
+
+if __name__ == "__main__":
+    test_shape_tables()
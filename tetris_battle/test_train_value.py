@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Test script for fitting AI weights to self-play data"""
+
+import os
+import tempfile
+import numpy as np
+from ai_player import AIPlayer
+from selfplay import generate, play_game
+from train_value import ValueFitter, chunk_features, fit, iter_game_chunks, save_profile
+
+
+def test_value_fit():
+    """Batched features must match the recorded ones, and LSTD(1) the Monte Carlo fit"""
+    print("Testing the linear value fit...")
+
+    records = np.concatenate([play_game(seed, 60, game=seed, depth=0) for seed in range(3)])
+    assert np.allclose(chunk_features(records), records['features'], atol=1e-4)
+
+    # Treated as finished games, TD(1) and least squares solve the same problem
+    ended = records.copy()
+    ended['topped_out'] = True
+    least_squares = ValueFitter('lstsq', gamma=0.9)
+    td = ValueFitter('td', gamma=0.9, lam=1.0)
+    for fitter in (least_squares, td):
+        fitter.add(ended)
+        fitter.solve()
+    assert np.allclose(least_squares.coefficients, td.coefficients, rtol=1e-6, atol=1e-8)
+    assert least_squares.rmse() <= least_squares.baseline_rmse()
+
+    # Games cut off by the piece limit lose the end of their returns
+    cut = ValueFitter('lstsq', gamma=0.9)
+    cut.add(records)
+    assert cut.records == len(records) - 3 * cut.horizon
+    print(f"✓ SUCCESS: RMSE {least_squares.rmse():.2f} vs {least_squares.baseline_rmse():.2f} "
+          f"lines for the mean")
+
+
+def test_profile_loads():
+    """A fitted profile streamed from shards must become AIPlayer's weights on request"""
+    print("Testing weights profiles from self-play data...")
+
+    with tempfile.TemporaryDirectory() as folder:
+        generate(folder, 3, games_per_shard=2, max_pieces=50, depth=0, workers=1,
+                 log=lambda message: None)
+        chunks = list(iter_game_chunks(folder, chunk_size=40))
+        assert sum(len(chunk) for chunk in chunks) == 150
+        assert all(chunk['move'][0] == 0 for chunk in chunks)  # Whole games only
+
+        fitter = fit(folder, 'td', gamma=0.95, lam=0.5, chunk_size=40, log=lambda message: None)
+        path = os.path.join(folder, 'profile.json')
+        save_profile(fitter, path)
+
+        defaults = AIPlayer(None).weights  # Built-in weights unless a profile is asked for
+        weights = AIPlayer(None, weights_file=path).weights
+
+    for key, weight in fitter.weights().items():
+        assert weights[key] == weight
+    assert weights['roof_penalty'] == defaults['roof_penalty']  # Not fitted, kept
+    print(f"✓ SUCCESS: Profile fitted on {fitter.records} positions loads into AIPlayer")
+
+
+if __name__ == "__main__":
+    test_value_fit()
+    test_profile_loads()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Test script to verify the evaluation transposition table"""
+
+from ai_player import AIPlayer
+from bitboard import rows_to_grid
+from transposition import TranspositionTable, ENTRY_BYTES, board_key
+
+
+def test_lru_eviction():
+    """The table must stay under its cap and evict the least recently used entry"""
+    table = TranspositionTable(3 * ENTRY_BYTES / (1024 * 1024))
+    assert table.max_entries == 3
+    keys = [board_key([row] * 20, 0) for row in range(4)]
+    for score, key in enumerate(keys[:3]):
+        table.put(key, float(score))
+
+    assert table.get(keys[0]) == 0.0  # keys[0] is now the most recent
+    table.put(keys[3], 3.0)           # evicts keys[1]
+    assert len(table) == 3
+    assert table.get(keys[1]) is None
+    assert table.get(keys[2]) == 2.0
+    assert (table.hits, table.misses) == (2, 1)
+    assert board_key([0] * 20, 1) != board_key([0] * 20, 0)
+    print("✓ SUCCESS: LRU eviction and counters work")
+
+
+def test_cached_scores_match():
+    """Cached scores must equal evaluate_grid and reset when the weights change"""
+    ai = AIPlayer(None, seed=8)
+    ai.step(60 * 30)
+    table = ai.eval_cache
+    assert table.hits > 0 and table.misses > 0
+    print(f"  after 30s of play: {table}")
+
+    rows = list(ai.game.board.rows)
+    expected = ai.evaluate_grid(rows_to_grid(rows), 0)
+    assert ai.evaluate_rows(rows, 0) == expected
+    assert ai.evaluate_rows(rows, 0) == expected
+
+    ai.weights = dict(ai.weights, holes=-10.0)
+    assert len(ai.eval_cache) == 0
+    try:
+        ai.weights['holes'] = -9.0  # In-place edits would leave stale scores cached
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("AIPlayer.weights must be read-only")
+    assert ai.weights['holes'] == -10.0
+    assert ai.evaluate_rows(rows, 0) == ai.evaluate_grid(rows_to_grid(rows), 0)
+    print("✓ SUCCESS: Cached scores match evaluate_grid")
+
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_cached_scores_match()
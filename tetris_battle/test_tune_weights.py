@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Test script for the headless weight tuner and weights files"""
+
+import os
+import tempfile
+import numpy as np
+from ai_player import AIPlayer
+from tune_weights import CrossEntropyTuner, TUNED_KEYS, play_game
+
+
+def test_tuner_checkpoint_and_weights_file():
+    """One generation writes a checkpoint that resumes exactly, and a loadable weights file"""
+    print("Testing cross-entropy weight tuning...")
+
+    defaults = AIPlayer(None).weights
+    # Same seed and weights, same game
+    assert play_game(defaults, 4, 30, depth=0) == play_game(defaults, 4, 30, depth=0)
+
+    with tempfile.TemporaryDirectory() as folder:
+        checkpoint = os.path.join(folder, 'checkpoint.json')
+        output = os.path.join(folder, 'weights.json')
+        settings = dict(population=3, seeds=(0,), max_pieces=30, depth=0, workers=2)
+
+        tuner = CrossEntropyTuner(defaults, **settings)
+        tuner.run(1, checkpoint, output, log=lambda message: None)
+        assert tuner.generation == 1 and len(tuner.history) == 1
+        assert os.path.exists(checkpoint) and os.path.exists(output)
+
+        resumed = CrossEntropyTuner(defaults, **settings)
+        resumed.load_checkpoint(checkpoint)
+        assert resumed.generation == 1
+        assert np.array_equal(resumed.mean, tuner.mean)
+        assert np.array_equal(resumed.sample(), tuner.sample())
+        assert resumed.best_weights == tuner.best_weights
+
+        ai = AIPlayer(None)
+        ai.evaluate_rows((0,) * 20, 0)
+        weights = ai.load_weights(output)
+        assert all(weights[key] == tuner.best_weights[key] for key in TUNED_KEYS)
+        assert weights['roof_penalty'] == defaults['roof_penalty']  # Untuned keys kept
+        assert len(ai.eval_cache) == 0  # New weights invalidate cached scores
+
+    print("✓ SUCCESS: Tuner checkpoints resume and weights files load into AIPlayer")
+
+
+if __name__ == "__main__":
+    test_tuner_checkpoint_and_weights_file()
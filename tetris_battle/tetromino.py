@@ -1,4 +1,5 @@
 import random
+from array import array
 from config import COLORS
 
 class Tetromino:
@@ -120,49 +121,47 @@ class Tetromino:
         ]
     }
     
+    __slots__ = ('shape_type', 'x', 'y', 'rotation')
+    
     def __init__(self, shape_type=None, x=3, y=0):
         if shape_type is None:
-            self.shape_type = random.choice(list(self.SHAPES.keys()))
+            self.shape_type = random.choice(PIECE_TYPES)
         else:
             self.shape_type = shape_type
         
         self.x = x
         self.y = y
         self.rotation = 0
-        self.color = COLORS[self.shape_type]
+    
+    @property
+    def color(self):
+        return COLORS[self.shape_type]
+    
+    @property
+    def shape_data(self):
+        """Shared precomputed data for the current shape and rotation"""
+        return SHAPE_DATA[self.shape_type][self.rotation]
         
     def get_shape(self):
         return self.SHAPES[self.shape_type][self.rotation]
     
     def get_rotated_shape(self, rotation_offset=1):
-        rotations = len(self.SHAPES[self.shape_type])
+        rotations = ROTATION_COUNTS[self.shape_type]
         new_rotation = (self.rotation + rotation_offset) % rotations
         return self.SHAPES[self.shape_type][new_rotation]
     
     def rotate(self):
         """Rotate piece - Game Boy style, no wall kicks"""
-        rotations = len(self.SHAPES[self.shape_type])
-        self.rotation = (self.rotation + 1) % rotations
+        self.rotation = (self.rotation + 1) % ROTATION_COUNTS[self.shape_type]
     
     def get_blocks(self):
-        """Get list of block positions for current piece"""
-        blocks = []
-        shape = self.get_shape()
-        for row in range(4):
-            for col in range(4):
-                if shape[row][col]:
-                    blocks.append((self.x + col, self.y + row))
-        return blocks
+        """Get block positions for current piece (a shared tuple, do not modify)"""
+        return SHAPE_DATA[self.shape_type][self.rotation].blocks_at(self.x, self.y)
     
     def get_rotated_blocks(self, rotation_offset=1):
         """Get blocks for rotated piece without actually rotating"""
-        blocks = []
-        shape = self.get_rotated_shape(rotation_offset)
-        for row in range(4):
-            for col in range(4):
-                if shape[row][col]:
-                    blocks.append((self.x + col, self.y + row))
-        return blocks
+        rotations = SHAPE_DATA[self.shape_type]
+        return rotations[(self.rotation + rotation_offset) % len(rotations)].blocks_at(self.x, self.y)
     
     def copy(self):
         """Create a copy of this tetromino"""
@@ -171,53 +170,146 @@ class Tetromino:
         return new_piece
 
 
+class ShapeData:
+    """Precomputed, shared cell data for one (shape, rotation)
+    
+    offsets: (col, row) of each block inside the 4x4 shape box
+    bounding_box: (min_col, min_row, max_col, max_row) of the blocks
+    bottom_profile: (col, lowest_row) for each occupied column, left to right
+    blocks_at(x, y): offsets translated to a board position, built on first use
+    """
+    __slots__ = ('shape_type', 'rotation', 'offsets', 'bounding_box', 'bottom_profile', '_blocks')
+    
+    def __init__(self, shape_type, rotation, shape):
+        self.shape_type = shape_type
+        self.rotation = rotation
+        self.offsets = tuple((col, row) for row in range(4) for col in range(4) if shape[row][col])
+        
+        cols = [col for col, _ in self.offsets]
+        rows = [row for _, row in self.offsets]
+        self.bounding_box = (min(cols), min(rows), max(cols), max(rows))
+        self.bottom_profile = tuple(
+            (col, max(row for c, row in self.offsets if c == col))
+            for col in sorted(set(cols))
+        )
+        self._blocks = {}
+    
+    def blocks_at(self, x, y):
+        """Board (x, y) of each block with the shape box at x, y
+        
+        The game redraws a piece at the same few positions every frame, so
+        each position's tuple is built once and shared.
+        """
+        blocks = self._blocks.get((x, y))
+        if blocks is None:
+            blocks = self._blocks[(x, y)] = tuple((x + col, y + row) for col, row in self.offsets)
+        return blocks
+
+
+PIECE_TYPES = tuple(Tetromino.SHAPES.keys())
+
+# Built once at import: SHAPE_DATA[shape_type][rotation] -> ShapeData
+SHAPE_DATA = {
+    shape_type: tuple(ShapeData(shape_type, rotation, shape) for rotation, shape in enumerate(rotations))
+    for shape_type, rotations in Tetromino.SHAPES.items()
+}
+ROTATION_COUNTS = {shape_type: len(rotations) for shape_type, rotations in SHAPE_DATA.items()}
+
+
 class GameBoyRandomizer:
     """Game Boy Tetris pseudo-random piece generator
     
     Implements a simplified version that ensures good piece distribution
     while preventing the same piece from appearing too frequently.
+    
+    Each randomizer owns its own random.Random stream, so two randomizers
+    built with the same seed deal the same pieces. Pieces are pre-generated
+    a whole bag at a time into a compact array('b') of PIECE_TYPES indices.
     """
     
-    def __init__(self):
-        self.pieces = ['I', 'O', 'T', 'S', 'Z', 'J', 'L']
-        self.bag = self.pieces.copy()
-        self.current_piece = None
-        self.next_piece = None
+    BAG_SIZE = 7
+    
+    def __init__(self, seed=None):
+        self.pieces = list(PIECE_TYPES)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.sequence = array('b')
+        self.position = 0  # Index of the piece get_next() deals next
         self._generate_initial_pieces()
     
     def _generate_initial_pieces(self):
-        """Generate first two pieces"""
-        self.current_piece = random.choice(self.pieces)
-        self.next_piece = self._get_random_piece()
-    
-    def _get_random_piece(self):
-        """Get a random piece using bag randomizer for better distribution"""
-        if not self.bag:
-            # Refill the bag with all pieces
-            self.bag = self.pieces.copy()
-            # Shuffle to ensure randomness
-            random.shuffle(self.bag)
+        """Generate the first piece and the first bag
+        
+        The first piece is a free pick. As on the original generator, the
+        first bag is dealt unshuffled, from the end of the piece list;
+        only the bags after it are shuffled.
+        """
+        self.sequence.append(self.rng.randrange(len(self.pieces)))
+        self.sequence.extend(reversed(range(len(self.pieces))))
+    
+    def _fill(self, length):
+        """Make sure at least `length` pieces are generated, a whole bag at a time"""
+        sequence = self.sequence
+        rng = self.rng
+        while len(sequence) < length:
+            # Refill the bag with all pieces and shuffle it
+            bag = list(range(len(self.pieces)))
+            rng.shuffle(bag)
+            sequence.extend(bag)
+    
+    def generate_sequence(self, length):
+        """Pre-generate and return the next `length` pieces as an array('b')
         
-        # Remove and return a piece from the bag
-        return self.bag.pop()
+        Values are indices into PIECE_TYPES, starting with the piece the
+        next get_next() call will deal.
+        """
+        self._fill(self.position + length)
+        return self.sequence[self.position:self.position + length]
+    
+    @classmethod
+    def sequence_for_seed(cls, seed, length):
+        """Bulk-generate the first `length` pieces dealt for a seed"""
+        return cls(seed).generate_sequence(length)
+    
+    @property
+    def current_piece(self):
+        """Shape of the piece get_next() deals next"""
+        return PIECE_TYPES[self.sequence[self.position]]
+    
+    @property
+    def next_piece(self):
+        """Shape of the piece after current_piece"""
+        return PIECE_TYPES[self.sequence[self.position + 1]]
+    
+    @property
+    def bag(self):
+        """Shapes left in the 7-bag after next_piece
+        
+        The first piece is a free pick; every piece after it comes from a
+        shuffled bag of all seven shapes.
+        """
+        horizon = self.position + 1
+        bag_end = 1 + ((horizon - 1) // self.BAG_SIZE + 1) * self.BAG_SIZE
+        self._fill(bag_end)
+        return [PIECE_TYPES[code] for code in self.sequence[horizon + 1:bag_end]]
     
     def get_next(self):
         """Get the next piece"""
-        piece = Tetromino(self.current_piece)
+        piece = Tetromino(PIECE_TYPES[self.sequence[self.position]])
         
         # Move pieces forward
-        self.current_piece = self.next_piece
-        self.next_piece = self._get_random_piece()
+        self.position += 1
+        self._fill(self.position + 2)
         
         return piece
     
     def peek(self, count=1):
-        """Peek at upcoming pieces (Game Boy only shows 1 next piece)"""
-        if count == 1:
-            return [Tetromino(self.current_piece)]
-        else:
-            # Game Boy only shows 1 next piece
-            return [Tetromino(self.current_piece)]
+        """Peek at the next `count` pieces get_next() will deal"""
+        return [Tetromino(shape_type) for shape_type in self.peek_types(count)]
+    
+    def peek_types(self, count=1):
+        """Peek at the next `count` piece shapes without building pieces"""
+        return [PIECE_TYPES[code] for code in self.generate_sequence(count)]
 
 
 # Alias for backwards compatibility
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Fit AIPlayer's heuristic weights as a linear value function of self-play data
+
+The AI scores a placement as a linear function of the evaluation
+FEATURES of the board it leaves (evaluate_grid / evaluate_batch): each
+feature with a weights key gets that weight, the others count once. This
+module fits those weights so the score predicts the lines still to come,
+from the positions selfplay.py recorded:
+
+- 'lstsq': least squares on the discounted Monte Carlo return of each
+  position (lines cleared from that move on, discounted by gamma).
+- 'td': least-squares TD(lambda) (LSTD), which bootstraps from the score
+  of the next position and with lambda = 1 becomes the Monte Carlo fit.
+
+The data is streamed: chunks of whole games are read from the
+memory-mapped shards, the boards each move left are rebuilt and their
+features computed in one evaluation.batch_features call per chunk, and
+only small per-feature matrices are kept between chunks. The result is a
+weights profile for AIPlayer.load_weights, by default written to the
+AI_WEIGHTS_FILE in tetris_battle/ that `python main.py --weights` plays.
+
+    python train_value.py --data selfplay_data --method td
+"""
+import argparse
+import math
+import numpy as np
+from bitboard import PIECE_MASKS, X_OFFSET, FULL_ROW
+from evaluation import FEATURES, batch_features, rows_to_cells
+from selfplay import open_shards
+from tetromino import PIECE_TYPES
+from headless import save_json
+from config import GRID_WIDTH, GRID_HEIGHT, AI_WEIGHTS_FILE, weights_path
+
+# FEATURES columns with a weights key, and the ones added unweighted
+WEIGHTED = tuple(index for index, (_, key) in enumerate(FEATURES) if key is not None)
+WEIGHT_KEYS = tuple(FEATURES[index][1] for index in WEIGHTED)
+UNWEIGHTED = tuple(index for index, (_, key) in enumerate(FEATURES) if key is None)
+
+
+def _build_mask_table():
+    """(piece, rotation, x + X_OFFSET, dy) -> row mask, for placing pieces in bulk"""
+    rotations = max(len(PIECE_MASKS[shape_type]) for shape_type in PIECE_TYPES)
+    table = np.zeros((len(PIECE_TYPES), rotations, GRID_WIDTH + X_OFFSET, 4), dtype=np.uint16)
+    for code, shape_type in enumerate(PIECE_TYPES):
+        for rotation, by_x in enumerate(PIECE_MASKS[shape_type]):
+            for index, masks in enumerate(by_x):
+                for dy, mask in masks or ():
+                    table[code, rotation, index, dy] = mask
+    return table
+
+
+MASK_TABLE = _build_mask_table()
+
+
+def after_boards(records):
+    """Rebuild the board each record's move left: (rows (N, 20), lines cleared (N,))"""
+    count = len(records)
+    rows = np.array(records['board'], dtype=np.uint16)
+    masks = MASK_TABLE[records['piece'], records['rotation'],
+                       records['x'].astype(np.int64) + X_OFFSET]
+    boards = np.arange(count)
+    for dy in range(masks.shape[1]):
+        row = records['y'].astype(np.int64) + dy
+        inside = (masks[:, dy] != 0) & (row >= 0) & (row < GRID_HEIGHT)
+        rows[boards[inside], row[inside]] |= masks[inside, dy]
+
+    # Full rows sort to the top (kept rows stay in order) and are emptied
+    full = rows == FULL_ROW
+    lines = full.sum(axis=1)
+    order = np.argsort(~full, axis=1, kind='stable')
+    rows = np.take_along_axis(rows, order, axis=1)
+    rows[np.arange(GRID_HEIGHT) < lines[:, None]] = 0
+    return rows, lines
+
+
+def chunk_features(records, recompute=True):
+    """FEATURES of every record's resulting board, (N, len(FEATURES))
+
+    recompute rebuilds them from the boards with the current evaluation
+    code; otherwise the features stored at generation time are used.
+    """
+    if not recompute:
+        return np.asarray(records['features'], dtype=float)
+    rows, lines = after_boards(records)
+    features, _ = batch_features(rows_to_cells(rows), lines)
+    return features
+
+
+def game_bounds(records):
+    """Start index and length of each game in a chunk of whole games"""
+    starts = np.flatnonzero(records['move'] == 0)
+    lengths = np.diff(np.append(starts, len(records)))
+    return starts, lengths
+
+
+def decayed_sums(values, starts, lengths, decay, reverse=False):
+    """Running sums out[t] = values[t] + decay * out[t -/+ 1] within each game
+
+    Forward for eligibility traces, reverse for discounted returns. Every
+    game in the chunk steps along together, one move per iteration.
+    """
+    out = np.array(values, dtype=float)
+    for step in range(1, int(lengths.max(initial=0))):
+        games = lengths > step
+        if reverse:
+            index = starts[games] + lengths[games] - 1 - step
+            out[index] += decay * out[index + 1]
+        else:
+            index = starts[games] + step
+            out[index] += decay * out[index - 1]
+    return out
+
+
+def iter_game_chunks(directory, chunk_size=1 << 18):
+    """Yield a dataset's records in chunks of whole games (about chunk_size each)
+
+    A chunk is cut back to the start of the game running over its end,
+    or stretched to that game's end if it would be empty.
+    """
+    for shard in open_shards(directory):
+        start = 0
+        while start < len(shard):
+            end = start + chunk_size
+            if end < len(shard):
+                cut = end - int(shard['move'][end])
+                end = cut if cut > start else end + int(shard['pieces_to_go'][end]) + 1
+            yield shard[start:end]
+            start = end
+
+
+class ValueFitter:
+    """Streaming least-squares / LSTD(lambda) fit of the AI's feature weights
+
+    Feed chunks of whole games to add(), then solve(). Only the
+    (features + 1) square matrices are kept, so the data can be any size.
+    Returns are in lines, discounted by gamma. Games cut off by the piece
+    limit have no true end: 'td' drops their last transition and 'lstsq'
+    their last `horizon` positions, whose returns would be cut short.
+    """
+
+    def __init__(self, method='td', gamma=0.99, lam=0.7, recompute=True):
+        if method not in ('lstsq', 'td'):
+            raise ValueError(f"Unknown fitting method {method!r} (choose 'lstsq' or 'td')")
+        self.method = method
+        self.gamma = gamma
+        self.lam = lam
+        self.recompute = recompute
+        size = len(WEIGHTED) + 1  # Plus an intercept
+        self.horizon = math.ceil(math.log(0.01) / math.log(gamma)) if gamma < 1 else None
+        self.a = np.zeros((size, size))
+        self.b = np.zeros(size)
+        # Monte Carlo normal equations, kept for the fit error of either method
+        self.xtx = np.zeros((size, size))
+        self.xty = np.zeros(size)
+        self.yty = 0.0
+        self.observed = np.zeros(len(WEIGHTED), dtype=np.int64)
+        self.records = 0
+        self.coefficients = None
+
+    def add(self, records):
+        """Accumulate one chunk of whole games"""
+        if not len(records):
+            return
+        features = chunk_features(records, self.recompute)
+        x = np.hstack([features[:, WEIGHTED], np.ones((len(records), 1))])
+        fixed = features[:, UNWEIGHTED].sum(axis=1)  # Counted with weight 1
+        reward = records['lines'].astype(float)
+        starts, lengths = game_bounds(records)
+        last = starts + lengths - 1
+        cut_off = ~records['topped_out'][last]
+
+        # Monte Carlo: discounted return, less the unweighted part of the score
+        target = decayed_sums(reward, starts, lengths, self.gamma, reverse=True) - fixed
+        keep = np.ones(len(records), dtype=bool)
+        if self.horizon is not None:
+            keep &= records['topped_out'] | (records['pieces_to_go'] >= self.horizon)
+        else:
+            keep &= records['topped_out']
+        self.xtx += x[keep].T @ x[keep]
+        self.xty += x[keep].T @ target[keep]
+        self.yty += float(target[keep] @ target[keep])
+        self.records += int(keep.sum())
+        self.observed += (features[keep][:, WEIGHTED] != 0).sum(axis=0)
+
+        # LSTD(lambda): next position's features are zero after topping out
+        next_x = np.zeros_like(x)
+        next_x[:-1] = x[1:]
+        next_x[last] = 0.0
+        next_fixed = np.zeros_like(fixed)
+        next_fixed[:-1] = fixed[1:]
+        next_fixed[last] = 0.0
+        traces = decayed_sums(x, starts, lengths, self.gamma * self.lam)
+        step = np.ones(len(records), dtype=bool)
+        step[last[cut_off]] = False
+        shaped = reward + self.gamma * next_fixed - fixed
+        self.a += traces[step].T @ (x - self.gamma * next_x)[step]
+        self.b += traces[step].T @ shaped[step]
+
+    def solve(self):
+        """Fit the coefficients; returns the weights dict for AIPlayer"""
+        if self.method == 'lstsq':
+            matrix, vector = self.xtx, self.xty
+        else:
+            matrix, vector = self.a, self.b
+        # Least squares copes with features that never varied (e.g. no stack got tall)
+        self.coefficients = np.linalg.lstsq(matrix, vector, rcond=None)[0]
+        return self.weights()
+
+    def weights(self):
+        """Fitted weights of the features seen in the data, plus a plain multiplier
+
+        Features that were always zero keep their current weights. The
+        efficiency multiplier is set to 1 so AIPlayer scores exactly the
+        linear value function.
+        """
+        weights = {key: float(weight)
+                   for key, weight, seen in zip(WEIGHT_KEYS, self.coefficients, self.observed)
+                   if seen}
+        weights['efficiency_multiplier'] = 1.0
+        return weights
+
+    def rmse(self):
+        """Root mean squared error of the fit against the Monte Carlo returns"""
+        if self.coefficients is None or not self.records:
+            return float('nan')
+        w = self.coefficients
+        error = self.yty - 2 * w @ self.xty + w @ self.xtx @ w
+        return math.sqrt(max(error, 0.0) / self.records)
+
+    def baseline_rmse(self):
+        """RMSE of predicting the mean return everywhere, for comparison"""
+        if not self.records:
+            return float('nan')
+        mean = self.xty[-1] / self.records
+        return math.sqrt(max(self.yty / self.records - mean * mean, 0.0))
+
+
+def fit(directory, method='td', gamma=0.99, lam=0.7, chunk_size=1 << 18, recompute=True,
+        log=print):
+    """Stream a self-play dataset through a ValueFitter and solve it"""
+    fitter = ValueFitter(method, gamma, lam, recompute)
+    for number, records in enumerate(iter_game_chunks(directory, chunk_size), 1):
+        fitter.add(records)
+        log(f"Chunk {number}: {fitter.records} positions")
+    fitter.solve()
+    return fitter
+
+
+def save_profile(fitter, path):
+    """Write the fitted weights as a weights file for AIPlayer.load_weights"""
+    save_json({
+        'weights': fitter.weights(),
+        'method': fitter.method,
+        'gamma': fitter.gamma,
+        'lambda': fitter.lam,
+        'positions': fitter.records,
+        'rmse': fitter.rmse(),
+    }, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit AIPlayer weights to self-play data")
+    parser.add_argument('--data', default='selfplay_data', help="selfplay.py dataset directory")
+    parser.add_argument('--method', choices=('lstsq', 'td'), default='td')
+    parser.add_argument('--gamma', type=float, default=0.99, help="discount per piece")
+    parser.add_argument('--lam', type=float, default=0.7, help="TD(lambda) trace decay")
+    parser.add_argument('--chunk-size', type=int, default=1 << 18, help="positions per chunk")
+    parser.add_argument('--stored-features', action='store_true',
+                        help="use the features saved in the shards instead of recomputing")
+    parser.add_argument('--output', default=weights_path(),
+                        help=f"weights file (default: tetris_battle/{AI_WEIGHTS_FILE})")
+    args = parser.parse_args()
+
+    fitter = fit(args.data, args.method, args.gamma, args.lam, args.chunk_size,
+                 not args.stored_features)
+    save_profile(fitter, args.output)
+    print(f"Fit {fitter.records} positions: RMSE {fitter.rmse():.2f} lines "
+          f"(mean-only {fitter.baseline_rmse():.2f}), weights written to {args.output}")
+    for key, weight in fitter.weights().items():
+        print(f"  {key}: {weight:.4f}")
+
+
+if __name__ == "__main__":
+    main()
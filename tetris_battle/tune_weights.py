@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Headless weight tuning for AIPlayer - cross-entropy method
+
+Each generation samples a population of weight vectors from a Gaussian,
+plays every candidate on the same seeded piece sequences and refits the
+Gaussian to the elite fraction. Games run in fast-forward on the real
+TetrisGame rules: the AI picks each move with its normal search, the
+piece is locked where the search put it and TetrisGame does the line
+clears, scoring, levels and spawns, so the tuned weights carry straight
+over to live play.
+
+Only the weights evaluate_grid actually uses (evaluation.FEATURES plus
+the efficiency multiplier) are tuned; the rest keep their defaults.
+
+Candidates are played on a process pool. After every generation the
+search state is written to a JSON checkpoint (atomically, so a run killed
+mid-write keeps the previous checkpoint) and a run started with the same
+checkpoint path resumes where it stopped. The best weights found so far
+go to a weights file that AIPlayer.load_weights reads.
+
+    python tune_weights.py --generations 30 --workers 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import headless
+from evaluation import FEATURES
+from headless import save_json
+from config import AI_SEARCH_DEPTH, AI_WEIGHTS_FILE, weights_path
+
+# Weights evaluate_grid reads, in a fixed order for the search vectors
+TUNED_KEYS = tuple(key for _, key in FEATURES if key is not None) + ('efficiency_multiplier',)
+
+CHECKPOINT_VERSION = 1
+
+
+def play_game(weights, seed, max_pieces, depth=AI_SEARCH_DEPTH):
+    """Play one headless game with the given weights and return the lines cleared
+
+    The game ends at game over or after max_pieces pieces.
+    """
+    from ai_player import AIPlayer
+    ai = AIPlayer(None, seed=seed)
+    ai.weights = dict(ai.weights, **weights)
+    ai.planner.depth = depth
+    headless.play_game(ai.game, ai.find_best_move, max_pieces)
+    return ai.game.lines_cleared
+
+
+def evaluate_weights(weights, seeds, max_pieces, depth=AI_SEARCH_DEPTH):
+    """Fitness of a weights dict: mean lines cleared over the seeds"""
+    lines = [play_game(weights, seed, max_pieces, depth) for seed in seeds]
+    return sum(lines) / len(lines)
+
+
+def vector_to_weights(vector):
+    return {key: float(value) for key, value in zip(TUNED_KEYS, vector)}
+
+
+def weights_to_vector(weights):
+    return np.array([weights[key] for key in TUNED_KEYS], dtype=float)
+
+
+def save_weights(weights, path, fitness=None, generation=None):
+    """Write a weights file for AIPlayer.load_weights"""
+    save_json({'weights': weights, 'fitness': fitness, 'generation': generation}, path)
+
+
+class CrossEntropyTuner:
+    """Cross-entropy method over TUNED_KEYS with a JSON checkpoint
+
+    population: candidates per generation
+    elite_fraction: share of the population the Gaussian is refitted to
+    noise: extra standard deviation added each generation so the search
+        doesn't collapse early (decays linearly to zero over the run)
+    seeds: piece sequence seeds every candidate plays
+    """
+
+    def __init__(self, initial_weights, population=24, elite_fraction=0.25, sigma=1.0,
+                 noise=0.5, seeds=(0, 1, 2), max_pieces=400, depth=AI_SEARCH_DEPTH,
+                 workers=None, rng_seed=0):
+        self.population = population
+        self.elite_count = max(1, int(round(population * elite_fraction)))
+        self.noise = noise
+        self.seeds = tuple(seeds)
+        self.max_pieces = max_pieces
+        self.depth = depth
+        self.workers = workers or os.cpu_count() or 1
+        self.mean = weights_to_vector(initial_weights)
+        self.std = np.full(len(TUNED_KEYS), float(sigma))
+        self.rng = np.random.default_rng(rng_seed)
+        self.generation = 0
+        self.best_weights = vector_to_weights(self.mean)
+        self.best_fitness = float('-inf')
+        self.history = []  # Per-generation stats
+
+    def sample(self):
+        """Draw one generation of weight vectors; the current mean is always included"""
+        samples = self.rng.normal(self.mean, self.std, size=(self.population, len(TUNED_KEYS)))
+        samples[0] = self.mean
+        return samples
+
+    def step(self, pool, total_generations):
+        """Run one generation on the pool and refit the distribution"""
+        start = time.perf_counter()
+        samples = self.sample()
+        futures = [pool.submit(evaluate_weights, vector_to_weights(vector), self.seeds,
+                               self.max_pieces, self.depth)
+                   for vector in samples]
+        fitness = np.array([future.result() for future in futures])
+
+        elite = samples[np.argsort(-fitness, kind='stable')[:self.elite_count]]
+        remaining = max(0.0, 1.0 - self.generation / max(1, total_generations))
+        self.mean = elite.mean(axis=0)
+        self.std = elite.std(axis=0) + self.noise * remaining
+
+        best = int(np.argmax(fitness))
+        if fitness[best] > self.best_fitness:
+            self.best_fitness = float(fitness[best])
+            self.best_weights = vector_to_weights(samples[best])
+        self.generation += 1
+        self.history.append({
+            'generation': self.generation,
+            'best': float(fitness[best]),
+            'mean': float(fitness.mean()),
+            'elite_mean': float(np.sort(fitness)[-self.elite_count:].mean()),
+            'seconds': time.perf_counter() - start,
+        })
+        return self.history[-1]
+
+    def run(self, generations, checkpoint=None, output=None, log=print):
+        """Tune until `generations` generations are done, checkpointing each one"""
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+            while self.generation < generations:
+                stats = self.step(pool, generations)
+                log(f"Generation {stats['generation']}/{generations}: best {stats['best']:.1f} "
+                    f"mean {stats['mean']:.1f} elite {stats['elite_mean']:.1f} lines "
+                    f"({stats['seconds']:.1f}s)")
+                if checkpoint:
+                    self.save_checkpoint(checkpoint)
+                if output:
+                    save_weights(self.best_weights, output, self.best_fitness, self.generation)
+        return self.best_weights
+
+    def state(self):
+        return {
+            'version': CHECKPOINT_VERSION,
+            'keys': list(TUNED_KEYS),
+            'generation': self.generation,
+            'mean': self.mean.tolist(),
+            'std': self.std.tolist(),
+            'rng': self.rng.bit_generator.state,
+            'best_weights': self.best_weights,
+            'best_fitness': self.best_fitness,
+            'history': self.history,
+            'settings': {
+                'population': self.population,
+                'elite_count': self.elite_count,
+                'noise': self.noise,
+                'seeds': list(self.seeds),
+                'max_pieces': self.max_pieces,
+                'depth': self.depth,
+            },
+        }
+
+    def save_checkpoint(self, path):
+        save_json(self.state(), path)
+
+    def load_checkpoint(self, path):
+        """Resume from a checkpoint written by save_checkpoint"""
+        with open(path) as f:
+            state = json.load(f)
+        if state.get('version') != CHECKPOINT_VERSION or state['keys'] != list(TUNED_KEYS):
+            raise ValueError(f"{path} is not a compatible tuning checkpoint")
+        settings = state['settings']
+        self.population = settings['population']
+        self.elite_count = settings['elite_count']
+        self.noise = settings['noise']
+        self.seeds = tuple(settings['seeds'])
+        self.max_pieces = settings['max_pieces']
+        self.depth = settings['depth']
+        self.generation = state['generation']
+        self.mean = np.array(state['mean'])
+        self.std = np.array(state['std'])
+        self.rng.bit_generator.state = state['rng']
+        self.best_weights = state['best_weights']
+        self.best_fitness = state['best_fitness']
+        self.history = state['history']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune AIPlayer weights with the cross-entropy method")
+    parser.add_argument('--generations', type=int, default=30)
+    parser.add_argument('--population', type=int, default=24)
+    parser.add_argument('--elite', type=float, default=0.25, help="elite fraction")
+    parser.add_argument('--sigma', type=float, default=1.0, help="initial standard deviation")
+    parser.add_argument('--noise', type=float, default=0.5, help="extra std added per generation")
+    parser.add_argument('--games', type=int, default=3, help="seeded games per candidate")
+    parser.add_argument('--max-pieces', type=int, default=400)
+    parser.add_argument('--depth', type=int, default=AI_SEARCH_DEPTH, help="planner depth")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0, help="sampling seed")
+    parser.add_argument('--checkpoint', default='tune_checkpoint.json')
+    parser.add_argument('--output', default=weights_path(),
+                        help=f"weights file (default: tetris_battle/{AI_WEIGHTS_FILE})")
+    args = parser.parse_args()
+
+    from ai_player import AIPlayer
+    defaults = AIPlayer(None).weights
+    tuner = CrossEntropyTuner(defaults, population=args.population, elite_fraction=args.elite,
+                              sigma=args.sigma, noise=args.noise, seeds=range(args.games),
+                              max_pieces=args.max_pieces, depth=args.depth,
+                              workers=args.workers, rng_seed=args.seed)
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        tuner.load_checkpoint(args.checkpoint)
+        print(f"Resuming from {args.checkpoint} at generation {tuner.generation}")
+
+    best = tuner.run(args.generations, args.checkpoint, args.output)
+    print(f"Best fitness {tuner.best_fitness:.1f} lines, weights written to {args.output}")
+    for key in TUNED_KEYS:
+        print(f"  {key}: {best[key]:.3f} (default {defaults[key]})")
+
+
+if __name__ == "__main__":
+    main()